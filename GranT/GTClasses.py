@@ -3,6 +3,8 @@ log = logging.getLogger(__name__)
 
 
 class Car(object):
+    __slots__ = ('id', 'model', 'year', 'manufacture', 'driveTrain', 'catclass')
+
     def __init__(self, id, model, Manufacture, DriveTrain, ClassCat):
         self.id = id
         self.model = model
@@ -18,6 +20,19 @@ class Car(object):
 class CustCarSettings(object):
     # TESTING: Other classes are not going to be embedded. Using more memory with it.
     #          FrontEnd can just query to get further object detail. i.e. query car_id
+
+    # car_setting columns in the order from_row expects
+    dbColumns = ('id', 'car_id', 'cat_id', 'name', 'max_power', 'max_torque',
+                 'power_ratio', 'traction_control', 'brake_balance', 'top_speed',
+                 'gear_1', 'gear_2', 'gear_3', 'gear_4', 'gear_5', 'gear_6', 'gear_7',
+                 'final_gear', 'weight', 'weight_reduction', 'tire_code', 'accel',
+                 'braking', 'max_speed', 'cornering', 'stability')
+    # Attribute each property stores its value in
+    _dbAttrs = tuple(f"_{x}" for x in dbColumns)
+    __slots__ = _dbAttrs + ('_gearRatios',)
+    # Gear text columns in the order of gearRatios
+    gearColumns = ('gear_1', 'gear_2', 'gear_3', 'gear_4', 'gear_5', 'gear_6', 'gear_7', 'final_gear')
+
     def __init__(self, id, car_id, name, cat_id):
         self.id = id
         self.accel = None
@@ -46,6 +61,60 @@ class CustCarSettings(object):
         self.weight = None
         self.weight_reduction = None
 
+    @classmethod
+    def from_row(cls, row):
+        """Create from a car_setting row without validating the values.
+        sqlite has already typed them. Use the constructor and properties for
+        values from a user.
+
+        Args:
+            row (tuple): Values in the order of dbColumns
+
+        Returns:
+            CustCarSettings object
+        """
+        obj = cls.__new__(cls)
+        for attr, val in zip(cls._dbAttrs, row):
+            setattr(obj, attr, val)
+        obj._gearRatios = None
+        return obj
+
+    @classmethod
+    def from_rows(cls, rows):
+        """from_row for many rows.
+
+        Args:
+            rows (iterable): car_setting rows in the order of dbColumns
+
+        Returns:
+            list: CustCarSettings objects
+        """
+        new = cls.__new__
+        attrs = cls._dbAttrs
+        result = []
+        for row in rows:
+            obj = new(cls)
+            for attr, val in zip(attrs, row):
+                setattr(obj, attr, val)
+            obj._gearRatios = None
+            result.append(obj)
+        return result
+
+    def __repr__(self):
+        fields = ", ".join(f"{x}={getattr(self, x)!r}" for x in self.dbColumns)
+        return f"CustCarSettings({fields})"
+
+    @property
+    def gearRatios(self):
+        """tuple: gear_1 to gear_7 and final_gear as float ratios. ("1.2345/10" is 1.2345)
+        None where the gear is not set or not a number. Decoded on first use
+        and kept until a gear is changed.
+        """
+        ratios = self._gearRatios
+        if ratios is None:
+            ratios = self._gearRatios = tuple(_gearRatio(getattr(self, x)) for x in self.gearColumns)
+        return ratios
+
     @property
     def stability(self):
         return self._stability
@@ -198,6 +267,7 @@ class CustCarSettings(object):
     @gear_1.setter
     def gear_1(self,val):
         self._gear_1 = self.validate_strORNone('gear_1',val)
+        self._gearRatios = None
 
     @property
     def gear_2(self):
@@ -206,6 +276,7 @@ class CustCarSettings(object):
     @gear_2.setter
     def gear_2(self,val):
         self._gear_2 = self.validate_strORNone('gear_2',val)
+        self._gearRatios = None
 
     @property
     def gear_3(self):
@@ -214,6 +285,7 @@ class CustCarSettings(object):
     @gear_3.setter
     def gear_3(self,val):
         self._gear_3 = self.validate_strORNone('gear_3',val)
+        self._gearRatios = None
 
     @property
     def gear_4(self):
@@ -222,6 +294,7 @@ class CustCarSettings(object):
     @gear_4.setter
     def gear_4(self,val):
         self._gear_4 = self.validate_strORNone('gear_4',val)
+        self._gearRatios = None
 
     @property
     def gear_5(self):
@@ -230,6 +303,7 @@ class CustCarSettings(object):
     @gear_5.setter
     def gear_5(self,val):
         self._gear_5 = self.validate_strORNone('gear_5',val)
+        self._gearRatios = None
 
     @property
     def gear_6(self):
@@ -238,6 +312,7 @@ class CustCarSettings(object):
     @gear_6.setter
     def gear_6(self,val):
         self._gear_6 = self.validate_strORNone('gear_6',val)
+        self._gearRatios = None
 
     @property
     def gear_7(self):
@@ -246,6 +321,7 @@ class CustCarSettings(object):
     @gear_7.setter
     def gear_7(self,val):
         self._gear_7 = self.validate_strORNone('gear_7',val)
+        self._gearRatios = None
 
     @property
     def final_gear(self):
@@ -254,6 +330,7 @@ class CustCarSettings(object):
     @final_gear.setter
     def final_gear(self,val):
         self._final_gear = self.validate_strORNone('final_gear',val)
+        self._gearRatios = None
 
     def convert_floatORNone(self,key,val):
         """Convert val to float or None. If not able to ValueError is raised
@@ -366,7 +443,23 @@ class CustCarSettings(object):
         return val
 
 
+def _gearRatio(text):
+    """Internal use only. Ratio from gear text, the number before any '/'.
+
+    Returns:
+        float: None if text is None or not a number
+    """
+    if text is None:
+        return None
+    try:
+        return float(text.partition('/')[0])
+    except ValueError:
+        return None
+
+
 class Circuit(object):
+    __slots__ = ('id', 'name')
+
     def __init__(self, id, name):
         """
         Circut object. This object is a property of different race tracks.
@@ -382,24 +475,28 @@ class Circuit(object):
 
 
 class ClassCat(object):
-    def __init__(self, id, name, desc):
+    __slots__ = ('id', 'name', 'desc', 'sortOrder')
+
+    def __init__(self, id, name, desc, sortOrder=None):
         """
         Class/Category object. Classification for cars.
 
         id   : type int. Unique for all class/cat's in db.
         name : type str. Short name of the class/cat. Unique in db.
         desc : type str. Full text describing the class/cat.
+        sortOrder : type int. Order which the object should be sorted.
         """
         self.id = id
         self.name = name
         self.desc = desc
-        self.sortOrder = None
+        self.sortOrder = sortOrder
 
     def __repr__(self):
         return f"ClassCat(id={self.id}, name={self.name}, desc={self.desc})"
 
 
 class Country(object):
+    __slots__ = ('id', 'cntryName', 'alpha2', 'alpha3', 'region')
 
     def __init__(self, cntryID, cntryName, alpha2, alpha3, region):
         self.id = cntryID
@@ -413,6 +510,8 @@ class Country(object):
 
 
 class DriveTrain(object):
+    __slots__ = ('id', 'code', 'desc')
+
     def __init__(self, id, code, desc):
         """
         Drive Train object. Primarily used with cars.
@@ -430,6 +529,8 @@ class DriveTrain(object):
 
 
 class League(object):
+    __slots__ = ('id', 'name', 'sortord')
+
     def __init__(self, id, name, sortord):
         """
         League object.
@@ -447,6 +548,8 @@ class League(object):
 
 
 class Manufacture(object):
+    __slots__ = ('id', 'name', 'country')
+
     def __init__(self, id, name, countryObj):
         """
         Manufacture object. Used by car, and many other objects
@@ -463,6 +566,8 @@ class Manufacture(object):
 
 
 class Race(object):
+    __slots__ = ('id', 'name', 'racetime', 'limits', 'trackLayout', 'raceCollection', 'raceType', 'weather', 'notes')
+
     def __init__(self, id, name, trackLayout, raceCollection, raceType, weather):
         """[summary]
 
@@ -491,6 +596,8 @@ class Race(object):
 
 
 class RaceCollection(object):
+    __slots__ = ('id', 'name', 'desc', 'league', 'classcat', 'prize1', 'prize2', 'prize3')
+
     def __init__(self, id, name, desc, leagueObj):
         """
         Race Collection object.
@@ -515,6 +622,8 @@ class RaceCollection(object):
 
 
 class RaceType(object):
+    __slots__ = ('id', 'name')
+
     def __init__(self, id, name):
         """Init the Race type object
 
@@ -530,6 +639,7 @@ class RaceType(object):
 
 
 class Track(object):
+    __slots__ = ('id', 'name', 'country')
 
     def __init__(self, id, name, countryObj):
         """
@@ -548,6 +658,8 @@ class Track(object):
 
 
 class TrackLayout(object):
+    __slots__ = ('id', 'name', 'track', 'circuit', 'miles')
+
     def __init__(self, id, name, miles, trackObj, circuitObj):
         """
         Track Layout.
@@ -566,6 +678,8 @@ class TrackLayout(object):
 
 
 class Weather(object):
+    __slots__ = ('id', 'name')
+
     def __init__(self, id, name):
         """Init the Weather object
 
@@ -578,3 +692,94 @@ class Weather(object):
 
     def __repr__(self):
         return f"Weather(id={self.id}, name={self.name})"
+
+
+class _Frozen(object):
+    """Read only and hashable. Base for the Frozen lookup classes.
+    Each attribute can be set once, by __init__, and never changed. Equal
+    objects of the same class have the same hash, so one object can be
+    shared by every Race, Track or Car that uses it.
+    """
+    __slots__ = ()
+
+    def __setattr__(self, name, val):
+        if hasattr(self, name):
+            raise AttributeError(f"{type(self).__name__}.{name} is read only")
+        object.__setattr__(self, name, val)
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__}.{name} is read only")
+
+    def _key(self):
+        return tuple(getattr(self, x) for x in self._fields)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self):
+        return hash((type(self), self._key()))
+
+
+class FrozenCircuit(_Frozen, Circuit):
+    __slots__ = ()
+    _fields = Circuit.__slots__
+
+
+class FrozenClassCat(_Frozen, ClassCat):
+    __slots__ = ()
+    _fields = ClassCat.__slots__
+
+
+class FrozenCountry(_Frozen, Country):
+    __slots__ = ()
+    _fields = Country.__slots__
+
+
+class FrozenDriveTrain(_Frozen, DriveTrain):
+    __slots__ = ()
+    _fields = DriveTrain.__slots__
+
+
+class FrozenLeague(_Frozen, League):
+    __slots__ = ()
+    _fields = League.__slots__
+
+
+class FrozenRaceType(_Frozen, RaceType):
+    __slots__ = ()
+    _fields = RaceType.__slots__
+
+
+class FrozenWeather(_Frozen, Weather):
+    __slots__ = ()
+    _fields = Weather.__slots__
+
+
+# {lookup class: read only class}
+_frozenClasses = {Circuit: FrozenCircuit,
+                  ClassCat: FrozenClassCat,
+                  Country: FrozenCountry,
+                  DriveTrain: FrozenDriveTrain,
+                  League: FrozenLeague,
+                  RaceType: FrozenRaceType,
+                  Weather: FrozenWeather}
+
+
+def freeze(obj):
+    """Read only copy of a lookup object. (Circuit, ClassCat, Country,
+    DriveTrain, League, RaceType or Weather)
+
+    Args:
+        obj: Lookup object. Frozen objects are returned as is
+
+    Returns:
+        Frozen lookup object
+    """
+    if isinstance(obj, _Frozen):
+        return obj
+    frozenObj = object.__new__(_frozenClasses[type(obj)])
+    for name in frozenObj._fields:
+        object.__setattr__(frozenObj, name, getattr(obj, name))
+    return frozenObj
@@ -0,0 +1,268 @@
+"""Non-interactive commands for scripts and cron jobs.
+
+Runs the cli list and add commands without prompting. Arguments that the
+cli would ask for must be given as key=value pairs. Quote values with
+spaces. (name="Race 5")
+    list leagues
+    list track id=3
+    add race collectionId=2 layoutId=5 weatherId=1 raceTypeId=1 raceNum=7 time=09:30
+
+runBatch writes one JSON object per command:
+    {"line": 1, "command": "list track id=3", "code": 0, "result": {...}}
+    {"line": 2, "command": "list track id=999", "code": 1, "error": "Track not found"}
+"""
+import json
+import logging
+import shlex
+from datetime import datetime
+
+# Custom App modules
+from GranT import GTClasses as GT
+from GranT import gtdbV3
+
+logger = logging.getLogger(__name__)
+
+
+class CommandError(Exception):
+    """A batch command that can not be run. The message is reported as the error"""
+
+
+def _args(tokens, allowed):
+    """Internal use only. key=value tokens as a dict. Keys are matched without case.
+
+    Args:
+        tokens (list): key=value strings
+        allowed (list): Keys the command accepts
+
+    Returns:
+        dict: {key: value} using the spelling in allowed
+
+    Raises:
+        CommandError: Token is not key=value or the key is not allowed
+    """
+    names = {x.upper(): x for x in allowed}
+    args = {}
+    for token in tokens:
+        key, sep, value = token.partition('=')
+        if not sep or key.upper() not in names:
+            raise CommandError(f"Unknown argument {key}")
+        args[names[key.upper()]] = value.strip()
+    return args
+
+
+def _found(obj, what):
+    """Internal use only. Raise CommandError if a get function found nothing."""
+    if not obj.id:
+        raise CommandError(f"{what} not found")
+    return obj
+
+
+def _int(args, key, required=True):
+    """Internal use only. Integer argument.
+
+    Raises:
+        CommandError: Missing or not a number
+    """
+    value = args.get(key)
+    if value in (None, ''):
+        if required:
+            raise CommandError(f"{key} is required")
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise CommandError(f"{key} must be a number") from None
+
+
+def _addCar(dbConn, tokens):
+    args = _args(tokens, ['mfgId', 'classId', 'driveTrainId', 'name', 'year'])
+    if not args.get('name'):
+        raise CommandError("name is required")
+    car = GT.Car(id=0, model=args['name'],
+                 Manufacture=_found(gtdbV3.getMfg(dbConn, key='mfgId', value=_int(args, 'mfgId')), "Manufacture"),
+                 DriveTrain=_found(gtdbV3.getDriveTrain(dbConn, _int(args, 'driveTrainId')), "Drivetrain"),
+                 ClassCat=_found(gtdbV3.getCarCat(dbConn, _int(args, 'classId')), "Class"))
+    car.year = _int(args, 'year', required=False)
+    return gtdbV3.addCar(dbConn, car)
+
+
+def _addCollection(dbConn, tokens):
+    args = _args(tokens, ['leagueId', 'name', 'desc', 'classId', 'prize1', 'prize2', 'prize3'])
+    league = _found(gtdbV3.getLeague(dbConn, value=_int(args, 'leagueId')), "League")
+    rCollection = GT.RaceCollection(
+        id=0, name=args.get('name'), desc=args.get('desc', ''), leagueObj=league)
+    classId = _int(args, 'classId', required=False)
+    if classId is not None:
+        rCollection.classcat = _found(gtdbV3.getCarCat(dbConn, classId), "Class")
+    for prize in ('prize1', 'prize2', 'prize3'):
+        setattr(rCollection, prize, _int(args, prize, required=False) or 0)
+    return gtdbV3.addRaceCollection(dbConn, rCollection)
+
+
+def _addRace(dbConn, tokens):
+    args = _args(tokens, ['collectionId', 'layoutId', 'weatherId', 'raceTypeId',
+                          'raceNum', 'name', 'time', 'limits', 'notes'])
+    if args.get('name'):
+        name = args['name']
+    else:
+        name = f"Race {_int(args, 'raceNum')}"
+    race = GT.Race(id=0, name=name,
+                   trackLayout=_found(gtdbV3.getLayout(dbConn, _int(args, 'layoutId')), "Track layout"),
+                   raceCollection=_found(gtdbV3.getRaceCollection(dbConn, _int(args, 'collectionId')), "Race collection"),
+                   raceType=_found(gtdbV3.getRaceType(dbConn, _int(args, 'raceTypeId')), "Race type"),
+                   weather=_found(gtdbV3.getWeather(dbConn, _int(args, 'weatherId')), "Weather"))
+    if args.get('time'):
+        try:
+            datetime.strptime(args['time'], '%H:%M')
+        except ValueError:
+            raise CommandError("time must be HH:MM") from None
+        race.racetime = args['time']
+    race.limits = args.get('limits')
+    race.notes = args.get('notes')
+    return gtdbV3.addRace(dbConn, race)
+
+
+def _listCollection(dbConn, tokens):
+    args = _args(tokens, ['leagueId', 'id'])
+    if 'id' in args:
+        return _found(gtdbV3.getRaceCollection(dbConn, _int(args, 'id')), "Race collection")
+    return gtdbV3.getRaceCollectionList(dbConn, _int(args, 'leagueId'))
+
+
+def _listRace(dbConn, tokens):
+    args = _args(tokens, ['id', 'collectionId'])
+    if 'collectionId' in args:
+        return gtdbV3.getRacesForCollection(dbConn, _int(args, 'collectionId'))
+    return _found(gtdbV3.getRace(dbConn, _int(args, 'id')), "Race")
+
+
+def _listTrack(dbConn, tokens):
+    args = _args(tokens, ['id', 'name', 'layoutId'])
+    if 'layoutId' in args:
+        return _found(gtdbV3.getLayout(dbConn, _int(args, 'layoutId')), "Track layout")
+    if 'name' in args:
+        return _found(gtdbV3.getTrack(dbConn, key='track', value=args['name']), "Track")
+    return _found(gtdbV3.getTrack(dbConn, key='trackId', value=_int(args, 'id')), "Track")
+
+
+def _noArgs(getFunc):
+    """Internal use only. Command for a get function that takes no arguments."""
+    def listCmd(dbConn, tokens):
+        _args(tokens, [])
+        return getFunc(dbConn)
+    return listCmd
+
+
+# {action: {object: function(dbConn, tokens)}}
+# list functions return the data, add functions return (code, msg)
+_commands = {
+    'add': {'car': _addCar,
+            'collection': _addCollection,
+            'race': _addRace},
+    'list': {'circuits': _noArgs(gtdbV3.getCircuitList),
+             'classes': _noArgs(gtdbV3.getCarCatList),
+             'collection': _listCollection,
+             'drivetrains': _noArgs(gtdbV3.getDriveTrainList),
+             'leagues': _noArgs(gtdbV3.getLeagueList),
+             'manufactures': _noArgs(gtdbV3.getMfgList),
+             'race': _listRace,
+             'track': _listTrack,
+             'tracks': _noArgs(gtdbV3.getTrackList)}}
+
+
+def toData(obj):
+    """Objects from the get functions as json serializable data.
+
+    Args:
+        obj: GTClasses object, list or tuple of them, or a value
+
+    Returns:
+        dict, list or value
+    """
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    if isinstance(obj, (list, tuple)):
+        return [toData(x) for x in obj]
+    if isinstance(obj, dict):
+        return {k: toData(v) for k, v in obj.items()}
+    if hasattr(obj, '__dict__'):
+        items = vars(obj).items()
+    else:  # __slots__ class
+        items = ((k, getattr(obj, k)) for cls in reversed(type(obj).__mro__)
+                 for k in getattr(cls, '__slots__', ()))
+    return {k: toData(v) for k, v in items if not k.startswith('_')}
+
+
+def runCommand(dbConn, command):
+    """Run one list or add command.
+
+    Args:
+        dbConn (GTConnection): Database connection from create_connection or a ConnectionPool.
+        command (str, list): Command line, or its tokens. ['list', 'track', 'id=3']
+
+    Returns:
+        dict: {'command': str, 'code': 0, 'result': data}
+              or {'command': str, 'code': 1, 'error': str}
+    """
+    tokens = shlex.split(command) if isinstance(command, str) else list(command)
+    record = {'command': command if isinstance(command, str) else shlex.join(tokens)}
+    logger.info("Batch command: %s", record['command'])
+    try:
+        if len(tokens) < 2:
+            raise CommandError("Command needs an action and an object")
+        action, obj = tokens[0].lower(), tokens[1]
+        if action not in _commands:
+            raise CommandError(f"Unknown command {tokens[0]}")
+        if obj not in _commands[action]:
+            raise CommandError(f"Unknown {action} object {obj}")
+        result = _commands[action][obj](dbConn, tokens[2:])
+    except CommandError as e:
+        logger.info("Batch command failed: %s", e)
+        record.update(code=1, error=str(e))
+        return record
+
+    if action == 'add':
+        if result[0] == 0:
+            record.update(code=0, result=result[1])
+        else:
+            record.update(code=result[0], error=result[1])
+    else:
+        record.update(code=0, result=toData(result))
+    return record
+
+
+def runBatch(dbConn, commands, out):
+    """Run commands and write one json line per command to out.
+    Blank lines and lines starting with # are skipped. exit stops the batch.
+    A command that raises gets an error record, only KeyboardInterrupt and
+    SystemExit stop the batch.
+
+    Args:
+        dbConn (GTConnection): Database connection from create_connection or a ConnectionPool.
+        commands (iterable): Command lines. An open file, sys.stdin or a list
+        out (file): Where the json lines are written
+
+    Returns:
+        tuple: (commands run, commands failed)
+    """
+    run = failed = 0
+    for lineNum, line in enumerate(commands, start=1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        if line.lower() == 'exit':
+            break
+        try:
+            record = runCommand(dbConn, line)
+        except ValueError as e:  # shlex. No closing quotation
+            record = {'command': line, 'code': 1, 'error': str(e)}
+        except Exception as e:  # Report it against its line and go on with the batch
+            logger.error("Batch line %s failed: %s", lineNum, line, exc_info=True)
+            record = {'command': line, 'code': 1, 'error': f"{type(e).__name__}: {e}"}
+        record = {'line': lineNum, **record}
+        out.write(json.dumps(record) + '\n')
+        run += 1
+        failed += record['code'] != 0
+    out.flush()
+    logger.info("Batch complete. run=%s failed=%s", run, failed)
+    return (run, failed)
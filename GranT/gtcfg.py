@@ -1,23 +1,131 @@
+"""Application configuration.
+
+Nothing is read when the module is imported. The configuration file is
+loaded on first use of gtcfg.dbcfg, gtcfg.logcfg or gtcfg.config:
+    gtcfg.dbcfg['dbFile']
+The file is GTTracking.conf in the current directory unless the
+GTTRACKING_CONF environment variable or load_config names another.
+Any setting can be overridden with an environment variable named
+GT_<SECTION>_<OPTION>, for example GT_DATABASE_DBFILE or GT_LOGGING_LEVEL.
+
+curcfg holds values set by the app at runtime and never loads the file.
+"""
 import logging
-import configparser
 import os
 
 logger = logging.getLogger(__name__)
 
+_defaultCfgFile = './GTTracking.conf'
+_cfgFileEnv = 'GTTRACKING_CONF'
+# GTConfig used by the module level dbcfg, logcfg and curcfg. (see get_config)
+_current = None
+
+# (cfg dict, key, section, option, type, fallback)
+_settings = [
+    ('dbcfg', 'dbFile', 'database', 'dbfile', str, None),
+    ('dbcfg', 'traceSql', 'database', 'tracesql', bool, False),
+    ('dbcfg', 'cachedStatements', 'database', 'cachedstatements', int, None),
+    ('dbcfg', 'profile', 'database', 'profile', str, None),
+    ('logcfg', 'logDir', 'logging', 'logDir', str, None),
+    ('logcfg', 'level', 'logging', 'level', str, "INFO")]
+
+# ConfigParser method for each type
+_getters = {str: 'get', bool: 'getboolean', int: 'getint'}
+
+
+class GTConfig():
+    """Configuration loaded from cfgFile the first time a setting is used.
 
-def load_config(cfgFile):
+    Args:
+        cfgFile (str, optional): Configuration file. Defaults to $GTTRACKING_CONF
+            or ./GTTracking.conf
+        environ (dict, optional): Environment for GT_<SECTION>_<OPTION>
+            overrides. Defaults to os.environ
     """
-    Load configuraton file and store in sectional dict\n
-    cfgFile : Configuration file to open (requried)\n
+
+    def __init__(self, cfgFile=None, environ=None):
+        self.cfgFile = cfgFile
+        self.environ = os.environ if environ is None else environ
+        self.curcfg = dict()
+        self._config = None
+        self._cfg = {'dbcfg': dict(), 'logcfg': dict()}
+
+    def __repr__(self):
+        return f"GTConfig(cfgFile={self.cfgFile}, loaded={self._config is not None})"
+
+    @property
+    def config(self):
+        """configparser.ConfigParser: Parsed file with the overrides applied"""
+        if self._config is None:
+            self.load()
+        return self._config
+
+    @property
+    def dbcfg(self):
+        """dict: [database] settings"""
+        if self._config is None:
+            self.load()
+        return self._cfg['dbcfg']
+
+    @property
+    def logcfg(self):
+        """dict: [logging] settings"""
+        if self._config is None:
+            self.load()
+        return self._cfg['logcfg']
+
+    def load(self):
+        """Read the configuration file and environment overrides.
+        Called on first use. Call again to reload.
+        """
+        import configparser  # Not needed until the config is used
+
+        if self.cfgFile is None:
+            self.cfgFile = self.environ.get(_cfgFileEnv, _defaultCfgFile)
+        config = configparser.ConfigParser()
+        read = config.read(self.cfgFile)
+        logger.info("Configuration loaded from %s", read or 'defaults')
+        for cfgName, key, section, option, kind, fallback in _settings:
+            envName = f"GT_{section}_{option}".upper()
+            if envName in self.environ:
+                logger.info("%s overrides [%s] %s", envName, section, option)
+                # Environment values are literal. %% reads back as % after interpolation
+                config.read_dict({section: {option: self.environ[envName].replace('%', '%%')}})
+            self._cfg[cfgName][key] = getattr(config, _getters[kind])(
+                section, option, fallback=fallback)
+        self._config = config
+
+
+def get_config():
+    """The configuration used by gtcfg.dbcfg, gtcfg.logcfg and gtcfg.curcfg.
+
+    Returns:
+        GTConfig: Created on first call, not loaded until a setting is used
     """
-    config.read(cfgFile)
-    dbcfg['dbFile'] = config.get('database', 'dbfile', fallback=None)
-    logcfg['logDir'] = config.get('logging', 'logDir', fallback=None)
-    logcfg['level'] = config.get('logging', 'level', fallback="INFO")
+    global _current
+    if _current is None:
+        _current = GTConfig()
+    return _current
+
+
+def load_config(cfgFile=None, environ=None):
+    """
+    Load configuraton file and use it for gtcfg.dbcfg and gtcfg.logcfg\n
+    cfgFile : Configuration file to open. Defaults to $GTTRACKING_CONF or ./GTTracking.conf\n
+    environ : Environment for overrides. Defaults to os.environ\n
+    """
+    global _current
+    newConfig = GTConfig(cfgFile, environ)
+    newConfig.load()
+    if _current is not None:  # Keep values the app has set
+        newConfig.curcfg = _current.curcfg
+    _current = newConfig
+    return _current
+
 
+def __getattr__(name):
+    # dbcfg, logcfg, curcfg and config are looked up on first use
+    if name in ('config', 'curcfg', 'dbcfg', 'logcfg'):
+        return getattr(get_config(), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-dbcfg = dict()
-logcfg = dict()
-curcfg = dict()
-config = configparser.ConfigParser()
-load_config('./GTTracking.conf')
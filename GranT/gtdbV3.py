@@ -1,6 +1,9 @@
 import sys
+import re
 import logging
 import sqlite3
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
 
 # Custom App modules
@@ -8,36 +11,324 @@ from GranT import GTClasses as gtClass
 
 logger = logging.getLogger(__name__)
 
+# Max number of values put into a single "IN (...)" clause
+_maxSqlVars = 500
+
+# Column lists and joins used to build object graphs from a single query.
+# The column order must match the _xxxFromRow functions.
+_carSettingCols = ", ".join(gtClass.CustCarSettings.dbColumns)
+_countryCols = "cntry.ID, cntry.name, cntry.alpha2, cntry.alpha3, cntry.region"
+_trackCols = f"t.id, t.name, {_countryCols}"
+_trackJoinSQL = "LEFT JOIN country AS cntry ON t.country_id = cntry.ID"
+_layoutCols = f"tl.id, tl.name, tl.miles, {_trackCols}, c.id, c.name"
+_layoutJoinSQL = f"LEFT JOIN track AS t ON tl.track_id = t.id {_trackJoinSQL} LEFT JOIN circuit AS c ON tl.circuit_id = c.id"
+_collectionCols = "rc.id, rc.name, rc.description, rc.prize1, rc.prize2, rc.prize3, l.id, l.name, l.sortord, cat.id, cat.name, cat.description, cat.sortOrder"
+_collectionJoinSQL = "LEFT JOIN league AS l ON rc.league_id = l.id LEFT JOIN category AS cat ON rc.cat_id = cat.id"
+_raceCols = f"r.id, r.name, r.racetime, r.limits, r.notes, w.id, w.name, rt.ID, rt.name, {_layoutCols}, {_collectionCols}"
+_raceJoinSQL = f"LEFT JOIN weather AS w ON r.weather_id = w.id LEFT JOIN race_type AS rt ON r.type_id = rt.ID LEFT JOIN track_layout AS tl ON r.tl_id = tl.id {_layoutJoinSQL} LEFT JOIN race_collection AS rc ON r.rc_id = rc.id {_collectionJoinSQL}"
+
+
+# Lookup tables held in the connection lookup cache.
+# table: sql to load all the rows for the table
+_lookupSQL = {
+    'category': "SELECT id, name, description, sortOrder FROM category",
+    'circuit': "SELECT id, name FROM circuit",
+    'country': "SELECT ID, name, alpha2, alpha3, region FROM country",
+    'drivetrain': "SELECT id, code, description FROM drivetrain",
+    'league': "SELECT id, name, sortord FROM league",
+    'race_type': "SELECT ID, name FROM race_type",
+    'weather': "SELECT id, name FROM weather"}
+
+# Finds the table changed by INSERT, UPDATE, DELETE sql
+_dmlTableRE = re.compile(
+    r"^\s*(?:INSERT(?:\s+OR\s+\w+)?\s+INTO|REPLACE\s+INTO|UPDATE(?:\s+OR\s+\w+)?|DELETE\s+FROM)\s+(\w+)",
+    re.IGNORECASE)
+
+
+# Named statements used by the getters. Built once at import so the sql text
+# is identical on every call and sqlite can reuse its prepared statement.
+# name: sql
+_SQL = {
+    'getCar': "SELECT id, model, mfg_id, cat_id, drivetrain_id, year FROM car WHERE id=?",
+    'getCarSetting': f"SELECT {_carSettingCols} FROM car_setting WHERE id=?",
+    'getCarSettingList': "SELECT cset.id, cset.name FROM car_setting AS cset INNER JOIN car ON cset.car_id = car.id WHERE car.id = ? ORDER BY cset.name",
+    'getCarSettingColumns': "SELECT id, car_id, cat_id, max_power, max_torque, power_ratio, traction_control, brake_balance, top_speed, weight, weight_reduction, accel, braking, cornering, max_speed, stability, gear_1_ratio, gear_2_ratio, gear_3_ratio, gear_4_ratio, gear_5_ratio, gear_6_ratio, gear_7_ratio, final_gear_ratio FROM car_setting ORDER BY id",
+    'getCarSettingsForCar': f"SELECT {_carSettingCols} FROM car_setting WHERE car_id = ? ORDER BY name",
+    'getCarSettingsForCar.all': f"SELECT {_carSettingCols} FROM car_setting ORDER BY car_id, name",
+    'getCarCat': f"{_lookupSQL['category']} WHERE id = ?",
+    'getCarList': "SELECT car.mfg_id, model, year, cat.name as class, dt.code FROM car JOIN drivetrain AS dt ON car.drivetrain_id = dt.id JOIN category as cat on car.cat_id = cat.id WHERE mfg_id = :mfgID",
+    'getCarList.classcat': "SELECT car.mfg_id, model, year, cat.name as class, dt.code FROM car JOIN drivetrain AS dt ON car.drivetrain_id = dt.id JOIN category as cat on car.cat_id = cat.id WHERE mfg_id = :mfgID ORDER BY cat.name",
+    'getCarList.drivetrain': "SELECT car.mfg_id, model, year, cat.name as class, dt.code FROM car JOIN drivetrain AS dt ON car.drivetrain_id = dt.id JOIN category as cat on car.cat_id = cat.id WHERE mfg_id = :mfgID ORDER BY dt.code",
+    'getCarList.name': "SELECT car.mfg_id, model, year, cat.name as class, dt.code FROM car JOIN drivetrain AS dt ON car.drivetrain_id = dt.id JOIN category as cat on car.cat_id = cat.id WHERE mfg_id = :mfgID ORDER BY model",
+    'getCarList.year': "SELECT car.mfg_id, model, year, cat.name as class, dt.code FROM car JOIN drivetrain AS dt ON car.drivetrain_id = dt.id JOIN category as cat on car.cat_id = cat.id WHERE mfg_id = :mfgID ORDER BY year",
+    'getCarCatList': "SELECT c.id as id, c.name as carClass, c.description as desc, c.sortOrder as sortorder FROM category as c ORDER BY c.sortOrder",
+    'getCircuit.id': f"{_lookupSQL['circuit']} WHERE id = ?",
+    'getCircuit.name': f"{_lookupSQL['circuit']} WHERE name = ?",
+    'getCircuitList': "SELECT c.id as id, c.name as name from circuit as c ORDER by name",
+    'getCountry': f"{_lookupSQL['country']} WHERE ID = ?",
+    'getDriveTrain': f"{_lookupSQL['drivetrain']} WHERE id = ?",
+    'getGarageMfgList': "SELECT mfg.id AS id,mfg.name AS Make FROM manufacture AS mfg JOIN car ON car.mfg_id = mfg.id GROUP BY mfg.id, mfg.name ORDER BY mfg.name",
+    'getLapTimes': "SELECT lap, lap_ms FROM lap_time WHERE race_id = ? AND car_setting_id = ? ORDER BY lap",
+    'getLayout': f"SELECT {_layoutCols} FROM track_layout AS tl {_layoutJoinSQL} WHERE tl.id = ?",
+    'getLayoutList': "SELECT tl.id AS layoutId, tl.name AS layout, tl.miles AS Miles, (SELECT count(*) FROM race WHERE race.tl_id = tl.id) AS Races FROM track_layout AS tl WHERE tl.track_id = ? ORDER BY layout",
+    'getLeague.id': f"{_lookupSQL['league']} WHERE id = ?",
+    'getLeague.name': f"{_lookupSQL['league']} WHERE name = ?",
+    'getLeagueList': "SELECT id, name FROM league ORDER BY sortord",
+    'getMfg.mfgId': "SELECT mfg.id as mfgId, mfg.name AS Make, country_id as cntryId FROM manufacture AS mfg WHERE mfgId = ?",
+    'getMfg.Make': "SELECT mfg.id as mfgId, mfg.name AS Make, country_id as cntryId FROM manufacture AS mfg WHERE Make = ?",
+    'getMfgList': "SELECT mfg.id as id, mfg.name AS Make FROM manufacture AS mfg ORDER BY mfg.name",
+    'getRace': f"SELECT {_raceCols} FROM race AS r {_raceJoinSQL} WHERE r.id = ?",
+    'getRacesForCollection': f"SELECT {_raceCols} FROM race AS r {_raceJoinSQL} WHERE r.rc_id = ? ORDER BY r.name",
+    'getRaceList': "select r.id as raceID, r.name as RaceName FROM race as r WHERE r.rc_id = ? ORDER BY r.name",
+    'getRaceCollection': f"SELECT {_collectionCols} FROM race_collection AS rc {_collectionJoinSQL} WHERE rc.id = ?",
+    'getRaceCollectionList': "SELECT rc.id, rc.name, rc.description, cat.name as catClass, rc.prize1,  rc.prize2, rc.prize3, (SELECT count(*) FROM race WHERE race.rc_id = rc.id) AS races FROM race_collection AS rc LEFT JOIN category AS cat ON rc.cat_id = cat.id WHERE rc.league_id = ? ORDER BY rc.name",
+    'getRaceResults': "SELECT rr.position, rr.car_setting_id, cs.name, car.model, rr.total_ms, coalesce(rr.best_lap_ms, (SELECT min(lt.lap_ms) FROM lap_time AS lt WHERE lt.race_id = rr.race_id AND lt.car_setting_id = rr.car_setting_id)) AS best_lap_ms, (SELECT count(*) FROM lap_time AS lt WHERE lt.race_id = rr.race_id AND lt.car_setting_id = rr.car_setting_id) AS laps FROM race_result AS rr JOIN car_setting AS cs ON rr.car_setting_id = cs.id JOIN car ON cs.car_id = car.id WHERE rr.race_id = ? ORDER BY rr.position IS NULL, rr.position, rr.total_ms",
+    'getRaceType': f"{_lookupSQL['race_type']} WHERE ID = ?",
+    'getRaceTypeList': "SELECT id, name FROM race_type ORDER by name",
+    'getTireList': "SELECT code, description from tire ORDER BY code",
+    'getTrack.trackId': f"SELECT {_trackCols} FROM track AS t {_trackJoinSQL} WHERE t.id = ?",
+    'getTrack.track': f"SELECT {_trackCols} FROM track AS t {_trackJoinSQL} WHERE t.name = ?",
+    'getTrackList': "SELECT t.id, t.name, (SELECT count(*) FROM track_layout AS tl WHERE tl.track_id = t.id) AS layouts FROM track AS t ORDER BY t.name",
+    'getTrackList.detail': f"SELECT t.id, t.name, cntry.region, cntry.name, (SELECT count(*) FROM track_layout AS tl WHERE tl.track_id = t.id) AS layouts FROM track AS t {_trackJoinSQL} ORDER BY t.name",
+    'getWeather': f"{_lookupSQL['weather']} WHERE id = ?",
+    'getWeatherList': "SELECT id, name FROM weather ORDER by name"}
+
+# Statements that read a whole table on purpose. Not reported by adviseIndexes
+_fullScanSQL = {'getCarCatList', 'getCarSettingColumns', 'getCarSettingsForCar.all',
+                'getCircuitList', 'getGarageMfgList', 'getLeagueList', 'getMfgList',
+                'getRaceTypeList', 'getTireList', 'getTrackList', 'getTrackList.detail',
+                'getWeatherList'}
+
+# Keyset pagination for long lists. (see pageSql)
+# name: (sql, keys)
+#   sql has {after}, replaced by 1 for the first page and by
+#   (key columns) > (last row's keys) for the next pages. Named values only.
+#   keys: ((column, index in the row), ...) matching the ORDER BY. The last key must be unique.
+#   Columns that can be NULL are keyed as coalesce(column, ''). pageSql binds a NULL key as ''
+_pageSQL = {
+    'getCarList.name': ("SELECT car.id, model, year, cat.name as class, dt.code FROM car JOIN drivetrain AS dt ON car.drivetrain_id = dt.id JOIN category as cat on car.cat_id = cat.id WHERE mfg_id = :mfgID AND {after} ORDER BY model, car.id LIMIT :pageSize",
+                        (('model', 1), ('car.id', 0))),
+    'getRacesForCollection': (f"SELECT {_raceCols} FROM race AS r {_raceJoinSQL} WHERE r.rc_id = :rcId AND {{after}} ORDER BY r.name, r.id LIMIT :pageSize",
+                              (('r.name', 1), ('r.id', 0))),
+    'getRaceCollectionList': ("SELECT rc.id, rc.name, rc.description, cat.name as catClass, rc.prize1,  rc.prize2, rc.prize3, (SELECT count(*) FROM race WHERE race.rc_id = rc.id) AS races FROM race_collection AS rc LEFT JOIN category AS cat ON rc.cat_id = cat.id WHERE rc.league_id = :leagueId AND {after} ORDER BY coalesce(rc.name, ''), rc.id LIMIT :pageSize",
+                              (("coalesce(rc.name, '')", 1), ('rc.id', 0))),
+    'getTrackList': ("SELECT t.id, t.name, (SELECT count(*) FROM track_layout AS tl WHERE tl.track_id = t.id) AS layouts FROM track AS t WHERE {after} ORDER BY t.name, t.id LIMIT :pageSize",
+                     (('t.name', 1), ('t.id', 0))),
+    'getTrackList.detail': (f"SELECT t.id, t.name, cntry.region, cntry.name, (SELECT count(*) FROM track_layout AS tl WHERE tl.track_id = t.id) AS layouts FROM track AS t {_trackJoinSQL} WHERE {{after}} ORDER BY t.name, t.id LIMIT :pageSize",
+                            (('t.name', 1), ('t.id', 0)))}
+
+# Rows per page for pageSql and per fetch for directSqlIter.
+# Public so callers can page other lists the same way
+defaultPageSize = 100
+# Lap times written and committed per executemany in appendLapTimes
+_lapBatchSize = 10000
+
+# Referential and uniqueness rules used by the validate functions and gtimport.
+# rule: (existsSQL, keySQL, name)
+#   existsSQL returns 1 if the key exists, keySQL returns all the keys (see loadValidationKeys)
+#   name: None = the key is ids only. Otherwise the last key value is a name
+#         compared 'exact' or 'caseless' (upper cased by Python, gt_upper in sql)
+_validationRules = {
+    'car': ("SELECT EXISTS (SELECT 1 FROM car WHERE id = ?)", "SELECT id FROM car", None),
+    'carModel': ("SELECT EXISTS (SELECT 1 FROM car WHERE gt_upper(model) = ?)", "SELECT model FROM car", 'caseless'),
+    'carSettingName': ("SELECT EXISTS (SELECT 1 FROM car_setting WHERE car_id = ? AND name = ?)", "SELECT car_id, name FROM car_setting", 'exact'),
+    'category': ("SELECT EXISTS (SELECT 1 FROM category WHERE id = ?)", "SELECT id FROM category", None),
+    'circuit': ("SELECT EXISTS (SELECT 1 FROM circuit WHERE id = ?)", "SELECT id FROM circuit", None),
+    'country': ("SELECT EXISTS (SELECT 1 FROM country WHERE ID = ?)", "SELECT ID FROM country", None),
+    'drivetrain': ("SELECT EXISTS (SELECT 1 FROM drivetrain WHERE id = ?)", "SELECT id FROM drivetrain", None),
+    'layoutName': ("SELECT EXISTS (SELECT 1 FROM track_layout WHERE track_id = ? AND gt_upper(name) = ?)", "SELECT track_id, name FROM track_layout", 'caseless'),
+    'manufacture': ("SELECT EXISTS (SELECT 1 FROM manufacture WHERE id = ?)", "SELECT id FROM manufacture", None),
+    'raceName': ("SELECT EXISTS (SELECT 1 FROM race WHERE rc_id = ? AND gt_upper(name) = ?)", "SELECT rc_id, name FROM race WHERE name IS NOT NULL", 'caseless'),
+    'race_collection': ("SELECT EXISTS (SELECT 1 FROM race_collection WHERE id = ?)", "SELECT id FROM race_collection", None),
+    'race_type': ("SELECT EXISTS (SELECT 1 FROM race_type WHERE ID = ?)", "SELECT ID FROM race_type", None),
+    'tire': ("SELECT EXISTS (SELECT 1 FROM tire WHERE gt_upper(code) = ?)", "SELECT code FROM tire", 'caseless'),
+    'track_layout': ("SELECT EXISTS (SELECT 1 FROM track_layout WHERE id = ?)", "SELECT id FROM track_layout", None),
+    'weather': ("SELECT EXISTS (SELECT 1 FROM weather WHERE id = ?)", "SELECT id FROM weather", None)}
+
+# Rules each validate function checks. Used by validateMany to preload keys
+_validatorRules = {
+    'validateCar': ('manufacture', 'drivetrain', 'category'),
+    'validateCarSetting': ('car', 'category', 'tire', 'carSettingName'),
+    'validateRace': ('raceName', 'weather', 'track_layout', 'race_type', 'race_collection'),
+    'validateTrackLayout': ('layoutName',)}
+
+# Connection profiles. PRAGMAs set by create_connection, in order.
+# profile: {pragma: value}
+_profiles = {
+    # Reports and lookups while another process writes
+    'read-heavy': {'journal_mode': 'WAL', 'synchronous': 'NORMAL',
+                   'cache_size': -65536, 'mmap_size': 268435456,
+                   'temp_store': 'MEMORY', 'busy_timeout': 5000},
+    # Interactive use. Readers are not blocked by the writer
+    'write-heavy': {'journal_mode': 'WAL', 'synchronous': 'NORMAL',
+                    'cache_size': -16384, 'mmap_size': 67108864,
+                    'temp_store': 'MEMORY', 'busy_timeout': 10000},
+    # Large imports. Speed over durability. Rerun the import after a crash
+    'bulk-load': {'journal_mode': 'WAL', 'synchronous': 'OFF',
+                  'cache_size': -262144, 'mmap_size': 268435456,
+                  'temp_store': 'MEMORY', 'busy_timeout': 30000},
+    # ":memory:" databases used by tests
+    'memory': {'journal_mode': 'MEMORY', 'synchronous': 'OFF',
+               'temp_store': 'MEMORY', 'busy_timeout': 0}}
+
+# Default size of the sqlite prepared statement cache per connection
+_cachedStatements = 256
+
+# Open transaction() blocks of plain sqlite3 connections. {id(connection): depth}
+# Only connections inside a block are in here. (see _txDepth)
+_plainTxDepth = {}
+
+
+class GTConnection(sqlite3.Connection):
+    """sqlite3 connection created by create_connection.
+
+    lookupCache holds the shared lookup objects for this connection.
+    {table: {id: object}}. Only fully loaded tables are in the cache.
+    sharedCursor is reused by directSql and _exeDML instead of opening a
+    cursor for every statement.
+    txDepth is the number of open transaction() blocks. See transaction
+    changedLookups are the lookup tables written in the open transaction().
+    The pool's caches for them are cleared when it commits.
+    pool is the gtpool.ConnectionPool the connection belongs to, if any.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _createSqlFunctions(self)
+        self.lookupCache = {}
+        self.changedLookups = set()
+        self.pool = None
+        self.txDepth = 0
+        self._sharedCursor = None
+
+    def sharedCursor(self):
+        """Cursor reused for statements whose results are read straight away.
+
+        Returns:
+            sqlite3.Cursor
+        """
+        if self._sharedCursor is None:
+            self._sharedCursor = self.cursor()
+        return self._sharedCursor
+
+
+def _sqlUpper(value):
+    """Internal use only. sql gt_upper(). Python str.upper so non ASCII
+    names compare the same as in _validationKey. sqlite upper() is ASCII only.
+    """
+    if value is None:
+        return None
+    return str(value).upper()
+
+
+# Functions added to every connection. (see registerSqlFunctions)
+# Only reads use them, so the schema works without them.
+# name: (number of arguments, function)
+_sqlFunctions = {'gt_upper': (1, _sqlUpper)}
+
+# car_setting REAL gear ratio columns (see gtschema) in the order of
+# CustCarSettings.gearColumns. Written with the gear text by addCarSetting,
+# updateCarSetting and gtimport.
+gearRatioColumns = tuple(f"{x}_ratio" for x in gtClass.CustCarSettings.gearColumns)
+
+
+def _createSqlFunctions(dbConn):
+    """Internal use only. Add _sqlFunctions to a connection"""
+    for name, (narg, func) in _sqlFunctions.items():
+        dbConn.create_function(name, narg, func, deterministic=True)
+
+
+def registerSqlFunctions(dbConn):
+    """Add the gt sql functions (see _sqlFunctions) to a plain sqlite3
+    connection. GTConnections and pools have them already. The functions are
+    only added once, since adding them again expires the prepared statements.
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+    """
+    if isinstance(dbConn, GTConnection) or not isinstance(dbConn, sqlite3.Connection):
+        return
+    probe = "SELECT " + ", ".join(f"{name}({', '.join(['NULL'] * narg)})"
+                                  for name, (narg, func) in _sqlFunctions.items())
+    try:
+        dbConn.execute(probe).fetchone()
+    except sqlite3.OperationalError:  # no such function
+        logger.debug("Adding sql functions to %s", dbConn)
+        _createSqlFunctions(dbConn)
+
+
+class Transaction():
+    """Handle returned by transaction().
+
+    savepoint is None for the outer transaction, otherwise the name of the
+    savepoint for a nested transaction.
+    Call rollback() to undo the block's changes when it exits instead of
+    committing them.
+    """
+
+    def __init__(self, savepoint=None):
+        self.savepoint = savepoint
+        self.rollbackOnly = False
+
+    def rollback(self):
+        """Roll back the changes made in this block when the block exits."""
+        self.rollbackOnly = True
 
-def create_connection(dbLoc=":memory:"):
+    def __str__(self):
+        return f"savepoint={self.savepoint} rollbackOnly={self.rollbackOnly}"
+
+
+def create_connection(dbLoc=":memory:", traceSql=False, cachedStatements=None, profile=None, checkSameThread=True):
     """Create a connection to a sqlite3 db.
     Note: This will NOT init db with the schema.
 
     Args:
         dbLoc ([str]): dbFile to connect to
         Default value is ":memory:"
+        traceSql (bool): Send every statement sqlite runs to logger.debug.
+        Default value is False. See setSqlTrace
+        cachedStatements (int): Size of the sqlite prepared statement cache.
+        Default value is None which uses _cachedStatements
+        profile (str): Connection profile. read-heavy, write-heavy, bulk-load or memory.
+        Default value is None which keeps the sqlite defaults. See _profiles
+        checkSameThread (bool): False lets other threads use the connection,
+        one at a time. (see gtpool) Default value is True
 
     Returns:
         sqlite3.connect [object]: Connection to database
     """
-    logger.debug(f"dbLoc = {dbLoc}")
+    logger.debug("dbLoc = %s", dbLoc)
+    if cachedStatements is None:
+        cachedStatements = _cachedStatements
+    if profile is not None and profile not in _profiles:
+        logger.critical(
+            "Unknown connection profile %s. Expecting one of %s", profile, ', '.join(_profiles))
+        sys.exit(1)
     if dbLoc:
-        logger.info(f"Connecting to {dbLoc}")
+        logger.info("Connecting to %s", dbLoc)
         try:
             conn = sqlite3.connect(
-                dbLoc, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
+                dbLoc, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+                cached_statements=cachedStatements, check_same_thread=checkSameThread,
+                uri=str(dbLoc).startswith('file:'), factory=GTConnection)
         except Exception as err:
-            logger.critical(f"Unable to connect to {dbLoc}")
-            logger.critical(f"Error:  {err}", exc_info=True)
+            logger.critical("Unable to connect to %s", dbLoc)
+            logger.critical("Error:  %s", err, exc_info=True)
             sys.exit(1)
 
-        logger.info(f"Successful connection to {dbLoc}")
-        logger.debug(f"sqlite3 version {sqlite3.version}")
+        logger.info("Successful connection to %s", dbLoc)
+        logger.debug("sqlite3 version %s", sqlite3.version)
+        setSqlTrace(conn, traceSql)
         cur = conn.cursor()
         cur.execute("PRAGMA foreign_keys = on;")
+        for pragma, value in _profiles.get(profile, {}).items():
+            cur.execute(f"PRAGMA {pragma} = {value};")
+            logger.debug("PRAGMA %s = %s", pragma,
+                         cur.execute(f"PRAGMA {pragma};").fetchone())
         cur.execute("PRAGMA database_list;")
         xtmp = cur.fetchall()
-        logger.debug(f"database_list={xtmp}")
+        logger.debug("database_list=%s", xtmp)
+        warmLookupCache(conn)
         return conn
     else:  # Critical exit
         logger.critical('dbLoc must contain a value')
@@ -57,13 +348,92 @@ def _addLayoutRec(dbConn, tLayout):
         ResultCode = 0 Successfull
         ResultCode != 0 See ResultText for details
     """
-    logger.debug(f"trackobj = {tLayout}")
+    logger.debug("trackobj = %s", tLayout)
     theVals = {'layoutName': tLayout.name, 'miles': tLayout.miles,
                'circuitId': tLayout.circuit.id, 'trackId': tLayout.track.id}
     sql = 'INSERT INTO track_layout (name, miles, track_id, circuit_id) VALUES (:layoutName, :miles, :trackId, :circuitId)'
     return _exeDML(dbConn, sql, theVals)
 
 
+def _collectionFromRow(row, shared=None):
+    """Internal use only. Create a RaceCollection object from _collectionCols
+
+    Args:
+        row (tuple): Values in the order of _collectionCols
+        shared (dict, optional): Objects already created keyed by (type, id).
+            (see _raceFromRow) Defaults to None.
+
+    Returns:
+        RaceCollection object. IF RaceCollection.id == 0 then not found
+    """
+    if shared is None:
+        shared = {}
+
+    key = ('league', row[6])
+    if key not in shared:
+        if row[6] is None:  # League not found
+            shared[key] = gtClass.FrozenLeague(id=0, name="", sortord=0)
+        else:
+            shared[key] = gtClass.FrozenLeague(id=row[6], name=row[7], sortord=row[8])
+    league = shared[key]
+
+    if row[0] is None:  # Race collection not found
+        return gtClass.RaceCollection(id=0, name=None, desc=None, leagueObj=league)
+
+    raceCollection = gtClass.RaceCollection(
+        id=row[0], name=row[1], desc=row[2], leagueObj=league)
+    if row[9] is not None:  # catClass assigned to raceCollection
+        key = ('classCat', row[9])
+        if key not in shared:
+            shared[key] = gtClass.FrozenClassCat(
+                id=row[9], name=row[10], desc=row[11], sortOrder=row[12])
+        raceCollection.classcat = shared[key]
+    raceCollection.prize1 = row[3]
+    raceCollection.prize2 = row[4]
+    raceCollection.prize3 = row[5]
+    return raceCollection
+
+
+def _countryFromRow(row, shared=None):
+    """Internal use only. Create a Country object from _countryCols
+
+    Args:
+        row (tuple): Values in the order of _countryCols
+        shared (dict, optional): Objects already created keyed by (type, id).
+            (see _raceFromRow) Defaults to None.
+
+    Returns:
+        FrozenCountry object. IF Country.id == 0 then not found
+    """
+    if shared is not None:
+        key = ('country', row[0])
+        if key not in shared:
+            shared[key] = _countryFromRow(row)
+        return shared[key]
+
+    if row[0] is None:  # Country not found
+        return gtClass.FrozenCountry(
+            cntryID=0, cntryName=None, alpha2=None, alpha3=None, region=None)
+
+    return gtClass.FrozenCountry(cntryID=row[0], cntryName=row[1],
+                                 alpha2=row[2], alpha3=row[3], region=row[4])
+
+
+def _cursor(dbConn):
+    """Internal use only. Cursor for a statement whose results are read at once.
+    GTConnections reuse one cursor, other connections get a new cursor.
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+
+    Returns:
+        sqlite3.Cursor
+    """
+    if isinstance(dbConn, GTConnection):
+        return dbConn.sharedCursor()
+    return dbConn.cursor()
+
+
 def _exeDML(dbConn, sql, theVals):
     """Executes DML commands, INSERT, DELETE, UPDATE sql.
 
@@ -76,37 +446,54 @@ def _exeDML(dbConn, sql, theVals):
         ResultCode == 0 Success. ResultText will have cursor.lastrowid
         ResultCode != 0 - See ResultText for details
     """
-    logger.debug(f"Passed sql={sql}")
-    logger.debug(f"Passed Vals={theVals}")
-    # Enabling full sql traceback to logger.debug
-    dbConn.set_trace_callback(logger.debug)
+    if not isinstance(dbConn, sqlite3.Connection):  # ConnectionPool. Use the writer
+        with checkout(dbConn, write=True) as conn:
+            return _exeDML(conn, sql, theVals)
+
+    logger.debug("Passed sql=%s", sql)
+    logger.debug("Passed Vals=%s", theVals)
+    tableMatch = _dmlTableRE.match(sql)
     try:
-        cur = dbConn.cursor()
+        cur = _cursor(dbConn)
         cur.execute(sql, theVals)
         rowID = cur.lastrowid
-        logger.debug(f"RowID = {rowID}")
-        dbConn.commit()
+        if not _txDepth(dbConn):  # Not in a transaction()
+            dbConn.commit()
     except sqlite3.IntegrityError as e:
-        logger.warning(f"sqlite integrity error: {e.args[0]}")
-        # Disable full sql traceback to logger.debug
-        dbConn.set_trace_callback(None)
+        logger.warning("sqlite integrity error: %s", e.args[0])
         retVal = [2, f"sqlite integrity error: {e.args[0]}"]
-        logger.debug(f"Returning {retVal}")
+        logger.debug("Returning %s", retVal)
         return retVal
     except:
         logger.critical(
-            f'Unexpected error executing sql: {sql}', exc_info=True)
+            'Unexpected error executing sql: %s', sql, exc_info=True)
         sys.exit(1)
 
+    if tableMatch and tableMatch.group(1).lower() in _lookupSQL:
+        _lookupChanged(dbConn, tableMatch.group(1).lower())
     rowCount = cur.rowcount
-    logger.debug(f"successful commit of sql, Rows affected={rowCount}")
-    # Disable full sql traceback to logger.debug
-    dbConn.set_trace_callback(None)
     retVal = [0, f"Commit successful rowID={rowID} rowCount={rowCount}"]
-    logger.debug(f"Returning {retVal}")
+    logger.debug("Returning %s", retVal)
     return retVal
 
 
+def _lookupChanged(dbConn, table):
+    """Internal use only. Clear cached lookups after a write to a lookup table
+    succeeded. Outside a transaction() the change is committed and every
+    connection of the pool is cleared. Inside one only this connection is
+    cleared, the others when the block commits. (see transaction)
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+        table (str): Lookup table written
+    """
+    if _txDepth(dbConn) and isinstance(dbConn, GTConnection):
+        clearLookupCache(dbConn, table)
+        dbConn.changedLookups.add(table)
+    else:
+        clearLookupCache(getattr(dbConn, 'pool', None) or dbConn, table)
+
+
 def _exeScriptFile(dbConn, scriptFileName=None):
     """ INTERNAL USE Only. executes a Script file.
 
@@ -114,7 +501,13 @@ def _exeScriptFile(dbConn, scriptFileName=None):
         dbConn (sqlite3.connect): Database connection
         scriptFileName : SQL script file to run. Defaults to None.
     """
-    logger.debug(f"loading script {scriptFileName} to memory")
+    if not isinstance(dbConn, sqlite3.Connection):  # ConnectionPool. Use the writer
+        with checkout(dbConn, write=True) as conn:
+            return _exeScriptFile(conn, scriptFileName)
+
+    logger.debug("loading script %s to memory", scriptFileName)
+    # Scripts can change any table
+    clearLookupCache(getattr(dbConn, 'pool', None) or dbConn)
     scriptFile = open(scriptFileName, 'r')
     script = scriptFile.read()
     scriptFile.close()
@@ -123,11 +516,219 @@ def _exeScriptFile(dbConn, scriptFileName=None):
         cur.executescript(script)
     except:
         logger.critical(
-            f"Unexpected Error running script {scriptFileName}", exc_info=True)
+            "Unexpected Error running script %s", scriptFileName, exc_info=True)
         sys.exit(1)
 
     dbConn.commit()
-    logger.debug(f"script commited")
+    logger.debug("script commited")
+
+
+def _exists(dbConn, rule, theVals, keys=None):
+    """Internal use only. Check a validation rule. (see _validationRules)
+    Uses the preloaded keys or the lookup cache when available,
+    otherwise one EXISTS query.
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+        rule (str): Rule name
+        theVals (tuple): Key values to look for
+        keys (dict, optional): Preloaded keys from loadValidationKeys
+
+    Returns:
+        bool: True if the key exists
+    """
+    theVals = _validationKey(rule, theVals)
+    if keys and rule in keys:
+        return theVals in keys[rule]
+    if rule in _lookupSQL:  # Lookup table. Try the cache
+        cache = _lookupCache(dbConn, rule)
+        if cache is not None:
+            return _lookupKey(theVals[0]) in cache
+    registerSqlFunctions(dbConn)
+    return bool(directSql(dbConn, _validationRules[rule][0], theVals)[0][0])
+
+
+def _layoutFromRow(row, shared=None):
+    """Internal use only. Create a TrackLayout object from _layoutCols
+
+    Args:
+        row (tuple): Values in the order of _layoutCols
+        shared (dict, optional): Objects already created keyed by (type, id).
+            (see _raceFromRow) Defaults to None.
+
+    Returns:
+        TrackLayout object. IF TrackLayout.id == 0 then not found
+    """
+    if shared is None:
+        shared = {}
+
+    xTrack = _trackFromRow(row[3:10], shared)
+    key = ('circuit', row[10])
+    if key not in shared:
+        if row[10] is None:  # Circuit not found
+            shared[key] = gtClass.FrozenCircuit(id=0, name=None)
+        else:
+            shared[key] = gtClass.FrozenCircuit(id=row[10], name=row[11])
+    xCircuit = shared[key]
+
+    if row[0] is None:  # Track layout not found
+        return gtClass.TrackLayout(
+            id=0, name=None, miles=None, trackObj=xTrack, circuitObj=xCircuit)
+
+    return gtClass.TrackLayout(
+        row[0], row[1], miles=row[2], trackObj=xTrack, circuitObj=xCircuit)
+
+
+def _lookupCache(dbConn, table):
+    """Internal use only. Get the cached objects for a lookup table.
+    The table is loaded into the cache if it is not already.
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+        table (str): Lookup table name. (see _lookupSQL)
+
+    Returns:
+        dict: {id: object} for all rows in the table.
+        None if the connection has no lookup cache or table could not be loaded.
+    """
+    if not isinstance(dbConn, sqlite3.Connection):  # ConnectionPool
+        with checkout(dbConn) as conn:
+            return _lookupCache(conn, table)
+    cache = getattr(dbConn, 'lookupCache', None)
+    if cache is None:  # Not a GTConnection
+        return None
+    # clearLookupCache on a pool can empty the cache from another thread.
+    # Read it once and return the dict loaded here, never look it up again
+    loaded = cache.get(table)
+    if loaded is None:
+        try:
+            rows = dbConn.execute(_lookupSQL[table]).fetchall()
+        except sqlite3.OperationalError as err:  # table does not exist yet
+            logger.debug("Unable to cache %s: %s", table, err)
+            return None
+        loaded = {row[0]: _lookupFromRow(table, row) for row in rows}
+        cache[table] = loaded
+        logger.debug("Cached %s %s rows", len(rows), table)
+    return loaded
+
+
+def _lookupFromRow(table, row):
+    """Internal use only. Create the lookup object for a row from _lookupSQL
+
+    Args:
+        table (str): Lookup table name
+        row (tuple): Values in the order of _lookupSQL[table]
+
+    Returns:
+        The lookup object
+    """
+    if table == 'category':
+        xObj = gtClass.FrozenClassCat(id=row[0], name=row[1], desc=row[2], sortOrder=row[3])
+    elif table == 'circuit':
+        xObj = gtClass.FrozenCircuit(id=row[0], name=row[1])
+    elif table == 'country':
+        xObj = gtClass.FrozenCountry(cntryID=row[0], cntryName=row[1],
+                                     alpha2=row[2], alpha3=row[3], region=row[4])
+    elif table == 'drivetrain':
+        xObj = gtClass.FrozenDriveTrain(row[0], row[1], row[2])
+    elif table == 'league':
+        xObj = gtClass.FrozenLeague(id=row[0], name=row[1], sortord=row[2])
+    elif table == 'race_type':
+        xObj = gtClass.FrozenRaceType(id=row[0], name=row[1])
+    elif table == 'weather':
+        xObj = gtClass.FrozenWeather(id=row[0], name=row[1])
+    return xObj
+
+
+def _lookupKey(value):
+    """Internal use only. Convert an id value to the int used as the cache key.
+
+    Args:
+        value : id value passed to a getter. (int or str of an int)
+
+    Returns:
+        int: The key. None if value can never match an id
+    """
+    if isinstance(value, float) and not value.is_integer():
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _raceFromRow(row, shared=None):
+    """Internal use only. Create a Race object, and all its objects, from _raceCols
+
+    Args:
+        row (tuple): Values in the order of _raceCols
+        shared (dict, optional): Objects already created keyed by (type, id).
+            Races using the same track layout, race collection, weather or
+            race type will share the same object. Defaults to None.
+
+    Returns:
+        Race object. IF Race.id == 0 then not found
+    """
+    if shared is None:
+        shared = {}
+
+    key = ('weather', row[5])
+    if key not in shared:
+        if row[5] is None:  # Weather not found
+            shared[key] = gtClass.FrozenWeather(id=0, name="")
+        else:
+            shared[key] = gtClass.FrozenWeather(id=row[5], name=row[6])
+    weather = shared[key]
+
+    key = ('raceType', row[7])
+    if key not in shared:
+        if row[7] is None:  # Race type not found
+            shared[key] = gtClass.FrozenRaceType(id=0, name="")
+        else:
+            shared[key] = gtClass.FrozenRaceType(id=row[7], name=row[8])
+    raceType = shared[key]
+
+    key = ('trackLayout', row[9])
+    if key not in shared:
+        shared[key] = _layoutFromRow(row[9:21], shared)
+    trackLayout = shared[key]
+
+    key = ('raceCollection', row[21])
+    if key not in shared:
+        shared[key] = _collectionFromRow(row[21:34], shared)
+    raceCollection = shared[key]
+
+    race = gtClass.Race(id=row[0], name=row[1], trackLayout=trackLayout,
+                        raceCollection=raceCollection, raceType=raceType, weather=weather)
+    race.racetime = row[2]
+    race.limits = row[3]
+    race.notes = row[4]
+    return race
+
+
+def _trackFromRow(row, shared=None):
+    """Internal use only. Create a Track object from _trackCols
+
+    Args:
+        row (tuple): Values in the order of _trackCols
+        shared (dict, optional): Objects already created keyed by (type, id).
+            (see _raceFromRow) Defaults to None.
+
+    Returns:
+        Track object. IF Track.id == 0 then not found
+    """
+    key = ('track', row[0])
+    if shared is not None and key in shared:
+        return shared[key]
+
+    xCountry = _countryFromRow(row[2:7], shared)
+    if row[0] is None:  # Track not found
+        xTrack = gtClass.Track(id=0, name=None, countryObj=xCountry)
+    else:
+        xTrack = gtClass.Track(id=row[0], name=row[1], countryObj=xCountry)
+    if shared is not None:
+        shared[key] = xTrack
+    return xTrack
 
 
 def addTrack(dbConn, layout):
@@ -142,13 +743,13 @@ def addTrack(dbConn, layout):
             ResultCode = 0 Successfull
             ResultCode != 0 See ResultText for details
     """
-    logger.info(f"Adding a new track {layout}")
+    logger.info("Adding a new track %s", layout)
     xtrack = getTrack(dbConn, key='track', value=layout.track.name)
     if xtrack.id != 0:  # track with same name exists - ReturnCode 100
         msg = f"Unable to save. Track name already in db. Track name = {layout.track.name}"
         logger.warning(msg)
         result = (100, msg)
-        logger.debug(f"returning: {result}")
+        logger.debug("returning: %s", result)
         return result
     else:
         logger.info("Confirmed track doesn't exist")
@@ -158,7 +759,7 @@ def addTrack(dbConn, layout):
         msg = f'Unable to save. Circuit does not exist'
         logger.warning(msg)
         result = (102, msg)
-        logger.debug(f"returning: {result}")
+        logger.debug("returning: %s", result)
         return result
     else:
         logger.info("Confirmed circuit exists")
@@ -167,48 +768,54 @@ def addTrack(dbConn, layout):
         msg = f"Unable to save. Invalid miles value {layout.miles}"
         logger.warning(msg)
         result = (103, msg)
-        logger.debug(f"returning: {result}")
+        logger.debug("returning: %s", result)
         return result
     else:
         logger.info("Confirmed miles has a value")
 
     # Tests Passed. Now we add records
-    # Add track record
-    logger.info("Saving new track record")
-    theVals = {'trackName': layout.track.name,
-               'cntryID': layout.track.country.id}
-    sql = "INSERT INTO track (name, country_id) VALUES (:trackName, :cntryID)"
-    logger.debug(f"sql={sql}")
-    logger.debug(f"theVals={theVals}")
-    result = _exeDML(dbConn, sql, theVals)
-    if result[0] == 2:  # integrity error
-        msg = f"error saving track record. error: {result}"
-        logger.error(msg)
-        result = (104, msg)
-        logger.debug(f"returning: {result}")
-        return result
-    else:
-        # Get new track.id from db to update layout object
-        logger.debug("Getting new track.id")
-        uTrack = getTrack(dbConn, key="track", value=layout.track.name)
-        logger.info(f"Successfully saved new track record {uTrack}")
-        logger.debug(
-            "update trackLayout object with new track.id {uTrack.id}")
-        layout.track.id = uTrack.id
-
-    # Add track layout record
-    logger.info("Saving track_layout record")
-    result = _addLayoutRec(dbConn, layout)
-    if result[0] == 2:  # integrity error
-        msg = f"error saving track_layout record. error: {result}"
-        logger.error(msg)
-        result = (105, msg)
-        logger.debug(f"returning: {result}")
-        return result
-    else:
-        logger.info("Successfully saved new track_layout record")
+    # Track and layout are saved together or not at all
+    with transaction(dbConn) as tx:
+        # Add track record
+        logger.info("Saving new track record")
+        theVals = {'trackName': layout.track.name,
+                   'cntryID': layout.track.country.id}
+        sql = "INSERT INTO track (name, country_id) VALUES (:trackName, :cntryID)"
+        logger.debug("sql=%s", sql)
+        logger.debug("theVals=%s", theVals)
+        result = _exeDML(dbConn, sql, theVals)
+        if result[0] == 2:  # integrity error
+            msg = f"error saving track record. error: {result}"
+            logger.error(msg)
+            result = (104, msg)
+            logger.debug("returning: %s", result)
+            tx.rollback()
+            return result
+        else:
+            # Get new track.id from db to update layout object
+            logger.debug("Getting new track.id")
+            uTrack = getTrack(dbConn, key="track", value=layout.track.name)
+            logger.info("Successfully saved new track record %s", uTrack)
+            logger.debug(
+                "update trackLayout object with new track.id {uTrack.id}")
+            oldTrackId = layout.track.id
+            layout.track.id = uTrack.id
+
+        # Add track layout record
+        logger.info("Saving track_layout record")
+        result = _addLayoutRec(dbConn, layout)
+        if result[0] == 2:  # integrity error. Remove the new track as well
+            msg = f"error saving track_layout record. error: {result}"
+            logger.error(msg)
+            result = (105, msg)
+            logger.debug("returning: %s", result)
+            layout.track.id = oldTrackId
+            tx.rollback()
+            return result
+        else:
+            logger.info("Successfully saved new track_layout record")
 
-    logger.debug(f"returning: {result}")
+    logger.debug("returning: %s", result)
     return result
 
 
@@ -224,7 +831,7 @@ def addCar(dbConn, car):
               ResultCode 0 = Success
               ResultCode != 0 = see ResultText for details
     """
-    logger.info(f"Adding {car}")
+    logger.info("Adding %s", car)
     # Go validate and see what happens
     valResult = validateCar(dbConn, car)
     if valResult[0]:
@@ -236,13 +843,13 @@ def addCar(dbConn, car):
                    'catId': car.catclass.id,
                    'dtId': car.driveTrain.id}
         result = _exeDML(dbConn, sql, theVals)
-        logger.debug(f"save result: {result}")
+        logger.debug("save result: %s", result)
         if result[0] == 0:
             return(0, f"Car added. {result[1]}")
         else:
             return(1, f"Unable to save: {result[1]}")
     else:  # Validation failed
-        logger.debug(f"Validation did not pass: {valResult}")
+        logger.debug("Validation did not pass: %s", valResult)
         return (1, valResult[1])
 
 
@@ -258,19 +865,20 @@ def addCarSetting(dbConn, carSetting):
               ResultCode = 0 Success
               ResultCode != 0 see ResultText for details
     """
-    logger.debug(f'carSetting={carSetting.__dict__}')
+    logger.debug('carSetting=%r', carSetting)
     logger.info(
-        f"Request to add custom car setting name={carSetting.name} for car id={carSetting.car_id}")
+        "Request to add custom car setting name=%s for car id=%s", carSetting.name, carSetting.car_id)
     logger.info('Validating data')
     valResult = validateCarSetting(dbConn, carSetting)
     if valResult[0]:  # validation passed
         logger.info("All validation passed. Saving custom car settings")
-        insertSQL = "INSERT INTO car_setting (car_id,cat_id,name,max_power,max_torque,power_ratio,traction_control,brake_balance,top_speed,gear_1,gear_2,gear_3,gear_4,gear_5,gear_6,gear_7,final_gear,weight,weight_reduction,tire_code,accel,braking,max_speed,cornering,stability)"
-        valuesSQL = "VALUES (:car_id,:cat_id,:name,:max_power,:max_torque,:power_ratio,:traction_control,:brake_balance,:top_speed,:gear_1,:gear_2,:gear_3,:gear_4,:gear_5,:gear_6,:gear_7,:final_gear,:weight,:weight_reduction,:tire_code,:accel,:braking,:max_speed,:cornering,:stability)"
+        insertSQL = "INSERT INTO car_setting (car_id,cat_id,name,max_power,max_torque,power_ratio,traction_control,brake_balance,top_speed,gear_1,gear_2,gear_3,gear_4,gear_5,gear_6,gear_7,final_gear,weight,weight_reduction,tire_code,accel,braking,max_speed,cornering,stability,gear_1_ratio,gear_2_ratio,gear_3_ratio,gear_4_ratio,gear_5_ratio,gear_6_ratio,gear_7_ratio,final_gear_ratio)"
+        valuesSQL = "VALUES (:car_id,:cat_id,:name,:max_power,:max_torque,:power_ratio,:traction_control,:brake_balance,:top_speed,:gear_1,:gear_2,:gear_3,:gear_4,:gear_5,:gear_6,:gear_7,:final_gear,:weight,:weight_reduction,:tire_code,:accel,:braking,:max_speed,:cornering,:stability,:gear_1_ratio,:gear_2_ratio,:gear_3_ratio,:gear_4_ratio,:gear_5_ratio,:gear_6_ratio,:gear_7_ratio,:final_gear_ratio)"
         sql = f"{insertSQL} {valuesSQL}"
         theVals = {'car_id': carSetting.car_id,'cat_id': carSetting.cat_id,'name': carSetting.name,'max_power': carSetting.max_power,'max_torque': carSetting.max_torque,'power_ratio': carSetting.power_ratio,'traction_control': carSetting.traction_control,'brake_balance': carSetting.brake_balance,'top_speed': carSetting.top_speed,'gear_1': carSetting.gear_1,'gear_2': carSetting.gear_2,'gear_3': carSetting.gear_3,'gear_4': carSetting.gear_4,'gear_5': carSetting.gear_5,'gear_6': carSetting.gear_6,'gear_7': carSetting.gear_7,'final_gear': carSetting.final_gear,'weight': carSetting.weight,'weight_reduction': carSetting.weight_reduction,'tire_code': carSetting.tire_code,'accel': carSetting.accel,'braking': carSetting.braking,'max_speed': carSetting.max_speed,'cornering': carSetting.cornering,'stability': carSetting.stability}
+        theVals.update(zip(gearRatioColumns, carSetting.gearRatios))
         result = _exeDML(dbConn, sql, theVals)
-        logger.debug(f"save result: {result}")
+        logger.debug("save result: %s", result)
         if result[0] == 0:
             return(0, f"Custom car settings added. {result[1]}")
         else:
@@ -293,9 +901,9 @@ def addLayout(dbConn, trackLayout):
               ResultCode 0 = Success
               ResultCode != 0 = see ResultText for details
     """
-    logger.debug(f"addTrackLayout: trackLayout={trackLayout}")
+    logger.debug("addTrackLayout: trackLayout=%s", trackLayout)
     logger.info(
-        f"Adding track layout {trackLayout.name} for track {trackLayout.track.name}.")
+        "Adding track layout %s for track %s.", trackLayout.name, trackLayout.track.name)
     tResult = validateTrackLayout(dbConn, trackLayout)
     if tResult[0]:  # Tests passed
         result = _addLayoutRec(dbConn, trackLayout)
@@ -303,7 +911,7 @@ def addLayout(dbConn, trackLayout):
         logger.warning(tResult[1])
         result = (1, tResult[1])
 
-    logger.debug(f"returning: {result}")
+    logger.debug("returning: %s", result)
     return result
 
 
@@ -323,16 +931,16 @@ def addMfg(dbConn, mfgObj):
             - mfgObj.country.id must exist in Country table in db.
             mfgObj.id is ignored
     """
-    logger.debug(f"add mfg: MfgObj= {mfgObj}")
+    logger.debug("add mfg: MfgObj= %s", mfgObj)
     sql = "INSERT INTO manufacture (name, country_id) VALUES (:mfgName, :cntryID)"
     theVals = {'mfgName': mfgObj.name, 'cntryID': mfgObj.country.id}
     r = _exeDML(dbConn, sql, theVals)
     if r[0] == 0:
         r[1] = f"Manufacture name: {mfgObj.name} added"
     else:
-        logger.debug(f"problem with manufacture add {r}.")
+        logger.debug("problem with manufacture add %s.", r)
 
-    logger.debug(f"returning {r}")
+    logger.debug("returning %s", r)
     return r
 
 
@@ -348,9 +956,9 @@ def addRace(dbConn, race):
               ResultCode == 0 Successful
               ResultCode !=0 Unsuccessful, see ResultText
     """
-    logger.debug(f"addRace: race={race}")
+    logger.debug("addRace: race=%s", race)
     logger.info(
-        f"Adding race {race.name} for Race Collection {race.raceCollection.name}")
+        "Adding race %s for Race Collection %s", race.name, race.raceCollection.name)
     tResult = validateRace(dbConn, race)
     if tResult[0]:  # Tests passed - Save the Race
         sql = "INSERT INTO race (name, tl_id, rc_id,racetime,weather_id,limits,type_id,notes) VALUES (:name, :trackLayoutID, :raceColID,:racetime,:weather_id, :limits, :type_id, :notes)"
@@ -362,14 +970,14 @@ def addRace(dbConn, race):
                    'limits': race.limits,
                    'type_id': race.raceType.id,
                    'notes': race.notes}
-        logger.debug(f"sql={sql}")
-        logger.debug(f"theVals={theVals}")
+        logger.debug("sql=%s", sql)
+        logger.debug("theVals=%s", theVals)
         result = _exeDML(dbConn, sql, theVals)
     else:
         logger.warning(tResult[1])
         result = (1, tResult[1])
 
-    logger.debug(f"returning: {result}")
+    logger.debug("returning: %s", result)
     return result
 
 
@@ -385,21 +993,21 @@ def addRaceCollection(dbConn, raceCollection):
               ResultCode 0 = Success Add
               Resultcode <> 0 - See ResultText for details
     """
-    logger.debug(f"raceCollection={raceCollection}")
+    logger.debug("raceCollection=%s", raceCollection)
     # Collection name must have a value
     if raceCollection.name == None or raceCollection.name == "":
         rtrnMsg = [1, "Collection name can not be blank"]
-        logger.debug(f"Return {rtrnMsg}")
+        logger.debug("Return %s", rtrnMsg)
         return rtrnMsg
 
     # Collection name must be unique for this league
     xlist = getRaceCollectionList(dbConn, raceCollection.league.id)
-    logger.debug(f"xlist={xlist}")
+    logger.debug("xlist=%s", xlist)
     for r in xlist:
         if raceCollection.name == r[1]:  # match
             rtrnMsg = [
                 1, f"Collection name [{raceCollection.name}] already exists for League id [{raceCollection.league.id}]"]
-            logger.debug(f"Return {rtrnMsg}")
+            logger.debug("Return %s", rtrnMsg)
             return rtrnMsg
 
     # Tests Passed
@@ -411,12 +1019,169 @@ def addRaceCollection(dbConn, raceCollection):
                'prize2': raceCollection.prize2,
                'prize3': raceCollection.prize3}
     sql = "INSERT INTO race_collection (league_id, name, description, cat_id, prize1, prize2, prize3) VALUES (:leagueId, :colName, :colDesc, :catId, :prize1, :prize2, :prize3)"
-    logger.debug(f"sql={sql}")
-    logger.debug(f"theVals={theVals}")
+    logger.debug("sql=%s", sql)
+    logger.debug("theVals=%s", theVals)
     rtrnMsg = _exeDML(dbConn, sql, theVals)
-    logger.debug(f"Return {rtrnMsg}")
+    logger.debug("Return %s", rtrnMsg)
+    return rtrnMsg
+
+
+def addRaceResults(dbConn, results):
+    """Add race results. A car setting's result already saved for the race is replaced.
+
+    Args:
+        dbConn (GTConnection): Database connection from create_connection or a ConnectionPool.
+        results (iterable): (race_id, car_setting_id, position, total_ms, best_lap_ms)
+            Times are integer milliseconds. None if not known
+
+    Returns:
+        list: (ResultCode, ResultText)
+              ResultCode 0 = Success
+              Resultcode <> 0 - See ResultText for details. Nothing is saved
+    """
+    sql = ("INSERT INTO race_result (race_id, car_setting_id, position, total_ms, best_lap_ms) VALUES (?, ?, ?, ?, ?) "
+           "ON CONFLICT (race_id, car_setting_id) DO UPDATE SET position = excluded.position, "
+           "total_ms = excluded.total_ms, best_lap_ms = excluded.best_lap_ms")
+    with checkout(dbConn, write=True) as conn:
+        try:
+            with transaction(conn):
+                cur = conn.executemany(sql, results)
+        except sqlite3.IntegrityError as e:
+            logger.warning("sqlite integrity error: %s", e.args[0])
+            return [2, f"sqlite integrity error: {e.args[0]}"]
+
+    rtrnMsg = [0, f"Saved {cur.rowcount} race result(s)"]
+    logger.info(rtrnMsg[1])
     return rtrnMsg
 
+
+def appendLapTimes(dbConn, laps, batchSize=None):
+    """Append lap times. Made for high rates, laps are written batchSize
+    at a time with one executemany and committed per batch, so memory does
+    not grow with the number of laps and readers see them as they arrive.
+    An empty race_result row is added for a car setting's first lap in a race.
+
+    Batches are only committed when no transaction() is open on the
+    connection. Inside one each batch is a savepoint, readers see no laps
+    until the outer transaction commits and its rollback drops them all.
+
+        gtdbV3.appendLapTimes(dbConn, ((raceId, settingId, lap, ms) for lap, ms in session))
+
+    Args:
+        dbConn (GTConnection): Database connection from create_connection or a ConnectionPool.
+        laps (iterable): (race_id, car_setting_id, lap, lap_ms) lap_ms is integer milliseconds
+        batchSize (int, optional): Laps per batch. Defaults to _lapBatchSize
+
+    Returns:
+        list: (ResultCode, ResultText)
+              ResultCode 0 = Success. ResultText has the number of laps saved
+              ResultCode 2 = sqlite integrity error. The failed batch is rolled
+                             back, earlier batches stay saved (until an
+                             outer transaction rolls back)
+    """
+    laps = iter(laps)
+    count = 0
+    with checkout(dbConn, write=True) as conn:
+        if _txDepth(conn):
+            logger.warning("Appending lap times inside a transaction. Laps are not committed until it ends")
+        while True:
+            batch = list(islice(laps, batchSize or _lapBatchSize))
+            if not batch:
+                break
+            try:
+                with transaction(conn):
+                    conn.executemany(
+                        "INSERT OR IGNORE INTO race_result (race_id, car_setting_id) VALUES (?, ?)",
+                        {(x[0], x[1]) for x in batch})
+                    conn.executemany(
+                        "INSERT INTO lap_time (race_id, car_setting_id, lap, lap_ms) VALUES (?, ?, ?, ?)",
+                        batch)
+            except sqlite3.IntegrityError as e:
+                msg = f"sqlite integrity error: {e.args[0]}. {count} lap time(s) saved"
+                logger.warning(msg)
+                return [2, msg]
+            count += len(batch)
+            logger.debug("%s lap times saved", count)
+
+    rtrnMsg = [0, f"Saved {count} lap time(s)"]
+    logger.info(rtrnMsg[1])
+    return rtrnMsg
+
+
+def adviseIndexes(dbConn, statements=None):
+    """Run EXPLAIN QUERY PLAN over sql statements and report the steps that
+    read a whole table instead of searching an index.
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+        statements (dict, optional): {name: sql} to check. Defaults to all the
+            named statements in _SQL (except _fullScanSQL) and the
+            _validationRules EXISTS statements.
+
+    Returns:
+        list: (name, planDetail) for every full table scan.
+        An empty list means every statement uses an index.
+    """
+    if statements is None:
+        statements = {name: sql for name, sql in _SQL.items()
+                      if name not in _fullScanSQL}
+        statements.update({f"validate.{rule}": sqls[0]
+                           for rule, sqls in _validationRules.items()})
+    advice = []
+    for name, sql in statements.items():
+        for row in explainSql(dbConn, sql):
+            detail = row[3]
+            if (detail.startswith('SCAN ') and ' USING ' not in detail
+                    and detail != 'SCAN CONSTANT ROW'):
+                advice.append((name, detail))
+    for name, detail in advice:
+        logger.info("Index advice: %s: %s", name, detail)
+    return advice
+
+
+@contextmanager
+def checkout(dbConn, write=False):
+    """Get a sqlite connection for dbConn, which may be a connection or a
+    gtpool.ConnectionPool. Connections are returned as they are. Pools lend
+    out a reader, or the writer when write is True, until the block exits.
+
+    Args:
+        dbConn (sqlite3.connect | ConnectionPool): Database connection or pool
+        write (bool, optional): The connection will be used for writes. Defaults to False.
+
+    Yields:
+        sqlite3.connect: Database connection
+    """
+    if isinstance(dbConn, sqlite3.Connection):
+        yield dbConn
+    else:
+        with dbConn.checkout(write=write) as conn:
+            yield conn
+
+
+def clearLookupCache(dbConn, table=None):
+    """Remove lookup objects from the connection lookup cache.
+    They will be loaded from the db again when next needed.
+
+    Args:
+        dbConn (sqlite3.connect): Database connection or ConnectionPool (all connections are cleared)
+        table (str, optional): Lookup table to clear. Defaults to None (all tables)
+    """
+    if not isinstance(dbConn, sqlite3.Connection):  # ConnectionPool
+        for conn in dbConn.connections():
+            clearLookupCache(conn, table)
+        return
+    cache = getattr(dbConn, 'lookupCache', None)
+    if cache is None:  # Not a GTConnection
+        return
+    if table:
+        logger.debug("Clearing lookup cache for %s", table)
+        cache.pop(table, None)
+    else:
+        logger.debug("Clearing lookup cache")
+        cache.clear()
+
+
 def deleteCarSetting(dbConn,id):
     """Delete car setting record from database
 
@@ -429,7 +1194,7 @@ def deleteCarSetting(dbConn,id):
                 ResultCode == 0: it worked
                 Resultcode <> 0: See ResultText for details
     """
-    logger.debug(f"delete CarSettingID={id}")
+    logger.debug("delete CarSettingID=%s", id)
     sql = "DELETE FROM car_setting WHERE id = ?"
     theVals=(id,)
     result = _exeDML(dbConn, sql, theVals)
@@ -449,7 +1214,7 @@ def deleteCarSetting(dbConn,id):
         else:
             result = [1, 'No rows were deleted']
 
-    logger.debug(f"returning {result}")
+    logger.debug("returning %s", result)
     return result
 
 
@@ -465,16 +1230,16 @@ def deleteMfg(dbConn, mfgId):
                 ResultCode == 0: it worked
                 Resultcode <> 0: See ResultText for details
     """
-    logger.debug(f"delete manufacture id={mfgId}")
+    logger.debug("delete manufacture id=%s", mfgId)
     sql = "DELETE FROM manufacture WHERE id = ?"
     theVals = (mfgId,)
     result = _exeDML(dbConn, sql, theVals)
     if result[0] == 0:
         result[1] = "Manufacture Deleted"
     else:
-        logger.debug(f"problem with manufacture delete {result}.")
+        logger.debug("problem with manufacture delete %s.", result)
 
-    logger.debug(f"returning {result}")
+    logger.debug("returning %s", result)
     return result
 
 
@@ -491,35 +1256,39 @@ def deleteTrack(dbConn, trackId):
                   Resultcode != 0 : See ResultText for details
     """
     logger.info(
-        f"Delete track trackId={trackId} and related track layouts.")
+        "Delete track trackId=%s and related track layouts.", trackId)
     result = (1, "method is not ready yet")
     # 1-Get and delete track_layout records for track id
     #   Get list of track_layouts for trackid
-    logger.info(f"Getting track layouts for trackid {trackId}")
+    logger.info("Getting track layouts for trackid %s", trackId)
     trackLayouts = getLayoutList(dbConn, trackId)
-    logger.info(f"track layouts to delete: {len(trackLayouts)}")
-    logger.info(f"trackLayouts = {trackLayouts}")
-    #   Delete each track layout
-    for tLayout in trackLayouts:
-        layoutId = tLayout[0]
-        logger.debug(f"Deleting trackLayoutID {layoutId}: {tLayout}")
-        result = deleteTrackLayout(dbConn, layoutId)
-        if result[0] != 0:  # error with delete. Stop deleting
+    logger.info("track layouts to delete: %s", len(trackLayouts))
+    logger.info("trackLayouts = %s", trackLayouts)
+    # Layouts and track are deleted in one transaction
+    with transaction(dbConn) as tx:
+        #   Delete each track layout
+        for tLayout in trackLayouts:
+            layoutId = tLayout[0]
+            logger.debug("Deleting trackLayoutID %s: %s", layoutId, tLayout)
+            result = deleteTrackLayout(dbConn, layoutId)
+            if result[0] != 0:  # error with delete. Stop deleting
+                logger.warning(
+                    "problem deleting track layout id=%s. See %s.", layoutId, result)
+                tx.rollback()
+                return result
+
+        # 2-If that was successfull then delete track
+        sql = "DELETE FROM track WHERE id = ?"
+        theVals = (trackId,)
+        logger.debug("sql=%s", sql)
+        logger.debug("theVals=%s", theVals)
+        result = _exeDML(dbConn, sql, theVals)
+        if result[0] == 0:
+            result[1] = f"track id={trackId} deleted"
+        else:
             logger.warning(
-                f"problem deleting track layout id={layoutId}. See {result}.")
-            return result
-
-    # 2-If that was successfull then delete track
-    sql = "DELETE FROM track WHERE id = ?"
-    theVals = (trackId,)
-    logger.debug(f"sql={sql}")
-    logger.debug(f"theVals={theVals}")
-    result = _exeDML(dbConn, sql, theVals)
-    if result[0] == 0:
-        result[1] = f"track id={trackId} deleted"
-    else:
-        logger.warning(
-            f"problem deleting track id={trackId}. See {result}.")
+                "problem deleting track id=%s. See %s.", trackId, result)
+            tx.rollback()
 
     return result
 
@@ -536,23 +1305,43 @@ def deleteTrackLayout(dbConn, layoutId):
               ResultCode == 0 : successful
               Resultcode != 0 : See ResultText for details
     """
-    logger.info(f"Delete track layout id={layoutId}.")
+    logger.info("Delete track layout id=%s.", layoutId)
     result = (1, "method is not ready yet")
     sql = "DELETE FROM track_layout WHERE id = ?"
     theVals = (layoutId,)
-    logger.debug(f"sql={sql}")
-    logger.debug(f"theVals={theVals}")
+    logger.debug("sql=%s", sql)
+    logger.debug("theVals=%s", theVals)
     result = _exeDML(dbConn, sql, theVals)
     if result[0] == 0:
         result[1] = f"track layout id={layoutId} deleted"
     else:
         logger.warning(
-            f"problem deleting track layout id={layoutId}. See {result}.")
+            "problem deleting track layout id=%s. See %s.", layoutId, result)
 
-    logger.info(f"returning {result}")
+    logger.info("returning %s", result)
     return result
 
 
+def explainSql(dbConn, sql, theVals=None):
+    """Get the sqlite query plan for sql.
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+        sql (str): SQL to explain
+        theVals (list,dict, optional): Values for the sql. Defaults to NULL for every parameter.
+
+    Returns:
+        list: (id, parent, notused, detail) rows from EXPLAIN QUERY PLAN
+    """
+    if theVals is None:
+        names = re.findall(r":(\w+)", sql)
+        theVals = dict.fromkeys(names) if names else (None,) * sql.count('?')
+    # Cached EXPLAIN statements are not re-prepared when the schema changes.
+    # Make the sql text unique per schema version so a new plan is made.
+    schemaVersion = directSql(dbConn, "PRAGMA schema_version", ())[0][0]
+    return directSql(dbConn, f"EXPLAIN QUERY PLAN {sql} -- schema {schemaVersion}", theVals)
+
+
 def getCar(dbConn, id):
     """Get a Car from db
 
@@ -564,16 +1353,13 @@ def getCar(dbConn, id):
         Car Object
         IF CarObject.id == 0 then nothing found
     """
-    logger.info(f"Getting car object id={id}")
-    selectSQL = "SELECT id, model, mfg_id, cat_id, drivetrain_id, year"
-    fromSQL = "FROM car"
-    whereSQL = "WHERE id=?"
-    sql = f"{selectSQL} {fromSQL} {whereSQL}"
+    logger.info("Getting car object id=%s", id)
+    sql = _SQL['getCar']
     theVals = (id,)
     # Execute the SQL
     results = directSql(dbConn, sql, theVals)
     if results:  # have data
-        logger.info(f"Found carid: {id}. Converting to car Object")
+        logger.info("Found carid: %s. Converting to car Object", id)
         xMaker = getMfg(dbConn, value=results[0][2])
         xClassCat = getCarCat(dbConn, results[0][3])
         xDriveTrain = getDriveTrain(dbConn, results[0][4])
@@ -582,7 +1368,7 @@ def getCar(dbConn, id):
         xCar.year = results[0][5]
 
     else:  # Create blank car
-        logger.info(f"Unable to find carid: {id}. Creating empty car object")
+        logger.info("Unable to find carid: %s. Creating empty car object", id)
         xCountry = gtClass.Country(
             cntryID=0, cntryName=None, alpha2=None, alpha3=None, region=None)
         xMaker = gtClass.Manufacture(0, None, xCountry)
@@ -590,7 +1376,7 @@ def getCar(dbConn, id):
         xClassCat = gtClass.ClassCat(0, name=None, desc=None)
         xCar = gtClass.Car(0, None, xMaker, xDriveTrain, xClassCat)
 
-    logger.debug(f"Returning : {xCar}")
+    logger.debug("Returning : %s", xCar)
     return xCar
 
 def getCarSetting(dbConn,id):
@@ -604,50 +1390,43 @@ def getCarSetting(dbConn,id):
         CustCarSetting Object
         IF CustCarSetting.id == 0 then nothing found
     """
-    logger.info(f"Getting car setting object id={id}")
-    selectSQL="SELECT id,car_id,cat_id,name,max_power,max_torque,power_ratio,traction_control,brake_balance,top_speed,gear_1,gear_2,gear_3,gear_4,gear_5,gear_6,gear_7,final_gear,weight,weight_reduction,tire_code,accel,braking,max_speed,cornering,stability"
-    fromSQL="FROM car_setting"
-    whereSQL = "WHERE id=?"
-    sql = f"{selectSQL} {fromSQL} {whereSQL}"
+    logger.info("Getting car setting object id=%s", id)
+    sql = _SQL['getCarSetting']
     theVals = (id,)
     # Execute the SQL
     results = directSql(dbConn, sql, theVals)
     if results: # Have data
-        logger.info(f"Found carSettingID={id}. Converting to carSetting Object")
-        logger.debug(f"results={results}")
-        carSetting=gtClass.CustCarSettings(id=results[0][0],
-        car_id=results[0][1],
-        cat_id=results[0][2],
-        name=results[0][3])
-        carSetting.max_power=results[0][4]
-        carSetting.max_torque=results[0][5]
-        carSetting.power_ratio=results[0][6]
-        carSetting.traction_control=results[0][7]
-        carSetting.brake_balance=results[0][8]
-        carSetting.top_speed=results[0][9]
-        carSetting.gear_1=results[0][10]
-        carSetting.gear_2=results[0][11]
-        carSetting.gear_3=results[0][12]
-        carSetting.gear_4=results[0][13]
-        carSetting.gear_5=results[0][14]
-        carSetting.gear_6=results[0][15]
-        carSetting.gear_7=results[0][16]
-        carSetting.final_gear=results[0][17]
-        carSetting.weight=results[0][18]
-        carSetting.weight_reduction=results[0][19]
-        carSetting.tire_code=results[0][20]
-        carSetting.accel=results[0][21]
-        carSetting.braking=results[0][22]
-        carSetting.cornering=results[0][23]
-        carSetting.max_speed=results[0][24]
-        carSetting.stability=results[0][25]
+        logger.info("Found carSettingID=%s. Converting to carSetting Object", id)
+        logger.debug("results=%s", results)
+        carSetting = gtClass.CustCarSettings.from_row(results[0])
     else: # Create blank car settings object
-        logger.info(f"Unable to find carSettingID={id}. Creating empty carSetting Object")
+        logger.info("Unable to find carSettingID=%s. Creating empty carSetting Object", id)
         carSetting=gtClass.CustCarSettings(id=0,car_id=0,name="Not found",cat_id=0)
 
-    logger.debug(f"carSettingObj={carSetting.__dict__}")
+    logger.debug("carSettingObj=%r", carSetting)
     return carSetting
 
+def getCarSettingsForCar(dbConn, carId=None):
+    """Get the CustCarSettings objects for a car, or for every car.
+    Rows are not validated again. (see CustCarSettings.from_rows)
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+        carId (int, optional): car.id. Defaults to None, every car
+
+    Returns:
+        list: CustCarSettings objects sorted by car_id and name
+    """
+    logger.info("Getting car setting objects for carId=%s", carId)
+    if carId is None:
+        results = directSql(dbConn, _SQL['getCarSettingsForCar.all'], ())
+    else:
+        results = directSql(dbConn, _SQL['getCarSettingsForCar'], (carId,))
+    result = gtClass.CustCarSettings.from_rows(results)
+    logger.info("Returning %s car settings", len(result))
+    return result
+
+
 def getCarSettingList(dbConn,carId):
     """Returns a list of car settings for carId
 
@@ -658,15 +1437,11 @@ def getCarSettingList(dbConn,carId):
         list(id, custSettingName)
         The list will be sorted by custSettingName
     """
-    logger.info(f"Getting list of car settings for carId={carId}")
-    selectSQL="SELECT cset.id, cset.name"
-    fromSQL="FROM car_setting AS cset INNER JOIN car ON cset.car_id = car.id"
-    orderBySQL="ORDER BY cset.name"
-    whereSQL = "WHERE car.id = ?"
-    sql = f"{selectSQL} {fromSQL} {whereSQL} {orderBySQL}"
+    logger.info("Getting list of car settings for carId=%s", carId)
+    sql = _SQL['getCarSettingList']
     theVals = (carId,)
     result = directSql(dbConn, sql, theVals)
-    logger.info(f"Returning {len(result)} rows")
+    logger.info("Returning %s rows", len(result))
     return result
 
 
@@ -681,24 +1456,21 @@ def getCarCat(dbConn, id):
         ClassCat object
         IF ClassCat.id == 0 then ClassCat was not found
     """
-    logger.info(f"Getting classCat by id: {id}")
-    selectSQL = "SELECT id,name,description,sortOrder FROM category"
-    whereSQL = "WHERE id = ?"
-    value = id
-    sql = f"{selectSQL} {whereSQL}"
-    theVals = (value,)
-    logger.debug(f"sql = {sql}")
-    logger.debug(f"theVals = {theVals}")
-    row = directSql(dbConn, sql, theVals)
-    logger.debug(f"row={row}")
-    if row:  # Create ClassCat object
-        rtnObj = gtClass.ClassCat(
-            id=row[0][0], name=row[0][1], desc=row[0][2])
-        rtnObj.sortOrder = row[0][3]
-    else:  # Create an empty ClassCat object
+    logger.info("Getting classCat by id: %s", id)
+    cache = _lookupCache(dbConn, 'category')
+    if cache is not None:
+        rtnObj = cache.get(_lookupKey(id))
+    else:
+        sql = _SQL['getCarCat']
+        theVals = (id,)
+        row = directSql(dbConn, sql, theVals)
+        logger.debug("row=%s", row)
+        rtnObj = _lookupFromRow('category', row[0]) if row else None
+
+    if rtnObj is None:  # Create an empty ClassCat object
         rtnObj = gtClass.ClassCat(id=0, name="", desc="")
 
-    logger.debug(f"rtnObj={rtnObj}")
+    logger.debug("rtnObj=%s", rtnObj)
     return rtnObj
 
 
@@ -712,12 +1484,10 @@ def getCarCatList(dbConn):
         list(id, carClass, desc, sortorder)
         """
     logger.info("Getting list of all the car categories")
-    selectSQL = "SELECT c.id as id, c.name as carClass, c.description as desc, c.sortOrder as sortorder FROM category as c ORDER BY c.sortOrder"
-    sql = selectSQL
-    logger.debug(f"sql = {sql}")
+    sql = _SQL['getCarCatList']
     theVals = ()
     result = directSql(dbConn, sql, theVals)
-    logger.info(f"Returning {len(result)} rows")
+    logger.info("Returning %s rows", len(result))
     return result
 
 
@@ -734,28 +1504,16 @@ def getCarList(dbConn, mfgID, sortBy="year"):
             drivetrain = Sorted by the drive train name (not id), name
 
     """
-    logger.debug(f"mfgID={mfgID} sortBy={sortBy} ")
-    selectSQL = "SELECT car.mfg_id, model, year, cat.name as class, dt.code"
-    fromSQL = "FROM car JOIN drivetrain AS dt ON car.drivetrain_id = dt.id JOIN category as cat on car.cat_id = cat.id"
-    whereSQL = "WHERE mfg_id = :mfgID"
+    logger.debug("mfgID=%s sortBy=%s ", mfgID, sortBy)
     vals = {'mfgID': mfgID}
-
-    if sortBy.lower() == 'classcat':  # Sort by the ClassCat.name
-        orderSQL = "ORDER BY cat.name"
-    elif sortBy.lower() == 'drivetrain':
-        orderSQL = "ORDER BY dt.code"
-    elif sortBy.lower() == 'name':
-        orderSQL = "ORDER BY model"
-    elif sortBy.lower() == 'year':
-        orderSQL = "ORDER BY year"
-    else:
+    sql = _SQL.get(f"getCarList.{sortBy.lower()}")
+    if sql is None:
         logger.warning(
-            f"Unknown sortBy value passed. Setting no orderby")
-        orderSQL = ""
+            "Unknown sortBy value passed. Setting no orderby")
+        sql = _SQL['getCarList']
 
-    sql = f"{selectSQL} {fromSQL} {whereSQL} {orderSQL}"
     results = directSql(dbConn=dbConn, sql=sql, theVals=vals)
-    logger.info(f"Returning {len(results)} rows")
+    logger.info("Returning %s rows", len(results))
     return results
 
 
@@ -771,30 +1529,27 @@ def getCircuit(dbConn, key='id', value=None):
     Returns:
         CircuitObject
     """
-    logger.info(f"Getting a circuit key={key}, value={value}")
-    selectSQL = "SELECT c.id as circuitId, c.name AS Circuit FROM circuit AS c"
+    logger.info("Getting a circuit key=%s, value=%s", key, value)
+    cache = _lookupCache(dbConn, 'circuit') if key == 'id' else None
+    if cache is not None:
+        xCircuit = cache.get(_lookupKey(value))
+    else:
+        sql = _SQL.get(f"getCircuit.{key}")
+        if sql is None:  # no key passed
+            logger.critical("Invalid or missing key value passed.")
+            sys.exit(1)
 
-    if key == 'id':
-        whereSQL = "WHERE c.id = ?"
-    elif key == 'name':
-        whereSQL = "WHERE c.name = ?"
-    else:  # no key passed
-        logger.critical("Invalid or missing key value passed.")
-        sys.exit(1)
+        theVals = (value,)
+        row = directSql(dbConn, sql, theVals)
+        xCircuit = _lookupFromRow('circuit', row[0]) if row else None
 
-    sql = f"{selectSQL} {whereSQL}"
-    theVals = (value,)
-    logger.debug(f"sql = {sql}")
-    logger.debug(f"theVals = {theVals}")
-    row = directSql(dbConn, sql, theVals)
-    if row:  # populate ciruit object
-        logger.info(f"Circuit found")
-        xCircuit = gtClass.Circuit(id=row[0][0], name=row[0][1])
+    if xCircuit is not None:  # populate ciruit object
+        logger.info("Circuit found")
     else:  # create blank ciruit object
-        logger.info(f"Circuit not found")
+        logger.info("Circuit not found")
         xCircuit = gtClass.Circuit(id=0, name=None)
 
-    logger.debug(f"returning: {xCircuit}")
+    logger.debug("returning: %s", xCircuit)
     return xCircuit
 
 
@@ -807,13 +1562,10 @@ def getCircuitList(dbConn):
     Returns: list(id, name)
     """
     logger.info("Getting list of Circuits")
-    selectSQL = "SELECT c.id as id, c.name as name from circuit as c"
-    orderbySQL = "ORDER by name"
-    sql = f"{selectSQL} {orderbySQL}"
+    sql = _SQL['getCircuitList']
     theVals = ()
-    logger.debug(f"sql = {sql}")
     result = directSql(dbConn, sql, theVals)
-    logger.info(f"Returning {len(result)} rows")
+    logger.info("Returning %s rows", len(result))
     return result
 
 
@@ -824,31 +1576,27 @@ def getCountry(dbConn, countryId):
         dbConn (sqlite3.connect): Database connection
         countryID (int): Unique ID for the country
     """
-    logger.info(f"Getting country by countryId: {countryId}")
-    selectSQL = "SELECT id AS countryId, name AS Country, alpha2, alpha3, region FROM country"
-    whereSQL = "WHERE countryId = ?"
-    sql = f"{selectSQL} {whereSQL}"
-    theVals = (countryId,)
-    logger.debug(f"sql={sql}")
-    logger.debug(f"theVals={theVals}")
-    row = directSql(dbConn, sql, theVals)
-    if row:  # Populate Country obj with db data
-        logger.info(f"Found countryId: {countryId}")
-        country = gtClass.Country(
-            cntryID=row[0][0],
-            cntryName=row[0][1],
-            alpha2=row[0][2],
-            alpha3=row[0][3],
-            region=row[0][4])
+    logger.info("Getting country by countryId: %s", countryId)
+    cache = _lookupCache(dbConn, 'country')
+    if cache is not None:
+        country = cache.get(_lookupKey(countryId))
+    else:
+        sql = _SQL['getCountry']
+        theVals = (countryId,)
+        row = directSql(dbConn, sql, theVals)
+        country = _lookupFromRow('country', row[0]) if row else None
+
+    if country is not None:  # Found Country obj
+        logger.info("Found countryId: %s", countryId)
     else:  # Create blank Country obj
-        logger.info(f"Unable to find countryId: {countryId}")
+        logger.info("Unable to find countryId: %s", countryId)
         country = gtClass.Country(
             cntryID=0,
             cntryName=None,
             alpha2=None,
             alpha3=None,
             region=None)
-    logger.info(f"Returning country={country}")
+    logger.info("Returning country=%s", country)
     return country
 
 
@@ -863,21 +1611,21 @@ def getDriveTrain(dbConn, id):
         DriveTrain object
         IF DriveTrain.id == 0 then no drive train found
     """
-    logger.info(f"Getting drivetrain object id={id}")
-    selectSQL = "SELECT id, code, description"
-    fromSQL = "FROM drivetrain"
-    whereSQL = "WHERE id=?"
-    sql = f"{selectSQL} {fromSQL} {whereSQL}"
-    theVals = (id,)
-    # Execute the SQL
-    results = directSql(dbConn, sql, theVals)
+    logger.info("Getting drivetrain object id=%s", id)
+    cache = _lookupCache(dbConn, 'drivetrain')
+    if cache is not None:
+        xObj = cache.get(_lookupKey(id))
+    else:
+        sql = _SQL['getDriveTrain']
+        theVals = (id,)
+        # Execute the SQL
+        results = directSql(dbConn, sql, theVals)
+        xObj = _lookupFromRow('drivetrain', results[0]) if results else None
 
-    if results:  # Create DriveTrain object
-        xObj = gtClass.DriveTrain(results[0][0], results[0][1], results[0][2])
-    else:  # Create empty DriveTrain object
+    if xObj is None:  # Create empty DriveTrain object
         xObj = gtClass.DriveTrain(0, None, None)
 
-    logger.debug(f"Returning : {xObj}")
+    logger.debug("Returning : %s", xObj)
     return xObj
 
 
@@ -892,14 +1640,14 @@ def getDriveTrainList(dbConn, orderBy='code'):
     Returns:
             list: (id, code, description)
     """
-    logger.info(f"Getting all drive trains ordered by {orderBy} ")
+    logger.info("Getting all drive trains ordered by %s ", orderBy)
     selectSQL = "select id, code, description FROM drivetrain"
     orderBySQL = f"ORDER BY {orderBy}"
     sql = f"{selectSQL} {orderBySQL}"
-    logger.debug(f"sql: {sql}")
+    logger.debug("sql: %s", sql)
     theVals = ()
     result = directSql(dbConn, sql, theVals)
-    logger.info(f"Returning {len(result)} rows")
+    logger.info("Returning %s rows", len(result))
     return result
 
 def getGarageMfgList(dbConn):
@@ -911,19 +1659,31 @@ def getGarageMfgList(dbConn):
     Returns:
         list: (MfgId,Make)
     """
-    logger.info(f"Getting list of manufactures that have cars in the garage")
-    selectSQL="SELECT mfg.id AS id,mfg.name AS Make"
-    fromSQL="FROM manufacture AS mfg JOIN car ON car.mfg_id = mfg.id"
-    groupBySQL ="GROUP BY mfg.id, mfg.name"
-    orderBySQL = f"ORDER BY mfg.name"
-    sql = f"{selectSQL} {fromSQL} {groupBySQL} {orderBySQL}"
+    logger.info("Getting list of manufactures that have cars in the garage")
+    sql = _SQL['getGarageMfgList']
     theVals = ()
-    logger.debug(f"sql: {sql}")
     results = directSql(dbConn, sql, theVals)
-    logger.info(f"Rows being returned: {len(results)}")
+    logger.info("Rows being returned: %s", len(results))
     return results
 
 
+def getLapTimes(dbConn, raceId, carSettingId):
+    """Lap times of a car setting in a race
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+        raceId (int): race.id
+        carSettingId (int): car_setting.id
+
+    Returns:
+        list: (lap, lap_ms) sorted by lap
+    """
+    logger.info("Getting lap times for raceId=%s carSettingId=%s", raceId, carSettingId)
+    result = directSql(dbConn, _SQL['getLapTimes'], (raceId, carSettingId))
+    logger.info("Returning %s rows", len(result))
+    return result
+
+
 def getLayout(dbConn, layoutId):
     """Gets a single Track Layout record from database.
 
@@ -933,28 +1693,18 @@ def getLayout(dbConn, layoutId):
     Returns:
         TrackLayout Object: IF TrackLayoutObject.id == 0 then nothing found
     """
-    logger.info(f"Getting track layout id {layoutId}")
-    sql = """SELECT id as layoutId, name as layoutName, miles, track_id, circuit_id FROM track_layout WHERE layoutId=?"""
+    logger.info("Getting track layout id %s", layoutId)
+    sql = _SQL['getLayout']
     theVals = (layoutId,)
-    logger.debug(f"sql={sql}")
-    logger.debug(f"theVals={theVals}")
     row = directSql(dbConn, sql, theVals)
     if row:  # Populate trackLayout obj
-        logger.info(f"Found track layout id {layoutId}")
-        xTrack = getTrack(dbConn, key='trackId', value=row[0][3])
-        xCircuit = getCircuit(dbConn, key='id', value=row[0][4])
-        xTrackLayout = gtClass.TrackLayout(
-            row[0][0], row[0][1], miles=row[0][2], trackObj=xTrack, circuitObj=xCircuit)
-
+        logger.info("Found track layout id %s", layoutId)
+        xTrackLayout = _layoutFromRow(row[0])
     else:  # Create blank trackLayout obj (no data returned)
-        logger.info(f"Unable to find track layout id {layoutId}")
-        logger.debug(f"creating empty tracklayout object")
-        xCircuit = getCircuit(dbConn, key='id', value=0)
-        xTrack = getTrack(dbConn, key='trackId', value=0)
-        xTrackLayout = gtClass.TrackLayout(
-            id=0, name=None, miles=None, trackObj=xTrack, circuitObj=xCircuit)
+        logger.info("Unable to find track layout id %s", layoutId)
+        xTrackLayout = _layoutFromRow((None,) * 12)
 
-    logger.debug(f"returning object xTrackLayout={xTrackLayout} ")
+    logger.debug("returning object xTrackLayout=%s ", xTrackLayout)
     return xTrackLayout
 
 
@@ -967,17 +1717,11 @@ def getLayoutList(dbConn, trackId):
     Returns:
         list: (layoutId, layout,Miles,Races)
     """
-    logger.info(f"Getting track layout list: trackId={trackId}")
-    selectSQL = "SELECT tl.id AS layoutId, tl.name AS layout, tl.miles AS Miles, count(race.tl_id) AS Races"
-    fromSQL = "FROM track_layout AS tl LEFT JOIN race ON tl.id = race.tl_id"
-    groupBySQL = "GROUP BY tl.id HAVING tl.track_id = ?"
-    orderBySQL = "ORDER BY layout"
-    sql = f"{selectSQL} {fromSQL} {groupBySQL} {orderBySQL}"
+    logger.info("Getting track layout list: trackId=%s", trackId)
+    sql = _SQL['getLayoutList']
     theVals = (trackId,)
-    logger.debug(f"sql = {sql}")
-    logger.debug(f"theVals = {theVals}")
     results = directSql(dbConn, sql, theVals)
-    logger.info(f"Returning {len(results)} rows")
+    logger.info("Returning %s rows", len(results))
     return results
 
 
@@ -992,20 +1736,20 @@ def getLeague(dbConn, key='id', value=None):
     Returns:
         LeagueObject. If nothing found then LeagueObj.id=0
     """
-    logger.info(f"Getting a League: {key}={value}")
-    selectSQL = "SELECT id, name, sortord FROM league"
-    whereSQL = f"WHERE {key} = ?"
-    theVals = (value,)
-    sql = f"{selectSQL} {whereSQL}"
-    logger.debug(f"sql={sql}")
-    logger.debug(f"theVals={theVals}")
-    row = directSql(dbConn, sql, theVals)
-    if row:  # have data from db
-        league = gtClass.League(
-            id=row[0][0], name=row[0][1], sortord=row[0][2])
-    else:  # No data from db. Create empty object
+    logger.info("Getting a League: %s=%s", key, value)
+    cache = _lookupCache(dbConn, 'league') if key == 'id' else None
+    if cache is not None:
+        league = cache.get(_lookupKey(value))
+    else:
+        sql = _SQL.get(f"getLeague.{key}",
+                       f"{_lookupSQL['league']} WHERE {key} = ?")
+        theVals = (value,)
+        row = directSql(dbConn, sql, theVals)
+        league = _lookupFromRow('league', row[0]) if row else None
+
+    if league is None:  # No data from db. Create empty object
         league = gtClass.League(id=0, name="", sortord=0)
-    logger.debug(f'returning: {league}')
+    logger.debug('returning: %s', league)
     return league
 
 
@@ -1019,13 +1763,10 @@ def getLeagueList(dbConn):
         list (leagueID, leagueName)
     """
     logger.info("Getting list of Leagues")
-    selectSQL = "SELECT id, name FROM league"
-    orderBySQL = "ORDER BY sortord"
-    sql = f"{selectSQL} {orderBySQL}"
-    logger.debug(f"sql = {sql}")
+    sql = _SQL['getLeagueList']
     theVals = ()
     results = directSql(dbConn, sql, theVals)
-    logger.debug(f"Returning {len(results)} rows")
+    logger.debug("Returning %s rows", len(results))
     return results
 
 
@@ -1041,16 +1782,13 @@ def getMfg(dbConn, key='mfgId', value=None):
     Returns:
         ManufactureObject. IF ManufactureObject.id = 0 then nothing found
     """
-    logger.debug(f"Getting Manufacture: {key}={value}")
-    selectSQL = "SELECT mfg.id as mfgId, mfg.name AS Make, country_id as cntryId FROM manufacture AS mfg"
-    whereSQL = f" WHERE {key} = ?"
+    logger.debug("Getting Manufacture: %s=%s", key, value)
+    sql = _SQL.get(f"getMfg.{key}")
+    if sql is None:  # Any other column of manufacture
+        sql = f"SELECT mfg.id as mfgId, mfg.name AS Make, country_id as cntryId FROM manufacture AS mfg WHERE {key} = ?"
     theVals = (value,)
-    sql = f"{selectSQL} {whereSQL}"
-    # Ready to execute SQL
-    logger.debug(f"theVars: {theVals}")
-    logger.debug(f"sql: {sql}")
     row = directSql(dbConn, sql, theVals)
-    logger.debug(f"row={row}")
+    logger.debug("row=%s", row)
     # default Country object (blank)
     xCountry = gtClass.Country(
         cntryID=0, cntryName=None, alpha2=None, alpha3=None, region=None)
@@ -1062,15 +1800,15 @@ def getMfg(dbConn, key='mfgId', value=None):
 
         xMake = gtClass.Manufacture(
             id=row[0][0], name=row[0][1], countryObj=xCountry)
-        logger.debug(f"returning manufacture object")
+        logger.debug("returning manufacture object")
     else:
         # Create blank Manufacture object
         logger.debug("manufacture not found.")
         xMake = gtClass.Manufacture(
             id=0, name='', countryObj=xCountry)
-        logger.debug(f"returning blank manufacture object")
+        logger.debug("returning blank manufacture object")
 
-    logger.debug(f"Returning : {xMake}")
+    logger.debug("Returning : %s", xMake)
     return xMake
 
 
@@ -1083,14 +1821,11 @@ def getMfgList(dbConn):
     Returns:
         list: (MfgId,Make)
     """
-    logger.info(f"Getting all manufactures")
-    selectSQL = """SELECT mfg.id as id, mfg.name AS Make FROM manufacture AS mfg"""
-    orderBySQL = f"ORDER BY mfg.name"
-    sql = f"{selectSQL} {orderBySQL}"
+    logger.info("Getting all manufactures")
+    sql = _SQL['getMfgList']
     theVals = ()
-    logger.debug(f"sql: {sql}")
     results = directSql(dbConn, sql, theVals)
-    logger.info(f"Rows being returned: {len(results)}")
+    logger.info("Rows being returned: %s", len(results))
     return results
 
 
@@ -1105,49 +1840,69 @@ def getRace(dbConn, id):
         Race Object: The race object.
         If race.id=0 then race was not found
     """
-    logger.info(f"Getting race from db for race id: {id}")
-    selectSQL = "SELECT id, name, tl_id, rc_id, weather_id, type_id, racetime, limits, notes FROM race"
-    whereSQL = "WHERE id = ?"
-    value = id
-    theVals = (value,)
-    sql = f"{selectSQL} {whereSQL}"
-    logger.debug(f"sql={sql}")
-    logger.debug(f"theVals={theVals}")
+    logger.info("Getting race from db for race id: %s", id)
+    sql = _SQL['getRace']
+    theVals = (id,)
     row = directSql(dbConn, sql, theVals)
     if row:  # Create a race object
         logger.info("Found race")
-        logger.debug(f"row={row}")
-        id = row[0][0]
-        name = row[0][1]
-        trackLayout = getLayout(dbConn, row[0][2])
-        raceCollection = getRaceCollection(dbConn, rcId=row[0][3])
-        weather = getWeather(dbConn, row[0][4])
-        raceType = getRaceType(dbConn, row[0][5])
-        racetime = row[0][6]
-        limits = row[0][7]
-        notes = row[0][8]
-    else:  # create a blank racetype object
+        race = _raceFromRow(row[0])
+    else:  # create a blank race object
         logger.info("Race not found")
-        trackLayout = getLayout(dbConn, 0)
-        raceCollection = getRaceCollection(dbConn, rcId=0)
-        weather = getWeather(dbConn, 0)
-        raceType = getRaceType(dbConn, 0)
-        id = 0
-        name = None
-        racetime = None
-        limits = None
-        notes = None
-
-    race = gtClass.Race(id=id, name=name, trackLayout=trackLayout,
-                        raceCollection=raceCollection, raceType=raceType, weather=weather)
-    race.racetime = racetime
-    race.limits = limits
-    race.notes = notes
+        race = _raceFromRow((0,) + (None,) * 33)
 
-    logger.debug(f"race={race}")
+    logger.debug("race=%s", race)
     return race
 
 
+def getRaces(dbConn, ids):
+    """Get Race objects from database for a list of raceIds
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+        ids (list): The unique race IDs
+
+    Returns:
+        list: Race objects in the same order as ids.
+        Race ids not found are not included.
+        Races share the track layout, race collection, weather and race type objects.
+    """
+    logger.info("Getting %s races from db", len(ids))
+    races = {}
+    shared = {}
+    # Keep the number of sql variables well under the sqlite limit
+    for i in range(0, len(ids), _maxSqlVars):
+        chunk = tuple(ids[i:i + _maxSqlVars])
+        inSQL = ",".join("?" * len(chunk))
+        sql = f"SELECT {_raceCols} FROM race AS r {_raceJoinSQL} WHERE r.id IN ({inSQL})"
+        for row in directSql(dbConn, sql, chunk):
+            races[row[0]] = _raceFromRow(row, shared)
+
+    result = [races[int(x)] for x in ids if int(x) in races]
+    logger.info("Returning %s races", len(result))
+    return result
+
+
+def getRacesForCollection(dbConn, rcId):
+    """Get all the Race objects for a Race Collection
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+        rcId (int): Race collection id
+
+    Returns:
+        list: Race objects sorted by race name.
+        Races share the track layout, race collection, weather and race type objects.
+    """
+    logger.info("Getting races for collection ID=%s", rcId)
+    sql = _SQL['getRacesForCollection']
+    theVals = (rcId,)
+    shared = {}
+    result = [_raceFromRow(row, shared) for row in directSql(dbConn, sql, theVals)]
+    logger.info("Returning %s races", len(result))
+    return result
+
+
 def getRaceList(dbConn, raceCollectionID):
     """Get a list of races for a Race Collection
 
@@ -1159,17 +1914,12 @@ def getRaceList(dbConn, raceCollectionID):
         list: (raceID,raceName)
     """
     # Got to get a list of races for this race.raceCollection.id
-    logger.info(f"Getting race list for collection ID={raceCollectionID}")
-    selectSQL = "select r.id as raceID, r.name as RaceName FROM race as r"
-    whereSQL = "WHERE r.rc_id = ?"
-    orderBySQL = "ORDER BY r.name"
-    sql = f"{selectSQL} {whereSQL} {orderBySQL}"
+    logger.info("Getting race list for collection ID=%s", raceCollectionID)
+    sql = _SQL['getRaceList']
     theVals = (raceCollectionID,)
-    logger.debug(f"sql = {sql}")
-    logger.debug(f"theVals = {theVals}")
     results = directSql(dbConn, sql, theVals)
-    logger.info(f"Returning {len(results)} rows")
-    logger.debug(f"result={results}")
+    logger.info("Returning %s rows", len(results))
+    logger.debug("result=%s", results)
     return results
 
 
@@ -1184,43 +1934,17 @@ def getRaceCollection(dbConn, rcId):
         Race Collection object
         IF raceCollection.id == 0 then race Collection not found
     """
-    logger.info(f"Getting Race Collection by id: {rcId}")
-    selectSQL = "SELECT id as collectionId,name,description,league_id,cat_id,prize1,prize2,prize3 FROM race_collection"
-    whereSQL = "WHERE collectionId = ?"
-    value = rcId
-    sql = f"{selectSQL} {whereSQL}"
-    theVals = (value,)
-    logger.debug(f"sql = {sql}")
-    logger.debug(f"theVals = {theVals}")
+    logger.info("Getting Race Collection by id: %s", rcId)
+    sql = _SQL['getRaceCollection']
+    theVals = (rcId,)
     row = directSql(dbConn, sql, theVals)
     if row:  # populate the raceCollection object
         logger.debug("Found race collection")
-        logger.debug(f"row={row}")
-
-        league = getLeague(dbConn, key='id', value=row[0][3])
-        logger.debug(f"league={league}")
-        raceCollection = gtClass.RaceCollection(
-            id=row[0][0], name=row[0][1], desc=row[0][2], leagueObj=league)
-
-        # Getting the car class category
-        catClass = getCarCat(dbConn, id=row[0][4])
-        if catClass.id == 0:  # no catClass assigned to raceCollection
-            raceCollection.classcat = gtClass.ClassCat(
-                id=None, name="", desc="")
-        else:
-            raceCollection.classcat = catClass
-
-        # Prize money
-        raceCollection.prize1 = row[0][5]
-        raceCollection.prize2 = row[0][6]
-        raceCollection.prize3 = row[0][7]
-
+        raceCollection = _collectionFromRow(row[0])
     else:  # create a blank raceCollection object
-        league = getLeague(dbConn, key='id', value=0)
-        raceCollection = gtClass.RaceCollection(
-            id=0, name=None, desc=None, leagueObj=league)
+        raceCollection = _collectionFromRow((None,) * 13)
 
-    logger.debug(f"raceCollection={raceCollection}")
+    logger.debug("raceCollection=%s", raceCollection)
     return raceCollection
 
 
@@ -1235,20 +1959,31 @@ def getRaceCollectionList(dbConn, leagueId):
         list: (id,name,desc,catClass, Prize1, Prize2, Prize3,raceCount)
     """
     logger.info(
-        f"Getting list of race collections for a leagueID {leagueId}")
-    selectSQL = "SELECT rc.id, rc.name, rc.description, cat.name as catClass, rc.prize1,  rc.prize2, rc.prize3,Count(race.id) AS races"
-    fromSQL = "FROM race_collection AS rc LEFT JOIN category AS cat ON rc.cat_id = cat.id LEFT JOIN race ON race.rc_id = rc.id"
-    groupBySQL = "GROUP BY rc.id HAVING rc.league_id=?"
-    orderBySQL = "ORDER BY rc.name"
-    sql = f"{selectSQL} {fromSQL} {groupBySQL} {orderBySQL}"
+        "Getting list of race collections for a leagueID %s", leagueId)
+    sql = _SQL['getRaceCollectionList']
     theVals = (leagueId,)
-    logger.debug(f"sql = {sql}")
-    logger.debug(f"theVals = {theVals}")
     results = directSql(dbConn, sql, theVals)
-    logger.info(f"Rows being returned: {len(results)}")
+    logger.info("Rows being returned: %s", len(results))
     return results
 
 
+def getRaceResults(dbConn, raceId):
+    """Results of a race
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+        raceId (int): race.id
+
+    Returns:
+        list: (position, carSettingId, settingName, carModel, total_ms, best_lap_ms, laps)
+        sorted by position. best_lap_ms is the fastest lap saved when not given
+    """
+    logger.info("Getting results for raceId=%s", raceId)
+    result = directSql(dbConn, _SQL['getRaceResults'], (raceId,))
+    logger.info("Returning %s rows", len(result))
+    return result
+
+
 def getRaceType(dbConn, id):
     """Get a Race Type from db by id
 
@@ -1260,21 +1995,20 @@ def getRaceType(dbConn, id):
         RaceTypeObj: Race type object
         If RaceTypeObj.id=0 then race type was not found
     """
-    selectSQL = "SELECT id, name FROM race_type"
-    whereSQL = "WHERE id = ?"
-    value = id
-    sql = f"{selectSQL} {whereSQL}"
-    theVals = (value,)
-    row = directSql(dbConn, sql, theVals)
-    logger.debug(f"row={row}")
-    if row:  # Create a racetype object
-        logger.debug("Found race type")
-        logger.debug(f"row={row}")
-        rt = gtClass.RaceType(id=row[0][0], name=row[0][1])
-    else:  # create a blank racetype object
+    cache = _lookupCache(dbConn, 'race_type')
+    if cache is not None:
+        rt = cache.get(_lookupKey(id))
+    else:
+        sql = _SQL['getRaceType']
+        theVals = (id,)
+        row = directSql(dbConn, sql, theVals)
+        logger.debug("row=%s", row)
+        rt = _lookupFromRow('race_type', row[0]) if row else None
+
+    if rt is None:  # create a blank racetype object
         rt = gtClass.RaceType(id=0, name="")
 
-    logger.debug(f"rt={rt}")
+    logger.debug("rt=%s", rt)
     return rt
 
 
@@ -1288,12 +2022,10 @@ def getRaceTypeList(dbConn):
             list: (raceTypeid, raceTypeName)
     """
     logger.info("Getting list of race types from db")
-    selectSQL = "SELECT id, name FROM race_type ORDER by name"
-    sql = selectSQL
+    sql = _SQL['getRaceTypeList']
     theVals = ()
-    logger.debug(f"sql = {sql}")
     results = directSql(dbConn, sql, theVals)
-    logger.debug(f"Returning {len(results)} rows")
+    logger.debug("Returning %s rows", len(results))
     return results
 
 
@@ -1308,11 +2040,10 @@ def getTireList(dbConn):
 
     """
     logger.info("Getting list of race types from db")
-    sql = "SELECT code, description from tire ORDER BY code"
+    sql = _SQL['getTireList']
     theVals = ()
-    logger.debug(f"sql = {sql}")
     results = directSql(dbConn, sql, theVals)
-    logger.debug(f"Returning {len(results)} rows")
+    logger.debug("Returning %s rows", len(results))
     return results
 
 
@@ -1328,56 +2059,39 @@ def getTrack(dbConn, key='trackId', value=None):
         Track Object
         if TrackObject.id == 0 then track was not found
     """
-    logger.debug(f"getting track key={key}, value={value}")
-    if key == 'trackId':
-        whereSQL = "WHERE trackId = ?"
-    elif key == 'track':
-        whereSQL = "WHERE track = ?"
-
-    sqlSelect = """SELECT id AS trackId, name AS track, country_id as countryId FROM track"""
-    sql = f"{sqlSelect} {whereSQL}"
+    logger.debug("getting track key=%s, value=%s", key, value)
+    sql = _SQL[f"getTrack.{key}"]
     theVals = (value,)
-    logger.debug(f"sql = {sql}")
-    logger.debug(f"theVals = {theVals}")
     row = directSql(dbConn, sql, theVals)
-    logger.debug(f"row={row}")
-    # default Country object (blank)
-    xCountry = gtClass.Country(
-        cntryID=0, cntryName=None, alpha2=None, alpha3=None, region=None)
-
     if row:  # Populate the track object
-        logger.info(f"Found Track")
-        if row[0][2]:  # We have a country
-            xCountry = getCountry(dbConn, row[0][2])
-        xTrack = gtClass.Track(
-            id=row[0][0], name=row[0][1], countryObj=xCountry)
-
+        logger.info("Found Track")
+        xTrack = _trackFromRow(row[0])
     else:  # create a blank track object
         logger.debug("no track found")
-        xTrack = gtClass.Track(id=0, name=None, countryObj=xCountry)
+        xTrack = _trackFromRow((None,) * 7)
 
-    logger.debug(f'track = {xTrack}')
+    logger.debug('track = %s', xTrack)
     return xTrack
 
 
-def getTrackList(dbConn):
-    """Returns a list of all the tracks and the number of layouts for each track
+def getTrackList(dbConn, detail=False):
+    """Returns a list of all the tracks and the number of layouts for each track.
+    Tracks without layouts are listed with 0 layouts.
 
     Args:
         dbConn (sqlite3.connect): Database connection
+        detail (bool, optional): Include the country region and name. Defaults to False.
 
     Returns:
         list: (trackId, trackName, numLayouts)
+              detail: (trackId, trackName, region, countryName, numLayouts)
+              region and countryName are None for tracks without a country
     """
     logger.info("Getting list of Tracks")
-    selectSQL = "SELECT tl.track_id,t.name,count(tl.id) as layouts"
-    fromSQL = "FROM track as t LEFT join track_layout as tl ON t.id = tl.track_id GROUP BY tl.track_id"
-    orderBySQL = "ORDER BY t.name"
-    sql = f"{selectSQL} {fromSQL} {orderBySQL}"
+    sql = _SQL['getTrackList.detail' if detail else 'getTrackList']
     theVals = ()
-    logger.debug(f"sql = {sql}")
     results = directSql(dbConn, sql, theVals)
-    logger.info(f"Rows being returned: {len(results)}")
+    logger.info("Rows being returned: %s", len(results))
     return results
 
 
@@ -1393,20 +2107,20 @@ def getWeather(dbConn, id):
         if WeatherObject.id == 0 then weather was not found
 
     """
-    logger.info(f"Getting weather object by id: {id}")
-    selectSQL = "SELECT id, name FROM weather"
-    whereSQL = f"WHERE id = ?"
-    theVals = (id,)
-    sql = f"{selectSQL} {whereSQL}"
-    logger.debug(f"{theVals}")
-    logger.debug(f"sql: {sql}")
-    row = directSql(dbConn, sql, theVals)
-    logger.debug(f"row={row}")
-    if row:  # have data from db
-        weather = gtClass.Weather(id=row[0][0], name=row[0][1])
-    else:  # No data from db. Create empty object
+    logger.info("Getting weather object by id: %s", id)
+    cache = _lookupCache(dbConn, 'weather')
+    if cache is not None:
+        weather = cache.get(_lookupKey(id))
+    else:
+        sql = _SQL['getWeather']
+        theVals = (id,)
+        row = directSql(dbConn, sql, theVals)
+        logger.debug("row=%s", row)
+        weather = _lookupFromRow('weather', row[0]) if row else None
+
+    if weather is None:  # No data from db. Create empty object
         weather = gtClass.Weather(id=0, name="")
-    logger.debug(f'weather = {weather}')
+    logger.debug('weather = %s', weather)
     return weather
 
 
@@ -1420,35 +2134,217 @@ def getWeatherList(dbConn):
         list (weatherID, weatherName)
     """
     logger.info("Getting list of weather objects")
-    selectSQL = "SELECT id, name FROM weather ORDER by name"
-    sql = selectSQL
-    logger.debug(f"sql = {sql}")
+    sql = _SQL['getWeatherList']
     theVals = ()
     results = directSql(dbConn, sql, theVals)
-    logger.info(f"Rows being returned: {len(results)}")
+    logger.info("Rows being returned: %s", len(results))
     return results
 
 
+def iterRacesForCollection(dbConn, rcId, pageSize=None):
+    """Race objects for a Race Collection, read a page at a time.
+    Use instead of getRacesForCollection for collections with many races.
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+        rcId (int): Race collection id
+        pageSize (int, optional): Races read per query. Defaults to defaultPageSize
+
+    Yields:
+        Race object, sorted by race name
+    """
+    logger.info("Iterating races for collection ID=%s", rcId)
+    shared = {}
+    for page in pageSql(dbConn, 'getRacesForCollection', {'rcId': rcId}, pageSize):
+        for row in page:
+            yield _raceFromRow(row, shared)
+
+
 def initDB(dbConn, scriptPath=None):
     """Create tables, views, indexes
+    Drops and reloads the tables. Use gtschema.migrate to create or upgrade
+    a database that holds user data.
 
     Args:
         dbConn (sqlite3.connect): Database connection
         scriptPath (str): path to script files
     """
     logger.info("Database to be initilized")
-    logger.debug(f"scriptPath={scriptPath}")
+    logger.debug("scriptPath=%s", scriptPath)
     scripts = ['createTables.sql',
                'LoadLookUpData.sql',
                'LoadOtherData.sql']
-    logger.debug(f'scripts to run: {scripts}')
+    logger.debug('scripts to run: %s', scripts)
     gtScripts = Path(scriptPath)
     for sFile in scripts:
         scriptFile = gtScripts / sFile
-        logger.debug(f"Executing {scriptFile}")
+        logger.debug("Executing %s", scriptFile)
         _exeScriptFile(dbConn, scriptFileName=f'{scriptFile}')
+    warmLookupCache(dbConn)
     logger.info("Database init completed")
 
+def loadValidationKeys(dbConn, rules=None):
+    """Load the keys for validation rules so many objects can be validated
+    without a query per object. Pass the result to the validate functions.
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+        rules (list, optional): Rule names. (see _validationRules) Defaults to all rules.
+
+    Returns:
+        dict: {rule: set of key tuples}
+    """
+    keys = {}
+    for rule in rules or _validationRules:
+        rows = directSqlIter(dbConn, _validationRules[rule][1], ())
+        keys[rule] = {_validationKey(rule, row) for row in rows}
+    logger.debug("Loaded validation keys for %s", list(keys))
+    return keys
+
+
+def pageSql(dbConn, name, theVals, pageSize=None):
+    """Read a list a page at a time using keyset pagination.
+    Each page is a new query that starts after the last row of the page
+    before, so no cursor or read transaction is held between pages and the
+    cost of a page does not grow with its position in the list.
+
+        for page in pageSql(dbConn, 'getTrackList', {}):
+            display(page)
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+        name (str): Statement in _pageSQL
+        theVals (dict): Named values for the statement
+        pageSize (int, optional): Rows per page. Defaults to defaultPageSize
+
+    Yields:
+        list: rows. Only the last page has fewer than pageSize rows
+    """
+    sql, keys = _pageSQL[name]
+    pageSize = pageSize or defaultPageSize
+    firstSQL = sql.format(after="1")
+    nextSQL = sql.format(after=f"({', '.join(col for col, idx in keys)}) > "
+                               f"({', '.join(f':after{x}' for x in range(len(keys)))})")
+    theVals = dict(theVals, pageSize=pageSize)
+    page = directSql(dbConn, firstSQL, theVals)
+    while page:
+        yield page
+        if len(page) < pageSize:
+            return
+        for x, (col, idx) in enumerate(keys):
+            value = page[-1][idx]
+            # (NULL, id) > (...) is never true. Nullable keys are coalesce(column, '')
+            theVals[f'after{x}'] = '' if value is None else value
+        page = directSql(dbConn, nextSQL, theVals)
+
+
+def setSqlTrace(dbConn, enabled=True):
+    """Turn sqlite statement tracing to logger.debug on or off for a connection.
+    The callback is only installed when enabled and DEBUG logging is on,
+    so normal queries carry no tracing overhead.
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+        enabled (bool): True to trace sql. Defaults to True.
+
+    Returns:
+        bool: True if the trace callback was installed
+    """
+    tracing = bool(enabled) and logger.isEnabledFor(logging.DEBUG)
+    dbConn.set_trace_callback(logger.debug if tracing else None)
+    logger.debug("sql trace enabled=%s", tracing)
+    return tracing
+
+
+def _txDepth(dbConn):
+    """Internal use only. Number of open transaction() blocks on a connection.
+    Plain sqlite3 connections have no txDepth, theirs is kept in _plainTxDepth.
+    """
+    if isinstance(dbConn, GTConnection):
+        return dbConn.txDepth
+    return _plainTxDepth.get(id(dbConn), 0)
+
+
+def _setTxDepth(dbConn, depth):
+    """Internal use only. Set the number of open transaction() blocks. (see _txDepth)"""
+    if isinstance(dbConn, GTConnection):
+        dbConn.txDepth = depth
+    elif depth:
+        _plainTxDepth[id(dbConn)] = depth
+    else:
+        _plainTxDepth.pop(id(dbConn), None)
+
+
+@contextmanager
+def transaction(dbConn):
+    """Group add/update/delete calls into one transaction.
+    _exeDML does not commit inside the block. The block commits once when it
+    exits, or rolls back if it raises or Transaction.rollback() was called.
+    Nested blocks use savepoints so only the inner block's changes are undone.
+
+        with gtdbV3.transaction(dbConn) as tx:
+            addMfg(dbConn, mfg1)
+            if addMfg(dbConn, mfg2)[0] != 0:
+                tx.rollback()
+
+    Args:
+        dbConn (GTConnection): Database connection from create_connection or a ConnectionPool.
+            Pools hold the writer for the whole block. Plain sqlite3 connections work too
+
+    Yields:
+        Transaction object
+    """
+    if not isinstance(dbConn, sqlite3.Connection):  # ConnectionPool
+        try:
+            with checkout(dbConn, write=True) as conn:
+                with transaction(conn) as tx:
+                    yield tx
+        finally:
+            # Readers may have cached lookups from before the commit
+            clearLookupCache(dbConn)
+        return
+
+    depth = _txDepth(dbConn)
+    if depth:  # Nested. Use a savepoint
+        tx = Transaction(savepoint=f"gt_sp{depth}")
+        dbConn.execute(f"SAVEPOINT {tx.savepoint}")
+    else:
+        tx = Transaction()
+        if dbConn.in_transaction:  # Commit work done outside transaction()
+            dbConn.commit()
+        dbConn.execute("BEGIN")
+    logger.debug("Transaction started. %s", tx)
+    _setTxDepth(dbConn, depth + 1)
+    try:
+        yield tx
+    except BaseException:
+        tx.rollbackOnly = True
+        raise
+    finally:
+        _setTxDepth(dbConn, depth)
+        if tx.rollbackOnly:
+            logger.info("Rolling back transaction. %s", tx)
+            if tx.savepoint:
+                dbConn.execute(f"ROLLBACK TO {tx.savepoint}")
+                dbConn.execute(f"RELEASE {tx.savepoint}")
+            else:
+                dbConn.rollback()
+                # Nothing was committed, other connections cached nothing new
+                getattr(dbConn, 'changedLookups', set()).clear()
+            # Cached lookups may hold rows that no longer exist
+            clearLookupCache(dbConn)
+        elif tx.savepoint:
+            dbConn.execute(f"RELEASE {tx.savepoint}")
+        else:
+            dbConn.commit()
+            # Readers could have cached the old rows until now
+            changed = getattr(dbConn, 'changedLookups', set())
+            for table in changed:
+                clearLookupCache(getattr(dbConn, 'pool', None) or dbConn, table)
+            changed.clear()
+        logger.debug("Transaction ended. %s", tx)
+
+
 def updateCarSetting(dbConn,carSetting):
     valResult = validateCarSetting(dbConn,carSetting)
     if not valResult[0]: # is not valid
@@ -1456,14 +2352,15 @@ def updateCarSetting(dbConn,carSetting):
         return (1,valResult[1])
 
     updateSQL = "UPDATE car_setting"
-    setSQL = "SET car_id=:car_id, cat_id=:cat_id, name=:name, max_power=:max_power, max_torque=:max_torque, power_ratio=:power_ratio, traction_control=:traction_control, brake_balance=:brake_balance, top_speed=:top_speed, gear_1=:gear_1, gear_2=:gear_2, gear_3=:gear_3, gear_4=:gear_4, gear_5=:gear_5, gear_6=:gear_6, gear_7=:gear_7, final_gear=:final_gear, weight=:weight, weight_reduction=:weight_reduction, tire_code=:tire_code"
+    setSQL = "SET car_id=:car_id, cat_id=:cat_id, name=:name, max_power=:max_power, max_torque=:max_torque, power_ratio=:power_ratio, traction_control=:traction_control, brake_balance=:brake_balance, top_speed=:top_speed, gear_1=:gear_1, gear_2=:gear_2, gear_3=:gear_3, gear_4=:gear_4, gear_5=:gear_5, gear_6=:gear_6, gear_7=:gear_7, final_gear=:final_gear, weight=:weight, weight_reduction=:weight_reduction, tire_code=:tire_code, gear_1_ratio=:gear_1_ratio, gear_2_ratio=:gear_2_ratio, gear_3_ratio=:gear_3_ratio, gear_4_ratio=:gear_4_ratio, gear_5_ratio=:gear_5_ratio, gear_6_ratio=:gear_6_ratio, gear_7_ratio=:gear_7_ratio, final_gear_ratio=:final_gear_ratio"
 
     whereSQL = "WHERE id = :id"
 
     theVals = {'id': carSetting.id,'car_id': carSetting.car_id,'cat_id': carSetting.cat_id,'name': carSetting.name,'max_power': carSetting.max_power,'max_torque': carSetting.max_torque,'power_ratio': carSetting.power_ratio,'traction_control': carSetting.traction_control,'brake_balance': carSetting.brake_balance,'top_speed': carSetting.top_speed,'gear_1': carSetting.gear_1,'gear_2': carSetting.gear_2,'gear_3': carSetting.gear_3,'gear_4': carSetting.gear_4,'gear_5': carSetting.gear_5,'gear_6': carSetting.gear_6,'gear_7': carSetting.gear_7,'final_gear': carSetting.final_gear,'weight': carSetting.weight,'weight_reduction': carSetting.weight_reduction,'tire_code': carSetting.tire_code}
+    theVals.update(zip(gearRatioColumns, carSetting.gearRatios))
 
     sql = f"{updateSQL} {setSQL} {whereSQL}"
-    logger.info(f"Updating carSetting {carSetting.id}")
+    logger.info("Updating carSetting %s", carSetting.id)
     return _exeDML(dbConn, sql, theVals)
 
 
@@ -1481,13 +2378,13 @@ def updateMfg(dbConn, mfgObj):
                 ResultCode == 0: Success execution
                 Resultcode != 0: - See ResultText for details
     """
-    logger.debug(f"manufacture record update {mfgObj}")
+    logger.debug("manufacture record update %s", mfgObj)
     # Sanity check - does the mfgRecord exist in db?
     logger.debug("sanity check. confirm mfg Record exists.")
     testMfg = getMfg(dbConn, value=mfgObj.id)
     if testMfg.id == 0:  # Mfg is not in database
         result = [1, f"manufacture id {mfgObj.id} not in database."]
-        logger.debug(f"returning {result}")
+        logger.debug("returning %s", result)
         return result
 
     logger.debug("sanity check passed. execute SQL")
@@ -1499,9 +2396,9 @@ def updateMfg(dbConn, mfgObj):
     if result[0] == 0:
         result[1] = f"Manufacture id: {mfgObj.id} Updated"
     else:
-        logger.debug(f"problem updating manufacture id: {mfgObj.id}")
+        logger.debug("problem updating manufacture id: %s", mfgObj.id)
 
-    logger.info(f"returning {result}")
+    logger.info("returning %s", result)
     return result
 
 
@@ -1517,7 +2414,7 @@ def updateTrack(dbConn, trackObj):
               ResultCode 0 = Success
               ResultCode != 0 = see ResultText for details
     """
-    logger.debug(f"track record update {trackObj}")
+    logger.debug("track record update %s", trackObj)
     # Sanity check - See if tracking id exists
     testObj = getTrack(dbConn, value=trackObj.id)
     if testObj.id == 0:  # Not found in db
@@ -1542,7 +2439,7 @@ def updateTrackLayout(dbConn, uLayout):
               ResultCode 0 = Success
               ResultCode != 0 = see ResultText for details
     """
-    logger.info(f"Updating Track Layout {uLayout}")
+    logger.info("Updating Track Layout %s", uLayout)
 
     tResult = validateTrackLayout(dbConn, uLayout)
     if tResult[0]:  # Tests passed
@@ -1557,16 +2454,18 @@ def updateTrackLayout(dbConn, uLayout):
         logger.warning(tResult[1])
         result = (1, tResult[1])
 
-    logger.debug(f"returning: {result}")
+    logger.debug("returning: %s", result)
     return result
 
 
-def validateCar(dbConn, car):
+def validateCar(dbConn, car, keys=None):
     """Validates the car object
 
     Args:
-        dbConn ([type]): [description]
-        car ([type]): [description]
+        dbConn (sqlite3.connect): Database connection
+        car (Car object): Car that is being validated
+        keys (dict, optional): Preloaded keys from loadValidationKeys.
+            Defaults to None, which checks the db.
 
     Returns:
         list: (Bool,msg)
@@ -1580,7 +2479,7 @@ def validateCar(dbConn, car):
         pass
     else:  # car.model must have a value
         result = (False, f"Model must have a value")
-        logger.info(f"{result}")
+        logger.info("%s", result)
         return result
     logger.info("Passed: Model name is valid")
 
@@ -1589,13 +2488,12 @@ def validateCar(dbConn, car):
     if car.manufacture.id == 0:
         result = (
             False, f"Manufacture id {car.manufacture.id} must not be zero")
-        logger.info(f"{result}")
+        logger.info("%s", result)
         return result
-    xObj = getMfg(dbConn, value=car.manufacture.id)
-    if xObj.id == 0:
+    if not _exists(dbConn, 'manufacture', (car.manufacture.id,), keys):
         result = (
             False, f"Manufacture id {car.manufacture.id} not found")
-        logger.info(f"{result}")
+        logger.info("%s", result)
         return result
     logger.info("Passed: manufacture id valid")
 
@@ -1603,12 +2501,11 @@ def validateCar(dbConn, car):
     logger.info("Checking for valid drive train id")
     if car.driveTrain.id == 0:
         result = (False, f"Drivetrain id must not be zero")
-        logger.info(f"{result}")
+        logger.info("%s", result)
         return result
-    xObj = getDriveTrain(dbConn, car.driveTrain.id)
-    if xObj.id == 0:
+    if not _exists(dbConn, 'drivetrain', (car.driveTrain.id,), keys):
         result = (False, f"Drivetrain id {car.driveTrain.id} not found")
-        logger.info(f"{result}")
+        logger.info("%s", result)
         return result
     logger.info("Passed: drive train id valid")
 
@@ -1616,12 +2513,11 @@ def validateCar(dbConn, car):
     logger.info("Checking for valid Class category id")
     if car.catclass.id == 0:
         result = (False, f"Class category must not be zero")
-        logger.info(f"{result}")
+        logger.info("%s", result)
         return result
-    xObj = getCarCat(dbConn, car.catclass.id)
-    if xObj.id == 0:
+    if not _exists(dbConn, 'category', (car.catclass.id,), keys):
         result = (False, f"ClassCat id {car.catclass.id} not found")
-        logger.info(f"{result}")
+        logger.info("%s", result)
         return result
 
     # Year value can be null/none OR int
@@ -1630,18 +2526,20 @@ def validateCar(dbConn, car):
         if type(car.year) != int:
             result = (
                 False, f"Invalid year value. Year={car.year}. Must be null or an integer")
-            logger.info(f"{result}")
+            logger.info("%s", result)
             return result
 
     return (True, "Car validation passed")
 
 
-def validateCarSetting(dbConn, custCarSettings):
+def validateCarSetting(dbConn, custCarSettings, keys=None):
     """Validates the custom Car Settings objects.
 
     Args:
         dbConn (sqlite3.connect): Database connection
         custCarSettings (CustCarSettings object): CustCarSettings that are being validated
+        keys (dict, optional): Preloaded keys from loadValidationKeys.
+            Defaults to None, which checks the db.
 
     Returns:
         list: (True/False, msg)
@@ -1649,242 +2547,269 @@ def validateCarSetting(dbConn, custCarSettings):
         False = See msg for what did not pass
 
     """
-    logger.info(f"Validating custom car settings = {custCarSettings.__dict__}")
+    logger.info("Validating custom car settings = %r", custCarSettings)
 
     # The following tests access db.
     # Last tests as no need to access db if validation fails
     logger.debug("Check car_id exists")
-    car = getCar(dbConn, custCarSettings.car_id)
-    if car.id == 0:
+    if not _exists(dbConn, 'car', (custCarSettings.car_id,), keys):
         result = (
             False, f"Car id does not exist. car_id={custCarSettings.car_id}")
-        logger.info(f"{result}")
+        logger.info("%s", result)
         return result
 
     logger.debug("Check cat_id exists")
-    carCat = getCarCat(dbConn, custCarSettings.cat_id)
-    if carCat.id == 0:
+    if not _exists(dbConn, 'category', (custCarSettings.cat_id,), keys):
         result = (
             False, f"Category id does not exist. cat_id={custCarSettings.cat_id}")
-        logger.info(f"{result}")
+        logger.info("%s", result)
         return result
 
     logger.debug("Check tire_code exists")
     if custCarSettings.tire_code:
-        x = getTireList(dbConn)
-        found = False
-        for chk in x:
-            logger.debug(f"{chk[0]}")
-            if chk[0].upper() == custCarSettings.tire_code.upper():
-                found = True
-        if not found:
+        if not _exists(dbConn, 'tire', (custCarSettings.tire_code,), keys):
             result = (
                 False, f"Tire code does not exist. tire_code={custCarSettings.tire_code}")
-            logger.info(f"{result}")
+            logger.info("%s", result)
             return result
 
     # name must be unique for the car_id
     logger.debug(
-        f"Checking name is unique for the car. carid = {custCarSettings.car_id}")
-    selectSQL = "SELECT id, name, car_id"
-    fromSQL = "FROM car_setting"
-    whereSQL = "WHERE car_id=:carID and name=:csName"
-    theVals = {'carID': custCarSettings.car_id,
-               'csName': custCarSettings.name.strip()}
-    sql = f"{selectSQL} {fromSQL} {whereSQL}"
-    results = directSql(dbConn, sql, theVals)
-    logger.debug(f"results={results}")
-    if results:
-        logger.debug(
-            f"Name is not unique for car. customCarSettingID={results[0][0]}, for carid={results[0][2]}")
+        "Checking name is unique for the car. carid = %s", custCarSettings.car_id)
+    theVals = (custCarSettings.car_id, custCarSettings.name.strip())
+    if _exists(dbConn, 'carSettingName', theVals, keys):
         result = (
             False, f"Car setting name already exists for car id {custCarSettings.car_id}")
-        logger.info(f"{result}")
+        logger.info("%s", result)
         return result
 
     result = (True, "Tests passed")
-    logger.info(f"{result}")
+    logger.info("%s", result)
     return result
 
 
-def validateRace(dbConn, race):
+def validateMany(dbConn, validator, objs):
+    """Validate many objects with one validate function.
+    The keys for the validator's rules are loaded once, then every object is
+    checked against them. Objects are validated against the db as it is,
+    not against each other.
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+        validator (function): validateCar, validateCarSetting, validateRace or validateTrackLayout
+        objs (list): Objects to validate
+
+    Returns:
+        list: (True/False, msg) for each object, in the same order as objs
+    """
+    logger.info("Validating %s objects with %s", len(objs), validator.__name__)
+    keys = loadValidationKeys(dbConn, _validatorRules[validator.__name__])
+    return [validator(dbConn, x, keys=keys) for x in objs]
+
+
+def validateRace(dbConn, race, keys=None):
     """Validates the Race rules and returns results
 
     Args:
         dbConn (sqlite3.connect): Database connection
         race (object): Race object
+        keys (dict, optional): Preloaded keys from loadValidationKeys.
+            Defaults to None, which checks the db.
 
     Returns:
         list: (bool,msg)
         bool = False  - Race failed tests
         msg = string as to why it failed
     """
-    logger.info(f"Validating race={race}")
+    logger.info("Validating race=%s", race)
     # Race name must contain at least one charcter
     logger.debug(
-        f"Checking race name to be sure it contains at lease one character")
+        "Checking race name to be sure it contains at lease one character")
     if not race.name:
         msg = f"Race name must contain at least one character"
         result = (False, msg)
-        logger.info(f"returning = {result}")
+        logger.info("returning = %s", result)
         return result
     else:
         logger.info("Passed: Race name contains one or more characters")
 
     # Race name must be unique for the race_collection
     logger.debug(
-        f"Checking that race name [{race.name}] is unique for race collection id {race.raceCollection.id} (case insensitve)")
-    xList = getRaceList(dbConn, race.raceCollection.id)
-    for row in xList:
-        logger.debug(f"raceId={row[0]}. checking race name: {row[1]}")
-        if row[1].upper() == race.name.upper():  # layout name exist for track
-            msg = f"Race name [{race.name}] for race collection id {race.raceCollection.id} already exists. The race name must be unique."
-            result = (False, msg)
-            logger.info(f"returning = {result}")
-            return result
+        "Checking that race name [%s] is unique for race collection id %s (case insensitve)", race.name, race.raceCollection.id)
+    if _exists(dbConn, 'raceName', (race.raceCollection.id, race.name), keys):
+        msg = f"Race name [{race.name}] for race collection id {race.raceCollection.id} already exists. The race name must be unique."
+        result = (False, msg)
+        logger.info("returning = %s", result)
+        return result
     logger.info(
-        f"Passed: Race name is unique for race collection id {race.raceCollection.id}")
+        "Passed: Race name is unique for race collection id %s", race.raceCollection.id)
 
     # Weather ID must not be zero
-    logger.debug(f"Checking for valid weather id")
+    logger.debug("Checking for valid weather id")
     if race.weather.id == 0:  # Invalid Weather id
         msg = f"Race weather id must not be 0"
         result = (False, msg)
-        logger.info(f"returning = {result}")
+        logger.info("returning = %s", result)
         return result
     else:
         logger.info("Passed: Weather id is greater than zero")
 
     # Does weather id exist
-    if getWeather(dbConn, race.weather.id).id != race.weather.id:
+    if not _exists(dbConn, 'weather', (race.weather.id,), keys):
         msg = f"The Race weather id : {race.weather.id} not found in database"
         result = (False, msg)
-        logger.info(f"returning = {result}")
+        logger.info("returning = %s", result)
         return result
     else:
         logger.info("Passed: Weather id found in database")
 
     # TrackLayout id must not be zero
-    logger.debug(f"Checking for valid Track Layout")
+    logger.debug("Checking for valid Track Layout")
     if race.trackLayout.id == 0:
         msg = f"Race Track Layout id must not be 0"
         result = (False, msg)
-        logger.info(f"returning = {result}")
+        logger.info("returning = %s", result)
         return result
     else:
         logger.info("Passed: Race Track layout id is greater than zero")
 
     # TrackLayout must exist
-    if getLayout(dbConn, race.trackLayout.id).id == 0:
+    if not _exists(dbConn, 'track_layout', (race.trackLayout.id,), keys):
         msg = f"The Race track layout not found in database"
         result = (False, msg)
-        logger.info(f"returning = {result}")
+        logger.info("returning = %s", result)
         return result
     else:
         logger.info("Passed: Race Track layout id found in database")
 
     # Race type required.
-    logger.debug(f"Checking for valid racetype id")
+    logger.debug("Checking for valid racetype id")
     if race.raceType.id == 0:
         msg = f"Race type for race must not be 0"
         result = (False, msg)
-        logger.info(f"returning = {result}")
+        logger.info("returning = %s", result)
         return result
     else:
         logger.info("Passed: Race type id is not 0")
     # Race type must exist
-    x = getRaceTypeList(dbConn)
-    logger.debug(f"RaceType List = {x}")
-    logger.debug(f"race.raceType.id={race.raceType.id}")
-    passed = False
-    for r in x:
-        if r[0] == race.raceType.id:  # Found the raceType id
-            passed = True
-            break
-    if passed:
+    logger.debug("race.raceType.id=%s", race.raceType.id)
+    if _exists(dbConn, 'race_type', (race.raceType.id,), keys):
         logger.info("Passed. Race type found")
     else:
         msg = f"Race type for race not found in database"
         result = (False, msg)
-        logger.info(f"returning = {result}")
+        logger.info("returning = %s", result)
         return result
 
     # Race Collection testing
-    logger.debug(f"Checking for valid race collection")
-    logger.debug(f"race.raceCollection.id={race.raceCollection.id}")
+    logger.debug("Checking for valid race collection")
+    logger.debug("race.raceCollection.id=%s", race.raceCollection.id)
     # Race Collection id must not be zero
     if race.raceCollection.id == 0:
         msg = f"The race collection id for the race must not be zero"
         result = (False, msg)
-        logger.info(f"returning = {result}")
+        logger.info("returning = %s", result)
         return result
     else:
         logger.info("Passed: Race collection id is not 0")
 
     # Race collection id must exist
-    if getRaceCollection(dbConn, race.raceCollection.id).id == 0:
+    if not _exists(dbConn, 'race_collection', (race.raceCollection.id,), keys):
         msg = f"The Race collection not found in database"
         result = (False, msg)
-        logger.info(f"returning = {result}")
+        logger.info("returning = %s", result)
         return result
     else:
         logger.info("Passed: Race collection found")
 
     msg = "Race passed tests"
     result = (True, msg)
-    logger.info(f"returning = {result}")
+    logger.info("returning = %s", result)
     return result
 
 
-def validateTrackLayout(dbConn, trackLayout):
+def validateTrackLayout(dbConn, trackLayout, keys=None):
     """Validates TrackLayout rules and returns results
 
     Args:
         dbConn (sqlite3.connect): Database connection
         trackLayout (TrackLayout object): Track Layout that is being validated
+        keys (dict, optional): Preloaded keys from loadValidationKeys.
+            Defaults to None, which checks the db.
 
     Returns:
         list: (True/False, msg)
         True = Tests passed
         False = See msg for what did not pass
     """
-    logger.debug(f"trackLayout={trackLayout}")
+    logger.debug("trackLayout=%s", trackLayout)
     # Layout name must contain at least one charcter
     logger.info(
-        f"Checking layout name contains at lease one character")
+        "Checking layout name contains at lease one character")
     if trackLayout.name == None or trackLayout.name == "":
         msg = f"Track Layout name must contain at least one character"
         result = (False, msg)
-        logger.info(f"returning = {result}")
+        logger.info("returning = %s", result)
         return result
 
     # Layout name must be unique for the Track
     logger.info(
-        f"Checking if layout [{trackLayout.name}] already exists for track (case insensitve)")
-    layoutList = getLayoutList(dbConn, trackLayout.track.id)
-    for row in layoutList:
-        logger.debug(f"tlayoutId={row[0]}. checking layout name: {row[1]}")
-        if row[1].upper() == trackLayout.name.upper():  # layout name exist for track
-            msg = f"Layout name [{trackLayout.name}] for Trackid [{trackLayout.track.id}] already exists"
-            result = (False, msg)
-            logger.info(f"returning = {result}")
-            return result
+        "Checking if layout [%s] already exists for track (case insensitve)", trackLayout.name)
+    if _exists(dbConn, 'layoutName', (trackLayout.track.id, trackLayout.name), keys):
+        msg = f"Layout name [{trackLayout.name}] for Trackid [{trackLayout.track.id}] already exists"
+        result = (False, msg)
+        logger.info("returning = %s", result)
+        return result
 
     # Miles is not a string. (Null is allowed in this test)
-    logger.info(f"Checking miles [{trackLayout.miles}] is not a string")
+    logger.info("Checking miles [%s] is not a string", trackLayout.miles)
     if isinstance(trackLayout.miles, str):  # miles is a string
         result = (False, f"Miles must not contain letters")
-        logger.info(f"returning = {result}")
+        logger.info("returning = %s", result)
         return result
     # Miles is not null. not tested. DB should provide integrity error: NOT NULL constraint failed
     # Circuit ID existance not tested. DB should provide integrity error: FOREIGN KEY constraint failed
     # Track ID existance not tested. DB should provide integrity error: FOREIGN KEY constraint failed
     # All tests passed
     result = (True, "Track Layout Tests Passed")
-    logger.info(f"returning = {result}")
+    logger.info("returning = %s", result)
     return result
 
 
+def _validationKey(rule, theVals):
+    """Internal use only. Normalise key values for a validation rule.
+    Ids become int, caseless names are upper cased.
+
+    Args:
+        rule (str): Rule name (see _validationRules)
+        theVals (tuple): Key values
+
+    Returns:
+        tuple: The key
+    """
+    name = _validationRules[rule][2]
+    if name is None:
+        return tuple(_lookupKey(x) for x in theVals)
+    nameVal = theVals[-1]
+    if name == 'caseless' and nameVal is not None:
+        nameVal = str(nameVal).upper()
+    return tuple(_lookupKey(x) for x in theVals[:-1]) + (nameVal,)
+
+
+def warmLookupCache(dbConn):
+    """Load all the lookup tables into the connection lookup cache.
+    Lookup tables: category, circuit, country, drivetrain, league, race_type, weather
+    Tables that do not exist yet are skipped.
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+    """
+    logger.debug("Warming lookup cache")
+    clearLookupCache(dbConn)
+    for table in _lookupSQL:
+        _lookupCache(dbConn, table)
+
+
 def directSql(dbConn, sql, theVals):
     """Execute hand crafted sql.
 
@@ -1896,21 +2821,66 @@ def directSql(dbConn, sql, theVals):
     Returns:
         list: results for the SQL
     """
-    logger.debug(f"DIRECTsql = {sql}")
-    logger.debug(f"DIRECTVals = {theVals}")
+    if not isinstance(dbConn, sqlite3.Connection):  # ConnectionPool. Use a reader
+        with checkout(dbConn) as conn:
+            return directSql(conn, sql, theVals)
+
+    logger.debug("DIRECTsql = %s", sql)
+    logger.debug("DIRECTVals = %s", theVals)
 
-    # Enabling full sql traceback to logger.debug
-    dbConn.set_trace_callback(logger.debug)
     try:
-        cur = dbConn.cursor()
+        cur = _cursor(dbConn)
         cur.execute(sql, theVals)
         result = cur.fetchall()
     except:
         logger.critical(
-            f'Unexpected error executing sql: {sql}', exc_info=True)
+            'Unexpected error executing sql: %s', sql, exc_info=True)
         sys.exit(1)
-    # Disable full sql traceback to logger.debug
-    dbConn.set_trace_callback(None)
 
-    logger.info(f"Returning {len(result)} rows")
+    logger.info("Returning %s rows", len(result))
     return result
+
+
+def directSqlIter(dbConn, sql, theVals, size=None):
+    """Execute hand crafted sql and stream the results.
+    Rows are fetched size at a time so memory does not grow with the result.
+    The statement stays open until the iterator is exhausted or closed, and
+    for a ConnectionPool the connection stays checked out.
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+        sql (str): SQL to run
+        theVals (list,dict): Values to be sanitized
+        size (int, optional): Rows per fetch. Defaults to defaultPageSize
+
+    Yields:
+        tuple: row
+    """
+    if not isinstance(dbConn, sqlite3.Connection):  # ConnectionPool. Use a reader
+        with checkout(dbConn) as conn:
+            yield from directSqlIter(conn, sql, theVals, size)
+        return
+
+    logger.debug("DIRECTsql = %s", sql)
+    logger.debug("DIRECTVals = %s", theVals)
+    # Not the shared cursor. Other queries can run while this one is open
+    cur = dbConn.cursor()
+    cur.arraysize = size or defaultPageSize
+    try:
+        cur.execute(sql, theVals)
+    except:
+        logger.critical(
+            'Unexpected error executing sql: %s', sql, exc_info=True)
+        sys.exit(1)
+
+    count = 0
+    try:
+        while True:
+            rows = cur.fetchmany()
+            if not rows:
+                break
+            count += len(rows)
+            yield from rows
+    finally:
+        cur.close()
+        logger.info("Streamed %s rows", count)
@@ -0,0 +1,500 @@
+"""Bulk import of cars, car settings, tracks and races from CSV or JSON files.
+
+Rows are validated with the gtdbV3 validation rules (see
+gtdbV3._validationRules) used by validateCar, validateCarSetting,
+validateRace and validateTrackLayout. Their keys are loaded once per import
+with gtdbV3.loadValidationKeys instead of one query per row, and rows are
+written with executemany inside one gtdbV3.transaction().
+
+Foreign keys can be given as an id column or as a name column:
+    car:         mfg_id | mfg, cat_id | category, drivetrain_id | drivetrain
+    car_setting: car_id | car, cat_id | category, tire_code
+    track:       country_id | country (name, alpha2 or alpha3), circuit_id | circuit
+    race:        rc_id, weather_id | weather, type_id | race_type,
+                 tl_id | track + layout
+"""
+import csv
+import functools
+import json
+import logging
+import sqlite3
+from itertools import islice
+from pathlib import Path
+
+# Custom App modules
+from GranT import GTClasses as gtClass
+from GranT import gtdbV3
+
+logger = logging.getLogger(__name__)
+
+# Rows validated and written per executemany call
+_chunkSize = 5000
+# Characters read at a time from a .json file. (see _jsonArrayRows)
+_jsonReadSize = 65536
+
+# car_setting columns copied from the row and the type they are converted to
+_carSettingCols = {
+    'max_power': int, 'max_torque': float, 'power_ratio': int,
+    'traction_control': int, 'brake_balance': int, 'top_speed': int,
+    'gear_1': str, 'gear_2': str, 'gear_3': str, 'gear_4': str,
+    'gear_5': str, 'gear_6': str, 'gear_7': str, 'final_gear': str,
+    'weight': int, 'weight_reduction': int, 'accel': float, 'braking': float,
+    'max_speed': float, 'cornering': float, 'stability': float}
+
+_insertSQL = {
+    'car': "INSERT INTO car (model, mfg_id, cat_id, drivetrain_id, year) VALUES (:model, :mfg_id, :cat_id, :drivetrain_id, :year)",
+    'car_setting': f"INSERT INTO car_setting (car_id, cat_id, name, tire_code, {', '.join(_carSettingCols)}, {', '.join(gtdbV3.gearRatioColumns)}) VALUES (:car_id, :cat_id, :name, :tire_code, {', '.join(':' + x for x in (*_carSettingCols, *gtdbV3.gearRatioColumns))})",
+    'race': "INSERT INTO race (name, tl_id, rc_id, racetime, weather_id, limits, type_id, notes) VALUES (:name, :tl_id, :rc_id, :racetime, :weather_id, :limits, :type_id, :notes)",
+    'track': "INSERT INTO track (name, country_id) VALUES (:name, :country_id)",
+    'track_layout': "INSERT INTO track_layout (name, miles, track_id, circuit_id) VALUES (:name, :miles, :track_id, :circuit_id)"}
+
+
+# Validation rules loaded for each import. (see gtdbV3._validationRules)
+_importRules = {
+    'car': gtdbV3._validatorRules['validateCar'] + ('carModel',),
+    'car_setting': gtdbV3._validatorRules['validateCarSetting'],
+    'race': gtdbV3._validatorRules['validateRace'],
+    'track': gtdbV3._validatorRules['validateTrackLayout'] + ('circuit', 'country')}
+
+
+class KeyMap():
+    """Case insensitive {name: id} map for rows that name a foreign key
+    instead of giving its id.
+
+    Built from rows of (id, name, [other names...]).
+    """
+
+    def __init__(self, rows=()):
+        self.names = {}
+        for row in rows:
+            self.add(row[0], *row[1:])
+
+    def add(self, id, *names):
+        """Add the names that resolve to an id."""
+        for name in names:
+            if name is not None:
+                self.names[str(name).upper()] = id
+
+    def resolve(self, row, idCol, nameCol=None):
+        """Get the id a row refers to.
+
+        Args:
+            row (dict): The import row
+            idCol (str): Column holding the id
+            nameCol (str, optional): Column holding the name. Used when idCol is empty.
+
+        Returns:
+            int: The id. None if the row has no value. 0 if the name does not
+            exist or the id is not a number. Ids are not checked, use _exists
+        """
+        value = _clean(row.get(idCol))
+        if value is not None:
+            return gtdbV3._lookupKey(value) or 0
+        value = _clean(row.get(nameCol)) if nameCol else None
+        if value is not None:
+            return self.names.get(str(value).upper(), 0)
+        return None
+
+
+def _chunks(iterable, size=None):
+    """Internal use only. Yield lists of up to size items from iterable."""
+    size = size or _chunkSize
+    it = iter(iterable)
+    chunk = list(islice(it, size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(it, size))
+
+
+def _clean(value):
+    """Internal use only. Strip text values. Empty text becomes None."""
+    if isinstance(value, str):
+        value = value.strip()
+        if value == "":
+            return None
+    return value
+
+
+def _convert(key, value, toType):
+    """Internal use only. Convert an import value to int, float or str.
+
+    Raises:
+        ValueError: value can not be converted. Message names the key.
+    """
+    value = _clean(value)
+    if value is None or toType is str:
+        return value
+    try:
+        if toType is int:
+            number = float(value)
+            if not number.is_integer():
+                raise ValueError
+            return int(number)
+        return float(value)
+    except (TypeError, ValueError):
+        typeName = 'an integer' if toType is int else 'a float'
+        raise ValueError(f"{key} must be {typeName} or None")
+
+
+def _exists(dbConn, keys, rule, *theVals):
+    """Internal use only. Check a validation rule against the preloaded keys."""
+    return gtdbV3._exists(dbConn, rule, theVals, keys)
+
+
+def _addKey(keys, rule, *theVals):
+    """Internal use only. Add an imported row's key, so later rows in the
+    import are checked against it too."""
+    keys[rule].add(gtdbV3._validationKey(rule, theVals))
+
+
+def _importRows(dbConn, rows, checkRow, sql, strict):
+    """Internal use only. Validate and insert rows in chunks in one transaction.
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+        rows : iterable of dicts
+        checkRow (function): checkRow(row) returns (True, insertValues) or (False, msg)
+        sql (str): INSERT sql using the named values from checkRow
+        strict (bool): True = nothing is saved if any row fails validation
+
+    Returns:
+        list: ResultCode, ResultText, rejects
+    """
+    rejects = []
+    count = 0
+    with gtdbV3.transaction(dbConn) as tx:
+        cur = dbConn.cursor()
+        for chunk in _chunks(enumerate(rows, start=1)):
+            good = []
+            for rowNum, row in chunk:
+                passed, value = checkRow(row)
+                if passed:
+                    good.append(value)
+                else:
+                    logger.debug("row %s rejected: %s", rowNum, value)
+                    rejects.append((rowNum, value))
+            if strict and rejects:
+                tx.rollback()
+                msg = f"Nothing imported. {len(rejects)} row(s) failed validation"
+                logger.warning(msg)
+                return (1, msg, rejects)
+            try:
+                cur.executemany(sql, good)
+            except sqlite3.IntegrityError as e:
+                tx.rollback()
+                msg = f"Nothing imported. sqlite integrity error: {e.args[0]}"
+                logger.warning(msg)
+                return (2, msg, rejects)
+            count += len(good)
+            logger.debug("%s rows written", count)
+
+    msg = f"Imported {count} row(s). Rejected {len(rejects)} row(s)"
+    logger.info(msg)
+    return (1 if rejects else 0, msg, rejects)
+
+
+def _keyMap(dbConn, sql):
+    """Internal use only. KeyMap from sql returning (id, name, ...) rows."""
+    return KeyMap(dbConn.execute(sql).fetchall())
+
+
+def _usesWriter(func):
+    """Internal use only. Run an import on the writer when passed a ConnectionPool."""
+    @functools.wraps(func)
+    def wrapper(dbConn, *args, **kwargs):
+        with gtdbV3.checkout(dbConn, write=True) as conn:
+            return func(conn, *args, **kwargs)
+    return wrapper
+
+
+@_usesWriter
+def importCars(dbConn, rows, strict=False):
+    """Import car rows. Columns: model, mfg_id|mfg, cat_id|category,
+    drivetrain_id|drivetrain, year
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+        rows : iterable of dicts. (see readRows)
+        strict (bool, optional): True = nothing is saved if any row fails. Defaults to False.
+
+    Returns:
+        list: ResultCode, ResultText, rejects
+              ResultCode = 0 all rows imported
+              ResultCode = 1 rows failed validation. rejects is a list of (rowNumber, msg)
+              ResultCode = 2 database error. Nothing imported
+    """
+    logger.info("Importing cars")
+    keys = gtdbV3.loadValidationKeys(dbConn, _importRules['car'])
+    mfgs = _keyMap(dbConn, "SELECT id, name FROM manufacture")
+    cats = _keyMap(dbConn, "SELECT id, name FROM category")
+    driveTrains = _keyMap(dbConn, "SELECT id, code FROM drivetrain")
+
+    def checkRow(row):
+        model = _clean(row.get('model'))
+        if not model:
+            return (False, "Model must have a value")
+        vals = {'model': str(model)}
+        if _exists(dbConn, keys, 'carModel', vals['model']):
+            return (False, f"Model {model} already exists")
+        for col, nameCol, names, rule, label in (('mfg_id', 'mfg', mfgs, 'manufacture', 'Manufacture'),
+                                                 ('drivetrain_id', 'drivetrain', driveTrains, 'drivetrain', 'Drivetrain'),
+                                                 ('cat_id', 'category', cats, 'category', 'ClassCat')):
+            vals[col] = names.resolve(row, col, nameCol)
+            if not vals[col] or not _exists(dbConn, keys, rule, vals[col]):
+                return (False, f"{label} {_clean(row.get(col)) or _clean(row.get(nameCol))} not found")
+        try:
+            vals['year'] = _convert('year', row.get('year'), int)
+        except ValueError:
+            return (False, f"Invalid year value. Year={row.get('year')}. Must be null or an integer")
+        _addKey(keys, 'carModel', vals['model'])
+        return (True, vals)
+
+    return _importRows(dbConn, rows, checkRow, _insertSQL['car'], strict)
+
+
+@_usesWriter
+def importCarSettings(dbConn, rows, strict=False):
+    """Import car setting rows. Columns: car_id|car, cat_id|category, name,
+    tire_code and the car_setting values (max_power, gear_1, ...)
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+        rows : iterable of dicts. (see readRows)
+        strict (bool, optional): True = nothing is saved if any row fails. Defaults to False.
+
+    Returns:
+        list: ResultCode, ResultText, rejects (see importCars)
+    """
+    logger.info("Importing car settings")
+    keys = gtdbV3.loadValidationKeys(dbConn, _importRules['car_setting'])
+    cars = _keyMap(dbConn, "SELECT id, model FROM car")
+    cats = _keyMap(dbConn, "SELECT id, name FROM category")
+    # Tire codes are stored the way the tire table has them
+    tires = _keyMap(dbConn, "SELECT code, code FROM tire").names
+
+    def checkRow(row):
+        vals = {'car_id': cars.resolve(row, 'car_id', 'car')}
+        if not vals['car_id'] or not _exists(dbConn, keys, 'car', vals['car_id']):
+            return (False, f"Car id does not exist. car_id={_clean(row.get('car_id')) or _clean(row.get('car'))}")
+        vals['cat_id'] = cats.resolve(row, 'cat_id', 'category')
+        if not vals['cat_id'] or not _exists(dbConn, keys, 'category', vals['cat_id']):
+            return (False, f"Category id does not exist. cat_id={_clean(row.get('cat_id')) or _clean(row.get('category'))}")
+        tireCode = _clean(row.get('tire_code'))
+        if tireCode and not _exists(dbConn, keys, 'tire', str(tireCode)):
+            return (False, f"Tire code does not exist. tire_code={tireCode}")
+        vals['tire_code'] = tires[str(tireCode).upper()] if tireCode else None
+        vals['name'] = _clean(row.get('name'))
+        if not vals['name']:
+            return (False, "name must have a value")
+        vals['name'] = str(vals['name'])
+        if _exists(dbConn, keys, 'carSettingName', vals['car_id'], vals['name']):
+            return (False, f"Car setting name already exists for car id {vals['car_id']}")
+        try:
+            for col, toType in _carSettingCols.items():
+                vals[col] = _convert(col, row.get(col), toType)
+        except ValueError as err:
+            return (False, str(err))
+        vals.update(zip(gtdbV3.gearRatioColumns, map(gtClass._gearRatio, (vals[x] for x in gtClass.CustCarSettings.gearColumns))))
+        _addKey(keys, 'carSettingName', vals['car_id'], vals['name'])
+        return (True, vals)
+
+    return _importRows(dbConn, rows, checkRow, _insertSQL['car_setting'], strict)
+
+
+@_usesWriter
+def importRaces(dbConn, rows, strict=False):
+    """Import race rows. Columns: name, rc_id, weather_id|weather,
+    type_id|race_type, tl_id|track+layout, racetime, limits, notes
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+        rows : iterable of dicts. (see readRows)
+        strict (bool, optional): True = nothing is saved if any row fails. Defaults to False.
+
+    Returns:
+        list: ResultCode, ResultText, rejects (see importCars)
+    """
+    logger.info("Importing races")
+    keys = gtdbV3.loadValidationKeys(dbConn, _importRules['race'])
+    weather = _keyMap(dbConn, "SELECT id, name FROM weather")
+    raceTypes = _keyMap(dbConn, "SELECT id, name FROM race_type")
+    # Layouts by id or by "track|layout"
+    layouts = _keyMap(
+        dbConn, "SELECT tl.id, t.name || '|' || tl.name FROM track_layout AS tl JOIN track AS t ON tl.track_id = t.id")
+
+    def checkRow(row):
+        name = _clean(row.get('name'))
+        if not name:
+            return (False, "Race name must contain at least one character")
+        vals = {'name': str(name)}
+        vals['rc_id'] = gtdbV3._lookupKey(_clean(row.get('rc_id')))
+        if not vals['rc_id'] or not _exists(dbConn, keys, 'race_collection', vals['rc_id']):
+            return (False, "The Race collection not found in database")
+        if _exists(dbConn, keys, 'raceName', vals['rc_id'], vals['name']):
+            return (False, f"Race name [{name}] for race collection id {vals['rc_id']} already exists. The race name must be unique.")
+        vals['weather_id'] = weather.resolve(row, 'weather_id', 'weather')
+        if not vals['weather_id'] or not _exists(dbConn, keys, 'weather', vals['weather_id']):
+            return (False, f"The Race weather id : {_clean(row.get('weather_id')) or _clean(row.get('weather'))} not found in database")
+        if _clean(row.get('tl_id')) is None and _clean(row.get('track')) is not None:
+            row = dict(row, trackLayout=f"{_clean(row.get('track'))}|{_clean(row.get('layout'))}")
+        vals['tl_id'] = layouts.resolve(row, 'tl_id', 'trackLayout')
+        if not vals['tl_id'] or not _exists(dbConn, keys, 'track_layout', vals['tl_id']):
+            return (False, "The Race track layout not found in database")
+        vals['type_id'] = raceTypes.resolve(row, 'type_id', 'race_type')
+        if not vals['type_id'] or not _exists(dbConn, keys, 'race_type', vals['type_id']):
+            return (False, "Race type for race not found in database")
+        for col in ('racetime', 'limits', 'notes'):
+            vals[col] = _clean(row.get(col))
+        _addKey(keys, 'raceName', vals['rc_id'], vals['name'])
+        return (True, vals)
+
+    return _importRows(dbConn, rows, checkRow, _insertSQL['race'], strict)
+
+
+@_usesWriter
+def importTracks(dbConn, rows, strict=False):
+    """Import track layout rows. Tracks that do not exist are added.
+    Columns: track, country_id|country, layout, miles, circuit_id|circuit
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+        rows : iterable of dicts. (see readRows)
+        strict (bool, optional): True = nothing is saved if any row fails. Defaults to False.
+
+    Returns:
+        list: ResultCode, ResultText, rejects (see importCars)
+    """
+    logger.info("Importing tracks")
+    keys = gtdbV3.loadValidationKeys(dbConn, _importRules['track'])
+    tracks = _keyMap(dbConn, "SELECT id, name FROM track")
+    countries = _keyMap(dbConn, "SELECT ID, name, alpha2, alpha3 FROM country")
+    circuits = _keyMap(dbConn, "SELECT id, name FROM circuit")
+
+    def checkRow(row):
+        trackName = _clean(row.get('track'))
+        if not trackName:
+            return (False, "Track name must contain at least one character")
+        layoutName = _clean(row.get('layout'))
+        if not layoutName:
+            return (False, "Track Layout name must contain at least one character")
+        vals = {'name': str(layoutName)}
+        try:
+            vals['miles'] = _convert('miles', row.get('miles'), float)
+        except ValueError:
+            return (False, "Miles must not contain letters")
+        if vals['miles'] is None:
+            return (False, f"Invalid miles value {row.get('miles')}")
+        vals['circuit_id'] = circuits.resolve(row, 'circuit_id', 'circuit')
+        if not vals['circuit_id'] or not _exists(dbConn, keys, 'circuit', vals['circuit_id']):
+            return (False, "Circuit does not exist")
+        trackId = tracks.names.get(str(trackName).upper())
+        if trackId and _exists(dbConn, keys, 'layoutName', trackId, vals['name']):
+            return (False, f"Layout name [{layoutName}] for Trackid [{trackId}] already exists")
+        if not trackId:  # New track. Saved now so the layout has a track_id
+            countryId = countries.resolve(row, 'country_id', 'country')
+            if countryId == 0 or (countryId and not _exists(dbConn, keys, 'country', countryId)):
+                return (False, f"Country {_clean(row.get('country_id')) or _clean(row.get('country'))} not found")
+            cur = dbConn.execute(_insertSQL['track'], {'name': str(trackName), 'country_id': countryId})
+            trackId = cur.lastrowid
+            tracks.add(trackId, trackName)
+        vals['track_id'] = trackId
+        _addKey(keys, 'layoutName', trackId, vals['name'])
+        return (True, vals)
+
+    return _importRows(dbConn, rows, checkRow, _insertSQL['track_layout'], strict)
+
+
+def importFile(dbConn, fileName, kind=None, strict=False):
+    """Import a CSV, JSON or JSON lines file.
+
+    Args:
+        dbConn (sqlite3.connect): Database connection
+        fileName (str|Path): File to import. (.csv, .json or .jsonl)
+        kind (str, optional): car | car_setting | track | race.
+            Defaults to the file name without the suffix. i.e. car_setting.csv
+        strict (bool, optional): True = nothing is saved if any row fails. Defaults to False.
+
+    Returns:
+        list: ResultCode, ResultText, rejects (see importCars)
+    """
+    fileName = Path(fileName)
+    kind = kind or fileName.stem
+    importers = {'car': importCars, 'car_setting': importCarSettings,
+                 'race': importRaces, 'track': importTracks}
+    if kind not in importers:
+        msg = f"Unknown import type {kind}. Expecting one of {', '.join(importers)}"
+        logger.warning(msg)
+        return (3, msg, [])
+
+    logger.info("Importing %s rows from %s", kind, fileName)
+    return importers[kind](dbConn, readRows(fileName), strict=strict)
+
+
+def _jsonArrayRows(f):
+    """Internal use only. Objects of a JSON array file one at a time.
+    The file is read _jsonReadSize characters at a time, not all at once.
+
+    Args:
+        f (file): Open text file holding a list of objects
+
+    Yields:
+        dict: One row
+    """
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    started = False
+    atEnd = False
+    while True:
+        # Skip whitespace and the separators between the objects
+        while pos < len(buf) and (buf[pos].isspace() or (started and buf[pos] == ',')):
+            pos += 1
+        if pos < len(buf):
+            if not started:
+                if buf[pos] != '[':
+                    raise ValueError("JSON import file must hold a list of objects")
+                started = True
+                pos += 1
+                continue
+            if buf[pos] == ']':
+                return
+            try:
+                row, pos = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if atEnd:
+                    raise
+            else:  # Objects end with }, so a row cut off by the read is never decoded
+                yield row
+                continue
+        elif atEnd:
+            raise ValueError("JSON import file ended before the end of the list")
+        chunk = f.read(_jsonReadSize)
+        atEnd = not chunk
+        buf = buf[pos:] + chunk
+        pos = 0
+
+
+def readRows(fileName):
+    """Read the rows of an import file as dicts, one row at a time.
+
+    Args:
+        fileName (str|Path): .csv with a header row, .json holding a list
+            of objects, or .jsonl with one object per line. All three are read
+            a piece at a time, large files are not loaded whole
+
+    Yields:
+        dict: One row
+    """
+    fileName = Path(fileName)
+    suffix = fileName.suffix.lower()
+    with open(fileName, newline='', encoding='utf-8') as f:
+        if suffix == '.csv':
+            yield from csv.DictReader(f)
+        elif suffix == '.jsonl':
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        elif suffix == '.json':
+            yield from _jsonArrayRows(f)
+        else:
+            raise ValueError(f"Unable to import {fileName}. Expecting .csv, .json or .jsonl")
@@ -0,0 +1,157 @@
+"""Connection pool for using the database from several threads.
+
+A ConnectionPool holds a number of read connections and a single writer.
+Pass the pool to the gtdbV3 functions in place of a connection:
+    pool = ConnectionPool(gtcfg.dbcfg['dbFile'], readers=4)
+    races = gtdbV3.getRacesForCollection(pool, rcId)    # uses a reader
+    gtdbV3.addMfg(pool, mfg)                            # uses the writer
+    with gtdbV3.transaction(pool):                      # holds the writer
+        ...
+
+Reads made by a thread that holds the writer use the writer, so they see
+the thread's uncommitted changes. Use a WAL connection profile so readers
+are not blocked by the writer.
+"""
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+# Custom App modules
+from GranT import gtdbV3
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool():
+    """Read connections plus one writer connection for a database file.
+
+    Args:
+        dbLoc (str): dbFile to connect to. ":memory:" can not be shared and is not allowed.
+        readers (int, optional): Number of read connections. Defaults to 4.
+        profile (str, optional): Connection profile for the readers. Defaults to 'read-heavy'.
+        writerProfile (str, optional): Connection profile for the writer. Defaults to 'write-heavy'.
+        timeout (float, optional): Seconds to wait for a connection before
+            TimeoutError is raised. Defaults to None (wait forever).
+        **connArgs: Other create_connection arguments. (traceSql, cachedStatements)
+    """
+
+    def __init__(self, dbLoc, readers=4, profile='read-heavy', writerProfile='write-heavy', timeout=None, **connArgs):
+        if not dbLoc or str(dbLoc) == ":memory:":
+            raise ValueError("ConnectionPool needs a database file")
+        if readers < 1:
+            raise ValueError("ConnectionPool needs at least one reader")
+        logger.info("Creating connection pool for %s with %s readers", dbLoc, readers)
+        self.dbLoc = dbLoc
+        self.timeout = timeout
+        self._local = threading.local()
+        self._statsLock = threading.Lock()
+        self._stats = {'reader': self._newStats(), 'writer': self._newStats()}
+        # Writer first, so WAL is set before the readers connect
+        self._writer = self._connect(writerProfile, connArgs)
+        self._writerLock = threading.Lock()
+        self._readerList = [self._connect(profile, connArgs) for x in range(readers)]
+        self._readers = queue.Queue()
+        for conn in self._readerList:
+            self._readers.put(conn)
+
+    def __repr__(self):
+        return f"ConnectionPool(dbLoc={self.dbLoc}, readers={len(self._readerList)})"
+
+    def _connect(self, profile, connArgs):
+        conn = gtdbV3.create_connection(
+            self.dbLoc, profile=profile, checkSameThread=False, **connArgs)
+        conn.pool = self
+        return conn
+
+    @staticmethod
+    def _newStats():
+        return {'checkouts': 0, 'waitTotal': 0.0, 'waitMax': 0.0,
+                'inUse': 0, 'peakInUse': 0}
+
+    def _recordCheckout(self, kind, waited):
+        with self._statsLock:
+            stats = self._stats[kind]
+            stats['checkouts'] += 1
+            stats['waitTotal'] += waited
+            stats['waitMax'] = max(stats['waitMax'], waited)
+            stats['inUse'] += 1
+            stats['peakInUse'] = max(stats['peakInUse'], stats['inUse'])
+
+    def _recordCheckin(self, kind):
+        with self._statsLock:
+            self._stats[kind]['inUse'] -= 1
+
+    @contextmanager
+    def checkout(self, write=False):
+        """Borrow a connection until the block exits.
+        Nested checkouts on the same thread reuse the connection already held,
+        unless a write is needed and the thread only holds a reader.
+
+        Args:
+            write (bool, optional): True for the writer. Defaults to False.
+
+        Yields:
+            GTConnection: Database connection
+
+        Raises:
+            TimeoutError: No connection was free within timeout seconds
+        """
+        held = self._local.__dict__.setdefault('held', [])
+        if held and (not write or held[-1] is self._writer):
+            yield held[-1]
+            return
+
+        kind = 'writer' if write else 'reader'
+        start = time.perf_counter()
+        if write:
+            if not self._writerLock.acquire(timeout=-1 if self.timeout is None else self.timeout):
+                raise TimeoutError(f"No writer connection free after {self.timeout}s")
+            conn = self._writer
+        else:
+            try:
+                conn = self._readers.get(timeout=self.timeout)
+            except queue.Empty:
+                raise TimeoutError(f"No reader connection free after {self.timeout}s")
+        self._recordCheckout(kind, time.perf_counter() - start)
+        held.append(conn)
+        try:
+            yield conn
+        finally:
+            held.pop()
+            self._recordCheckin(kind)
+            if write:
+                self._writerLock.release()
+            else:
+                self._readers.put(conn)
+
+    def close(self):
+        """Close all the connections. Connections checked out are closed as well."""
+        logger.info("Closing connection pool for %s", self.dbLoc)
+        for conn in self.connections():
+            conn.close()
+
+    def connections(self):
+        """All the connections in the pool, checked out or not.
+
+        Returns:
+            list: GTConnection, writer first
+        """
+        return [self._writer] + self._readerList
+
+    def stats(self):
+        """Checkout metrics for sizing the pool.
+
+        Returns:
+            dict: {'reader': {...}, 'writer': {...}} each with
+                checkouts, waitTotal, waitMax, waitAvg (seconds),
+                inUse, peakInUse and size
+        """
+        with self._statsLock:
+            result = {kind: dict(stats) for kind, stats in self._stats.items()}
+        result['reader']['size'] = len(self._readerList)
+        result['writer']['size'] = 1
+        for stats in result.values():
+            stats['waitAvg'] = stats['waitTotal'] / stats['checkouts'] if stats['checkouts'] else 0.0
+        return result
@@ -0,0 +1,340 @@
+"""Versioned schema migrations.
+
+The schema version is kept in PRAGMA user_version, which sqlite stores in the
+database header, so checking it at startup is a single read. migrate() applies
+the steps in _migrations above the current version, in order, inside one
+transaction and then sets user_version. A failed step rolls back every step.
+
+    result = gtschema.migrate(dbConn, scriptPath=gtcfg.curcfg['gtScripts'])
+
+To change the schema add a step to the end of _migrations. Never change or
+reorder a step that has been released. Steps must be idempotent
+(CREATE ... IF NOT EXISTS etc.) since databases created before versioning are
+stamped with the version their tables match.
+
+New databases are bootstrapped from a seed snapshot, a database file with all
+the migrations applied, copied in with the sqlite backup API. Build it with
+    python -m GranT.gtschema [scriptPath] [snapshotFile]
+The snapshot records a fingerprint of the migrations and scripts it was built
+from. bootstrap() falls back to running the migrations when the fingerprint
+does not match.
+
+The car_setting gear ratio columns from version 4 are written by the code
+that writes the gear text (gtdbV3.addCarSetting etc.), there are no triggers,
+so any connection can write car_setting.
+"""
+import logging
+import os
+import sqlite3
+import sys
+from pathlib import Path
+
+# Custom App modules
+from GranT import GTClasses as gtClass
+from GranT import gtdbV3
+
+logger = logging.getLogger(__name__)
+
+# (gear text column, REAL ratio column decoded from it)
+_gearRatioColumns = [(x, f"{x}_ratio") for x in
+                     ('gear_1', 'gear_2', 'gear_3', 'gear_4', 'gear_5', 'gear_6', 'gear_7', 'final_gear')]
+
+
+def _addGearRatios(dbConn, scriptPath):
+    """Internal use only. Migration step. REAL gear ratio columns on
+    car_setting, filled once here from the gear text columns so gearing can
+    be compared without parsing text. Writes keep them up to date.
+    (see gtdbV3.gearRatioColumns)
+    """
+    columns = {x[1] for x in dbConn.execute("PRAGMA table_info(car_setting)")}
+    for textColumn, ratioColumn in _gearRatioColumns:
+        if ratioColumn not in columns:
+            dbConn.execute(f"ALTER TABLE car_setting ADD COLUMN {ratioColumn} REAL")
+
+    textColumns = ", ".join(x[0] for x in _gearRatioColumns)
+    setRatios = ", ".join(f"{ratio} = ?" for text, ratio in _gearRatioColumns)
+    rows = dbConn.execute(f"SELECT id, {textColumns} FROM car_setting").fetchall()
+    dbConn.executemany(
+        f"UPDATE car_setting SET {setRatios} WHERE id = ?",
+        ([gtClass._gearRatio(None if x is None else str(x)) for x in row[1:]] + [row[0]] for row in rows))
+
+
+def _dropGearRatioTriggers(dbConn, scriptPath):
+    """Internal use only. Migration step. Drop the car_setting gear ratio
+    triggers an earlier version 4 created. They called a Python function, so
+    writes from other connections failed.
+    """
+    for trigger in ('car_setting_gear_ratio_insert', 'car_setting_gear_ratio_update'):
+        dbConn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+
+# (version, description, step)
+# step is a list of script files in scriptPath or a function(dbConn, scriptPath)
+_migrations = [
+    (1, "Tables with lookup and sample data",
+     ['createTables.sql', 'LoadLookUpData.sql', 'LoadOtherData.sql']),
+    (2, "User tables for cars and car settings", ['createUserTables.sql']),
+    (3, "Foreign key indexes", ['addIndexes.sql']),
+    (4, "Numeric gear ratios for car settings", _addGearRatios),
+    (5, "Race result and lap time tables", ['createResultTables.sql']),
+    (6, "Drop the gear ratio triggers", _dropGearRatioTriggers),
+]
+
+# Default seed snapshot file name in scriptPath
+_snapshotName = 'seed.db'
+# Table in the snapshot holding the fingerprint. Dropped from bootstrapped databases
+_snapshotTable = 'gt_snapshot'
+
+
+def _fingerprint(scriptPath):
+    """Internal use only. Hash of the migration steps and their scripts.
+    Any change to a step or a script gives a new fingerprint. Function steps
+    are hashed by their source and the source of their module, which holds
+    the helpers they use.
+
+    Args:
+        scriptPath (str): path to script files
+
+    Returns:
+        str: hex digest
+    """
+    import hashlib  # Slow to import and only needed to bootstrap
+    import inspect
+
+    digest = hashlib.sha256()
+    for version, description, step in _migrations:
+        digest.update(f"{version}:{description}\n".encode())
+        if callable(step):
+            digest.update(inspect.getsource(step).encode())
+            digest.update(inspect.getsource(inspect.getmodule(step)).encode())
+            continue
+        for sFile in step:
+            digest.update((Path(scriptPath) / sFile).read_bytes())
+    return digest.hexdigest()
+
+
+def _legacyVersion(dbConn):
+    """Internal use only. Version matching the tables of a database created
+    before versioning by initDB and createUserTables.sql.
+
+    Returns:
+        int: 0 for an empty database
+    """
+    tables = {x[0] for x in dbConn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if 'car_setting' in tables:
+        return 2
+    if 'race' in tables:
+        return 1
+    return 0
+
+
+def _runScript(dbConn, scriptFileName):
+    """Internal use only. Run a script one statement at a time.
+    Unlike executescript this does not commit, so the script is part of the
+    open transaction.
+
+    Args:
+        dbConn (GTConnection): Database connection
+        scriptFileName (str): SQL script file to run
+    """
+    logger.debug("Running script %s", scriptFileName)
+    statement = ''
+    with open(scriptFileName, 'r') as scriptFile:
+        for line in scriptFile:
+            statement += line
+            if sqlite3.complete_statement(statement):
+                dbConn.execute(statement)
+                statement = ''
+    if statement.strip() and not statement.strip().startswith('--'):
+        raise sqlite3.OperationalError(f"Incomplete statement at end of {scriptFileName}")
+
+
+def _snapshotFingerprint(snapshotFile):
+    """Internal use only. Fingerprint recorded in a snapshot.
+
+    Returns:
+        str: hex digest or None if the snapshot is missing or unreadable
+    """
+    if not Path(snapshotFile).is_file():
+        return None
+    try:
+        snapConn = sqlite3.connect(f"{Path(snapshotFile).resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            return snapConn.execute(f"SELECT fingerprint FROM {_snapshotTable}").fetchone()[0]
+        finally:
+            snapConn.close()
+    except (sqlite3.Error, TypeError):
+        logger.warning("Snapshot %s is not readable", snapshotFile, exc_info=True)
+        return None
+
+
+def bootstrap(dbConn, scriptPath=None, snapshotFile=None):
+    """Create the schema and data of a new database. Copies the seed snapshot
+    when it was built from the current migrations, otherwise runs them.
+    Databases that already have tables are migrated, never overwritten.
+
+    Args:
+        dbConn (GTConnection): Database connection from create_connection or a ConnectionPool.
+        scriptPath (str): path to script files
+        snapshotFile (str, optional): Seed snapshot. Defaults to seed.db in scriptPath
+
+    Returns:
+        tuple: (code, msg)
+            code: 0 = Created or migrated, 1 = Failed
+            msg: Text
+    """
+    if not isinstance(dbConn, sqlite3.Connection):  # ConnectionPool. Use the writer
+        with gtdbV3.checkout(dbConn, write=True) as conn:
+            return bootstrap(conn, scriptPath, snapshotFile)
+
+    gtScripts = Path(scriptPath or '.')
+    snapshotFile = snapshotFile or gtScripts / _snapshotName
+    if schemaVersion(dbConn) or dbConn.execute("SELECT count(*) FROM sqlite_master").fetchone()[0]:
+        return migrate(dbConn, gtScripts)
+
+    fingerprint = _snapshotFingerprint(snapshotFile)
+    if fingerprint is None or fingerprint != _fingerprint(gtScripts):
+        logger.info("Snapshot %s missing or stale. Running migrations", snapshotFile)
+        return migrate(dbConn, gtScripts)
+
+    logger.info("Copying snapshot %s", snapshotFile)
+    try:
+        if dbConn.in_transaction:
+            dbConn.commit()
+        snapConn = sqlite3.connect(f"{Path(snapshotFile).resolve().as_uri()}?mode=ro", uri=True)
+        try:
+            snapConn.backup(dbConn)
+        finally:
+            snapConn.close()
+        dbConn.execute(f"DROP TABLE {_snapshotTable}")
+        dbConn.commit()
+    except sqlite3.Error as e:
+        msg = f"Copying snapshot {snapshotFile} failed: {e}"
+        logger.critical(msg, exc_info=True)
+        return (1, msg)
+    finally:
+        gtdbV3.clearLookupCache(getattr(dbConn, 'pool', None) or dbConn)
+
+    msg = f"Database created from snapshot at schema version {schemaVersion(dbConn)}"
+    logger.info(msg)
+    return (0, msg)
+
+
+def buildSnapshot(scriptPath=None, snapshotFile=None):
+    """Build the seed snapshot used by bootstrap. Replaces an existing snapshot.
+
+    Args:
+        scriptPath (str): path to script files
+        snapshotFile (str, optional): Seed snapshot. Defaults to seed.db in scriptPath
+
+    Returns:
+        tuple: (code, msg)
+            code: 0 = Built, 1 = Failed
+            msg: Text
+    """
+    gtScripts = Path(scriptPath or '.')
+    snapshotFile = Path(snapshotFile or gtScripts / _snapshotName)
+    buildFile = snapshotFile.with_name(snapshotFile.name + '.build')
+    buildFile.unlink(missing_ok=True)
+    logger.info("Building snapshot %s", snapshotFile)
+    dbConn = gtdbV3.create_connection(buildFile)
+    try:
+        result = migrate(dbConn, gtScripts)
+        if result[0] != 0:
+            return result
+        dbConn.execute(f"CREATE TABLE {_snapshotTable} (fingerprint TEXT NOT NULL)")
+        dbConn.execute(f"INSERT INTO {_snapshotTable} VALUES (?)", (_fingerprint(gtScripts),))
+        dbConn.commit()
+        dbConn.execute("VACUUM")
+    finally:
+        dbConn.close()
+    os.replace(buildFile, snapshotFile)
+    msg = f"Snapshot {snapshotFile} built at schema version {latestVersion()}"
+    logger.info(msg)
+    return (0, msg)
+
+
+def latestVersion():
+    """Schema version after all the migrations are applied.
+
+    Returns:
+        int: Version
+    """
+    return _migrations[-1][0]
+
+
+def migrate(dbConn, scriptPath=None, target=None):
+    """Bring the database schema up to date. Does nothing when the database
+    is already at the target version.
+
+    Args:
+        dbConn (GTConnection): Database connection from create_connection or a ConnectionPool.
+        scriptPath (str): path to script files
+        target (int, optional): Version to migrate to. Defaults to latestVersion()
+
+    Returns:
+        tuple: (code, msg)
+            code: 0 = Current or migrated, 1 = Migration failed, rolled back
+            msg: Text
+    """
+    if not isinstance(dbConn, sqlite3.Connection):  # ConnectionPool. Use the writer
+        with gtdbV3.checkout(dbConn, write=True) as conn:
+            return migrate(conn, scriptPath, target)
+
+    target = latestVersion() if target is None else target
+    version = schemaVersion(dbConn)
+    if version >= target:
+        logger.debug("Schema version %s is current", version)
+        return (0, f"Schema version {version} is current")
+
+    gtScripts = Path(scriptPath or '.')
+    try:
+        with gtdbV3.transaction(dbConn):
+            # Defer foreign key checks to the commit, the scripts load
+            # tables in any order.
+            dbConn.execute("PRAGMA defer_foreign_keys = ON")
+            if version == 0:
+                version = _legacyVersion(dbConn)
+                if version:
+                    logger.info("Unversioned database matches schema version %s", version)
+            for stepVersion, description, step in _migrations:
+                if stepVersion <= version or stepVersion > target:
+                    continue
+                logger.info("Migrating schema to version %s: %s", stepVersion, description)
+                if callable(step):
+                    step(dbConn, gtScripts)
+                else:
+                    for sFile in step:
+                        _runScript(dbConn, f'{gtScripts / sFile}')
+                version = stepVersion
+            dbConn.execute(f"PRAGMA user_version = {int(version)}")
+    except (sqlite3.Error, OSError) as e:
+        msg = f"Schema migration to version {target} failed, rolled back: {e}"
+        logger.critical(msg, exc_info=True)
+        return (1, msg)
+    finally:
+        # Migrations can change any table
+        gtdbV3.clearLookupCache(getattr(dbConn, 'pool', None) or dbConn)
+
+    msg = f"Schema migrated to version {version}"
+    logger.info(msg)
+    return (0, msg)
+
+
+def schemaVersion(dbConn):
+    """Schema version of the database. (PRAGMA user_version)
+
+    Args:
+        dbConn (GTConnection): Database connection from create_connection or a ConnectionPool.
+
+    Returns:
+        int: Version, 0 for a new or unversioned database
+    """
+    return gtdbV3.directSql(dbConn, "PRAGMA user_version", ())[0][0]
+
+
+if __name__ == '__main__':
+    result = buildSnapshot(*sys.argv[1:3] or ['Scripts'])
+    print(result[1])
+    sys.exit(result[0])
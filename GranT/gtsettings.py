@@ -0,0 +1,268 @@
+"""Car settings as columns for comparing tunes.
+
+SettingStore loads the numeric car_setting columns with one query into
+array.array columns, one machine value per setting instead of a
+CustCarSettings object. NULL is stored as NaN. The gear columns hold the
+REAL gear ratios. (gear_1_ratio etc. see gtschema, schema version 4)
+
+    store = gtsettings.SettingStore.load(dbConn)
+    store.rank(store.powerToWeight(), catId=3)[:10]
+    store.filter(max_power=(400, 600), weight=(None, 1300))
+    store.nearest(settingId=12, count=5)
+
+The store is a snapshot. Load it again after car settings change.
+numpy is optional. When it is installed rank, filter, nearest and
+powerToWeight work on numpy views of the columns, otherwise they loop over
+the arrays in Python. Both give the same results. toNumpy() gives numpy
+arrays sharing the memory of the columns.
+"""
+import itertools
+import logging
+import math
+from array import array
+
+# Custom App modules
+from GranT import gtdbV3
+
+try:
+    import numpy
+except ImportError:  # Optional. The Python loops are used instead
+    numpy = None
+
+logger = logging.getLogger(__name__)
+
+# Columns in the order of _SQL['getCarSettingColumns']
+_idColumns = ('id', 'car_id', 'cat_id')
+_gearColumns = ('gear_1', 'gear_2', 'gear_3', 'gear_4', 'gear_5', 'gear_6', 'gear_7', 'final_gear')
+_valueColumns = ('max_power', 'max_torque', 'power_ratio', 'traction_control', 'brake_balance',
+                 'top_speed', 'weight', 'weight_reduction', 'accel', 'braking', 'cornering',
+                 'max_speed', 'stability') + _gearColumns
+
+# Rows converted to columns at a time while loading
+_chunkSize = 1000
+_nan = float('nan')
+
+
+class SettingStore():
+    """Car settings as columns. Use load() to read them from the database.
+
+    columns is {column name: array}. id, car_id and cat_id are integer
+    arrays, the other columns are float arrays.
+    """
+
+    def __init__(self):
+        self.columns = {name: array('q') for name in _idColumns}
+        self.columns.update({name: array('d') for name in _valueColumns})
+        self._positions = None
+        self._ranges = {}
+
+    def __len__(self):
+        return len(self.columns['id'])
+
+    def __repr__(self):
+        return f"SettingStore(settings={len(self)})"
+
+    @classmethod
+    def load(cls, dbConn):
+        """Read every car setting with one query.
+
+        Args:
+            dbConn (sqlite3.connect): Database connection
+
+        Returns:
+            SettingStore
+        """
+        store = cls()
+        rows = gtdbV3.directSqlIter(dbConn, gtdbV3._SQL['getCarSettingColumns'], (), _chunkSize)
+        while True:
+            chunk = list(itertools.islice(rows, _chunkSize))
+            if not chunk:
+                break
+            store.extend(chunk)
+        logger.info("Loaded %s car settings", len(store))
+        return store
+
+    def extend(self, rows):
+        """Add car_setting rows
+
+        Args:
+            rows (list): Values in the order of _SQL['getCarSettingColumns']
+        """
+        for name, values in zip(_idColumns + _valueColumns, zip(*rows)):
+            if name in _idColumns:
+                self.columns[name].extend(values)
+            else:
+                self.columns[name].extend(_nan if x is None else x for x in values)
+        self._positions = None
+        self._ranges = {}
+
+    def position(self, settingId):
+        """Index of a setting in the columns
+
+        Returns:
+            int: None if settingId is not in the store
+        """
+        if self._positions is None:
+            self._positions = {x: pos for pos, x in enumerate(self.columns['id'])}
+        return self._positions.get(settingId)
+
+    def powerToWeight(self):
+        """max_power / weight for each setting
+
+        Returns:
+            array: NaN where either is missing or weight is 0
+        """
+        power, weight = self.columns['max_power'], self.columns['weight']
+        if numpy is None:
+            return array('d', (p / w if w else _nan for p, w in zip(power, weight)))
+        weight = _view(weight)
+        with numpy.errstate(divide='ignore', invalid='ignore'):
+            values = numpy.where(weight != 0, _view(power) / weight, _nan)
+        result = array('d')
+        result.frombytes(values.tobytes())
+        return result
+
+    def _columnRange(self, name):
+        """Internal use only. Lowest and highest value of a column, ignoring
+        NaN. Kept until the store changes.
+
+        Returns:
+            tuple: (low, high) None if the column has no values
+        """
+        if name not in self._ranges:
+            col = self.columns[name]
+            if numpy is None:
+                known = [x for x in col if x == x]
+                self._ranges[name] = (min(known), max(known)) if known else None
+            else:
+                values = _view(col)
+                known = values[~numpy.isnan(values)]
+                self._ranges[name] = (known.min().item(), known.max().item()) if known.size else None
+        return self._ranges[name]
+
+    def rank(self, values, catId=None, reverse=True):
+        """Settings ordered by values. Settings with a NaN value are left out.
+        Equal values keep the store order.
+
+        Args:
+            values (array): A value for each setting. A column or powerToWeight()
+            catId (int, optional): Only settings for this car class. Defaults to None, all
+            reverse (bool, optional): Highest first. Defaults to True
+
+        Returns:
+            list: (setting id, value)
+        """
+        ids = self.columns['id']
+        cats = self.columns['cat_id']
+        if numpy is None:
+            result = [(ids[pos], value) for pos, value in enumerate(values)
+                      if value == value and (catId is None or cats[pos] == catId)]
+            result.sort(key=lambda x: x[1], reverse=reverse)
+            return result
+
+        values = _view(values)
+        keep = ~numpy.isnan(values)
+        if catId is not None:
+            keep &= _view(cats) == catId
+        pos = numpy.flatnonzero(keep)
+        pos = pos[numpy.argsort(-values[pos] if reverse else values[pos], kind='stable')]
+        return list(zip(_view(ids)[pos].tolist(), values[pos].tolist()))
+
+    def filter(self, catId=None, **ranges):
+        """Settings with every named column in a range. NaN is never in range.
+
+            store.filter(catId=3, max_power=(400, None), weight=(None, 1300))
+
+        Args:
+            catId (int, optional): Only settings for this car class. Defaults to None, all
+            ranges: column=(low, high). Inclusive, None for no limit
+
+        Returns:
+            list: setting ids
+        """
+        limits = [(self.columns[name], -math.inf if low is None else low, math.inf if high is None else high)
+                  for name, (low, high) in ranges.items()]
+        ids = self.columns['id']
+        cats = self.columns['cat_id']
+        if numpy is None:
+            keep = [pos for pos in range(len(self)) if catId is None or cats[pos] == catId]
+            for col, low, high in limits:
+                keep = [pos for pos in keep if low <= col[pos] <= high]
+            return [ids[pos] for pos in keep]
+
+        keep = numpy.ones(len(self), dtype=bool)
+        if catId is not None:
+            keep &= _view(cats) == catId
+        for col, low, high in limits:
+            col = _view(col)
+            keep &= (col >= low) & (col <= high)
+        return _view(ids)[keep].tolist()
+
+    def nearest(self, settingId, columns=None, count=5):
+        """Settings most like a setting. Each column is scaled by its range
+        across the store. Columns that are NaN in the setting are skipped, a
+        NaN in another setting counts as the largest difference.
+
+        Args:
+            settingId (int): car_setting.id to compare with
+            columns (list, optional): Columns compared. Defaults to all the value columns
+            count (int, optional): Settings returned. Defaults to 5
+
+        Returns:
+            list: (setting id, distance) closest first. Empty if settingId is not in
+                  the store or has no values to compare
+        """
+        target = self.position(settingId)
+        if target is None:
+            return []
+        compare = []  # (column, target value, scale)
+        for name in columns or _valueColumns:
+            targetValue = self.columns[name][target]
+            valueRange = self._columnRange(name)
+            if targetValue != targetValue or valueRange is None or valueRange[0] == valueRange[1]:
+                continue
+            compare.append((self.columns[name], targetValue, valueRange[1] - valueRange[0]))
+        if not compare:
+            return []
+
+        ids = self.columns['id']
+        if numpy is None:
+            total = [0.0] * len(self)
+            for col, targetValue, scale in compare:
+                for pos, value in enumerate(col):
+                    if value == value:
+                        total[pos] += ((value - targetValue) / scale) ** 2
+                    else:
+                        total[pos] += 1.0
+            result = [(ids[pos], math.sqrt(total[pos] / len(compare)))
+                      for pos in range(len(self)) if pos != target]
+            result.sort(key=lambda x: x[1])
+            return result[:count]
+
+        total = numpy.zeros(len(self))
+        for col, targetValue, scale in compare:
+            diff = ((_view(col) - targetValue) / scale) ** 2
+            diff[numpy.isnan(diff)] = 1.0
+            total += diff
+        distance = numpy.sqrt(total / len(compare))
+        pos = numpy.delete(numpy.arange(len(self)), target)
+        pos = pos[numpy.argsort(distance[pos], kind='stable')[:count]]
+        return list(zip(_view(ids)[pos].tolist(), distance[pos].tolist()))
+
+    def toNumpy(self):
+        """The columns as numpy arrays. They share memory with the columns,
+        nothing is copied. Requires numpy.
+
+        Returns:
+            dict: {column name: numpy.ndarray}
+        """
+        if numpy is None:
+            raise ImportError("toNumpy() needs numpy")
+        return {name: _view(col) for name, col in self.columns.items()}
+
+
+def _view(values):
+    """Internal use only. numpy array of values. arrays are shared, not copied"""
+    if isinstance(values, array):
+        return numpy.frombuffer(values, dtype=values.typecode)
+    return numpy.asarray(values, dtype=float)
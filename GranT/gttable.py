@@ -0,0 +1,134 @@
+"""Tables for the cli.
+
+Column widths are fixed when the Table is made, so each page of rows is
+formatted in one pass and written with one call. On a terminal the page is
+written as prompt_toolkit FormattedText, which needs no escaping or HTML
+parsing. Otherwise (a pipe or file) plain text is written and prompt_toolkit
+is not imported.
+
+    table = Table([Column('ID', 3, '>'), Column('Track Name', 30)])
+    table.write(gtdbV3.pageSql(dbConn, 'getTrackList', {}))
+"""
+import sys
+
+
+class Column():
+    """A table column.
+
+    Args:
+        header (str): Column heading
+        width (int): Characters. Longer values are cut
+        align (str, optional): '<' left or '>' right. Defaults to '<'
+        fmt (function, optional): Formats a value. Defaults to str. None is always blank
+    """
+
+    def __init__(self, header, width, align='<', fmt=str):
+        self.header = header
+        self.width = width
+        self.align = align
+        self.fmt = fmt
+
+    def __repr__(self):
+        return f"Column(header={self.header}, width={self.width}, align={self.align})"
+
+    def cell(self, value):
+        """Value formatted to the column width"""
+        text = '' if value is None else self.fmt(value)
+        return f"{text[:self.width]:{self.align}{self.width}}"
+
+
+class Table():
+    """Writes rows as a table.
+
+    Args:
+        columns (list): Column objects
+        out (file, optional): Where to write. Defaults to sys.stdout
+        style (str, optional): prompt_toolkit style for the values on a terminal.
+            Defaults to 'ansigreen'
+        indent (str, optional): Text before each line. Defaults to ' '
+    """
+
+    sep = ' | '
+
+    def __init__(self, columns, out=None, style='ansigreen', indent=' '):
+        self.columns = columns
+        self.out = out or sys.stdout
+        self.style = style
+        self.indent = indent
+        self.width = len(indent) + sum(x.width for x in columns) + len(self.sep) * (len(columns) - 1)
+        try:
+            self.tty = self.out.isatty()
+        except (AttributeError, ValueError):
+            self.tty = False
+
+    def __repr__(self):
+        return f"Table(columns={self.columns}, tty={self.tty})"
+
+    def footer(self, char='='):
+        """Write the line under the table"""
+        self.out.write(char * self.width + '\n')
+
+    def header(self):
+        """Write the column headings and the line under them"""
+        line = self.sep.join(f"{x.header[:x.width]:{x.align}{x.width}}" for x in self.columns)
+        self.out.write(f"{self.indent}{line}\n" + '-' * self.width + '\n')
+
+    def lines(self, rows):
+        """Rows as plain text lines
+
+        Args:
+            rows (list): Row tuples, a value for each column
+
+        Returns:
+            list: str
+        """
+        cols = self.columns
+        return [self.indent + self.sep.join(col.cell(value) for col, value in zip(cols, row))
+                for row in rows]
+
+    def writeRows(self, rows):
+        """Write a page of rows with one write
+
+        Args:
+            rows (list): Row tuples, a value for each column
+
+        Returns:
+            int: Rows written
+        """
+        if not rows:
+            return 0
+        if not self.tty:
+            self.out.write('\n'.join(self.lines(rows)) + '\n')
+            return len(rows)
+
+        from prompt_toolkit import print_formatted_text
+        from prompt_toolkit.formatted_text import FormattedText
+
+        self.out.flush()  # Headings written to out come first
+        cols = self.columns
+        fragments = []
+        for row in rows:
+            fragments.append(('', self.indent))
+            for x, (col, value) in enumerate(zip(cols, row)):
+                if x:
+                    fragments.append(('', self.sep))
+                fragments.append((self.style, col.cell(value)))
+            fragments.append(('', '\n'))
+        print_formatted_text(FormattedText(fragments), end='', file=self.out)
+        return len(rows)
+
+    def write(self, pages):
+        """Write the headings, the pages of rows and the footer
+
+        Args:
+            pages (iterable): Lists of row tuples. (see gtdbV3.pageSql)
+
+        Returns:
+            int: Rows written
+        """
+        self.header()
+        count = 0
+        for page in pages:
+            count += self.writeRows(page)
+        self.footer()
+        return count
@@ -0,0 +1,12 @@
+--
+-- Adds the foreign key indexes to a database created before they were
+-- part of createTables.sql and createUserTables.sql.
+-- Safe to run more than once.
+--
+CREATE INDEX IF NOT EXISTS race_rc_id_name ON race (rc_id, name);
+CREATE INDEX IF NOT EXISTS race_tl_id ON race (tl_id);
+CREATE INDEX IF NOT EXISTS race_collection_league_id_name ON race_collection (league_id, name);
+CREATE INDEX IF NOT EXISTS track_layout_track_id_name ON track_layout (track_id, name);
+CREATE INDEX IF NOT EXISTS car_mfg_id ON car (mfg_id);
+CREATE INDEX IF NOT EXISTS car_setting_car_id_name ON car_setting (car_id, name);
+PRAGMA optimize;
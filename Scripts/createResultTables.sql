@@ -0,0 +1,33 @@
+--
+-- Race results and lap times. Safe to run more than once.
+--
+-- Times are integer milliseconds. Both tables are WITHOUT ROWID and
+-- clustered on their primary key, so the laps of a car in a race are
+-- stored together and appends need no second index.
+--
+
+-- Table: race_result
+CREATE TABLE IF NOT EXISTS race_result (
+    race_id        INTEGER NOT NULL
+                           REFERENCES race (id) ON DELETE CASCADE,
+    car_setting_id INTEGER NOT NULL
+                           REFERENCES car_setting (id) ON DELETE CASCADE,
+    position       INTEGER,
+    total_ms       INTEGER,
+    best_lap_ms    INTEGER,
+    PRIMARY KEY (race_id, car_setting_id)
+) WITHOUT ROWID;
+
+-- Table: lap_time
+CREATE TABLE IF NOT EXISTS lap_time (
+    race_id        INTEGER NOT NULL,
+    car_setting_id INTEGER NOT NULL,
+    lap            INTEGER NOT NULL,
+    lap_ms         INTEGER NOT NULL,
+    PRIMARY KEY (race_id, car_setting_id, lap),
+    FOREIGN KEY (race_id, car_setting_id)
+        REFERENCES race_result (race_id, car_setting_id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- Index: race_result_car_setting_id
+CREATE INDEX IF NOT EXISTS race_result_car_setting_id ON race_result (car_setting_id);
@@ -145,6 +145,22 @@ CREATE TABLE weather (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT
 DROP INDEX IF EXISTS sortord;
 CREATE INDEX sortord ON league (sortord COLLATE RTRIM ASC);
 
+-- Index: race_rc_id_name
+DROP INDEX IF EXISTS race_rc_id_name;
+CREATE INDEX race_rc_id_name ON race (rc_id, name);
+
+-- Index: race_tl_id
+DROP INDEX IF EXISTS race_tl_id;
+CREATE INDEX race_tl_id ON race (tl_id);
+
+-- Index: race_collection_league_id_name
+DROP INDEX IF EXISTS race_collection_league_id_name;
+CREATE INDEX race_collection_league_id_name ON race_collection (league_id, name);
+
+-- Index: track_layout_track_id_name
+DROP INDEX IF EXISTS track_layout_track_id_name;
+CREATE INDEX track_layout_track_id_name ON track_layout (track_id, name);
+
 -- View: vRaceCollection
 -- DROP VIEW IF EXISTS vRaceCollection;
 -- CREATE VIEW vRaceCollection AS
@@ -59,6 +59,14 @@ CREATE TABLE car_setting (
     stability        REAL
 );
 
+-- Index: car_mfg_id
+DROP INDEX IF EXISTS car_mfg_id;
+CREATE INDEX car_mfg_id ON car (mfg_id);
+
+-- Index: car_setting_car_id_name
+DROP INDEX IF EXISTS car_setting_car_id_name;
+CREATE INDEX car_setting_car_id_name ON car_setting (car_id, name);
+
 
 
 PRAGMA foreign_keys = on;
\ No newline at end of file
@@ -0,0 +1,53 @@
+# Compares loading every car setting through the validating property
+# setters with CustCarSettings.from_rows.
+# python -m benchmarks.bench_carSettingLoad [settings]
+import sys
+import time
+from pathlib import Path
+
+from GranT import GTClasses as GT
+from GranT import gtdbV3
+from GranT import gtschema
+
+_gtScripts = Path.cwd() / 'Scripts'
+
+
+def buildDB(settings):
+    """In memory db with settings car settings spread over 20 cars"""
+    dbConn = gtdbV3.create_connection(":memory:", profile='memory')
+    gtschema.migrate(dbConn, scriptPath=_gtScripts)
+    with gtdbV3.transaction(dbConn):
+        dbConn.executemany(
+            "INSERT INTO car (model, mfg_id, cat_id, drivetrain_id) VALUES (?, 1, 3, 1)",
+            ((f"Bench car {x}",) for x in range(20)))
+        dbConn.executemany(
+            "INSERT INTO car_setting (car_id, cat_id, name, max_power, max_torque, power_ratio, weight, gear_1, gear_2, final_gear, gear_1_ratio, gear_2_ratio, final_gear_ratio, accel, braking, cornering, max_speed, stability) VALUES (?, 3, ?, 500, 450.5, 10, 1200, '2.5', '1.9', '3.9', 2.5, 1.9, 3.9, 5.5, 4.5, 2.5, 320.0, 3.5)",
+            ((1 + x % 20, f"Setting {x}") for x in range(settings)))
+    return dbConn
+
+
+def setters(rows):
+    """getCarSetting before from_row"""
+    result = []
+    for row in rows:
+        obj = GT.CustCarSettings(id=row[0], car_id=row[1], cat_id=row[2], name=row[3])
+        for name, value in zip(GT.CustCarSettings.dbColumns[4:], row[4:]):
+            setattr(obj, name, value)
+        result.append(obj)
+    return result
+
+
+def main(settings=5000):
+    dbConn = buildDB(settings)
+    sql = gtdbV3._SQL['getCarSettingsForCar.all']
+    start = time.perf_counter()
+    rows = dbConn.execute(sql).fetchall()
+    print(f"{len(rows)} settings. sqlite {(time.perf_counter() - start) * 1000:.1f} ms")
+    for name, func in (('Setters', setters), ('from_rows', GT.CustCarSettings.from_rows)):
+        start = time.perf_counter()
+        func(rows)
+        print(f"{name:10} {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
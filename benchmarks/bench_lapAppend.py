@@ -0,0 +1,54 @@
+# Lap times per second appended with appendLapTimes compared with an
+# INSERT and commit per lap through _exeDML, to a database file.
+# python -m benchmarks.bench_lapAppend [laps] [profile]
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from GranT import gtdbV3
+from GranT import gtschema
+
+_gtScripts = Path.cwd() / 'Scripts'
+
+
+def buildDB(dbFile, profile):
+    """Database file with 20 car settings for race 1"""
+    dbConn = gtdbV3.create_connection(dbFile, profile=profile)
+    gtschema.migrate(dbConn, scriptPath=_gtScripts)
+    with gtdbV3.transaction(dbConn):
+        dbConn.execute("INSERT INTO car (id, model, mfg_id, cat_id, drivetrain_id) VALUES (1, 'Bench car', 1, 3, 1)")
+        dbConn.executemany("INSERT INTO car_setting (id, car_id, cat_id, name) VALUES (?, 1, 3, ?)",
+                           ((x, f"Setting {x}") for x in range(1, 21)))
+    return dbConn
+
+
+def laps(count, raceId=1):
+    """count laps spread over 20 car settings"""
+    return ((raceId, 1 + x % 20, 1 + x // 20, 90000 + x % 997) for x in range(count))
+
+
+def perLap(dbConn, count):
+    """Appending before appendLapTimes"""
+    gtdbV3.addRaceResults(dbConn, [(2, x, None, None, None) for x in range(1, 21)])
+    for lap in laps(count, raceId=2):
+        gtdbV3._exeDML(dbConn, "INSERT INTO lap_time (race_id, car_setting_id, lap, lap_ms) VALUES (?, ?, ?, ?)", lap)
+
+
+def main(count=1000000, profile='write-heavy'):
+    with tempfile.TemporaryDirectory() as tmpDir:
+        dbConn = buildDB(Path(tmpDir) / 'bench.db', profile)
+        start = time.perf_counter()
+        result = gtdbV3.appendLapTimes(dbConn, laps(count))
+        seconds = time.perf_counter() - start
+        print(f"appendLapTimes {count} laps {seconds:7.2f} s {count / seconds:10,.0f} laps/s  {result[1]}")
+        small = min(count, 20000)
+        start = time.perf_counter()
+        perLap(dbConn, small)
+        seconds = time.perf_counter() - start
+        print(f"_exeDML        {small} laps {seconds:7.2f} s {small / seconds:10,.0f} laps/s")
+        dbConn.close()
+
+
+if __name__ == '__main__':
+    main(*[int(x) if x.isdigit() else x for x in sys.argv[1:]])
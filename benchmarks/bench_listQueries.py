@@ -0,0 +1,46 @@
+# Compares the getLayoutList and getRaceCollectionList queries with the
+# GROUP BY ... HAVING forms they replaced.
+# python -m benchmarks.bench_listQueries [races]
+import sys
+import timeit
+from pathlib import Path
+
+from GranT import gtdbV3
+
+_gtScripts = Path.cwd() / 'Scripts'
+
+# The queries before filtering was moved into WHERE
+_oldSQL = {
+    'getLayoutList': "SELECT tl.id AS layoutId, tl.name AS layout, tl.miles AS Miles, count(race.tl_id) AS Races FROM track_layout AS tl LEFT JOIN race ON tl.id = race.tl_id GROUP BY tl.id HAVING tl.track_id = ? ORDER BY layout",
+    'getRaceCollectionList': "SELECT rc.id, rc.name, rc.description, cat.name as catClass, rc.prize1,  rc.prize2, rc.prize3,Count(race.id) AS races FROM race_collection AS rc LEFT JOIN category AS cat ON rc.cat_id = cat.id LEFT JOIN race ON race.rc_id = rc.id GROUP BY rc.id HAVING rc.league_id=? ORDER BY rc.name"}
+
+
+def buildDB(races):
+    """In memory db with the sample data plus races extra races."""
+    dbConn = gtdbV3.create_connection(":memory:", profile='memory')
+    gtdbV3.initDB(dbConn, scriptPath=f'{_gtScripts}')
+    layouts = [x[0] for x in dbConn.execute("SELECT id FROM track_layout")]
+    collections = [x[0] for x in dbConn.execute("SELECT id FROM race_collection")]
+    with gtdbV3.transaction(dbConn):
+        dbConn.executemany(
+            "INSERT INTO race (name, tl_id, rc_id, weather_id, type_id) VALUES (?, ?, ?, 1, 1)",
+            ((f"Bench race {x}", layouts[x % len(layouts)], collections[x % len(collections)])
+             for x in range(races)))
+    dbConn.execute("ANALYZE")
+    return dbConn
+
+
+def main(races=300000, number=20):
+    print(f"Building db with {races} extra races")
+    dbConn = buildDB(races)
+    for name, oldSQL in _oldSQL.items():
+        newSQL = gtdbV3._SQL[name]
+        theVals = (5,) if name == 'getLayoutList' else (2,)
+        assert dbConn.execute(oldSQL, theVals).fetchall() == dbConn.execute(newSQL, theVals).fetchall()
+        oldTime = timeit.timeit(lambda: dbConn.execute(oldSQL, theVals).fetchall(), number=number) / number
+        newTime = timeit.timeit(lambda: dbConn.execute(newSQL, theVals).fetchall(), number=number) / number
+        print(f"{name:22} HAVING {oldTime * 1000:9.3f} ms   WHERE {newTime * 1000:9.3f} ms   {oldTime / newTime:7.1f}x")
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
@@ -0,0 +1,49 @@
+# Bytes per hydrated Race for a collection of races. Compares each Race
+# with its own layout, track, country and lookup objects with the shared
+# objects getRacesForCollection builds.
+# python -m benchmarks.bench_raceMemory [races]
+import sys
+import tracemalloc
+from pathlib import Path
+
+from GranT import gtdbV3
+
+_gtScripts = Path.cwd() / 'Scripts'
+
+
+def buildDB(races):
+    """In memory db with races races in race collection 1"""
+    dbConn = gtdbV3.create_connection(":memory:", profile='memory')
+    gtdbV3.initDB(dbConn, scriptPath=f'{_gtScripts}')
+    layouts = [x[0] for x in dbConn.execute("SELECT id FROM track_layout")]
+    with gtdbV3.transaction(dbConn):
+        dbConn.executemany(
+            "INSERT INTO race (name, tl_id, rc_id, weather_id, type_id, racetime, limits) VALUES (?, ?, 1, ?, 1, '09:30', '15 laps')",
+            ((f"Bench race {x}", layouts[x % len(layouts)], 1 + x % 2) for x in range(races)))
+    return dbConn
+
+
+def measure(rows, hydrate):
+    """Bytes allocated by hydrate(rows) and still held by its result"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = hydrate(rows)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    assert len(result) == len(rows)
+    return used
+
+
+def main(races=50000):
+    dbConn = buildDB(races)
+    rows = dbConn.execute(gtdbV3._SQL['getRacesForCollection'], (1,)).fetchall()
+    print(f"{len(rows)} races")
+    for name, hydrate in (
+            ('Own objects', lambda rows: [gtdbV3._raceFromRow(row, {}) for row in rows]),
+            ('Shared', lambda rows: [gtdbV3._raceFromRow(row, shared) for shared in [{}] for row in rows])):
+        used = measure(rows, hydrate)
+        print(f"{name:12} {used / len(rows):8.0f} bytes/race {used / 2**20:8.1f} MB")
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
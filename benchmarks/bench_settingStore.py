@@ -0,0 +1,37 @@
+# Ranks every car setting by power to weight from CustCarSettings objects,
+# loaded with getCarSettingList and getCarSetting, and from a SettingStore.
+# python -m benchmarks.bench_settingStore [settings]
+import sys
+import time
+
+from GranT import gtdbV3
+from GranT import gtsettings
+from benchmarks.bench_carSettingLoad import buildDB
+
+
+def objects(dbConn):
+    """Ranking before gtsettings"""
+    settings = []
+    for carId in range(1, 21):
+        for settingId, name in gtdbV3.getCarSettingList(dbConn, carId):
+            settings.append(gtdbV3.getCarSetting(dbConn, settingId))
+    ranked = [(x.id, x.max_power / x.weight) for x in settings if x.max_power is not None and x.weight]
+    ranked.sort(key=lambda x: x[1], reverse=True)
+    return ranked
+
+
+def store(dbConn):
+    settings = gtsettings.SettingStore.load(dbConn)
+    return settings.rank(settings.powerToWeight())
+
+
+def main(settings=5000):
+    dbConn = buildDB(settings)
+    for name, func in (('Objects', objects), ('SettingStore', store)):
+        start = time.perf_counter()
+        ranked = func(dbConn)
+        print(f"{name:12} {(time.perf_counter() - start) * 1000:9.1f} ms {len(ranked)} ranked")
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
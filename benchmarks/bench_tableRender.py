@@ -0,0 +1,72 @@
+# Compares writing a 5k car list a row at a time through prompt_toolkit HTML
+# with gttable.Table, for a terminal and for a pipe.
+# python -m benchmarks.bench_tableRender [cars]
+import html
+import io
+import sys
+import time
+from pathlib import Path
+
+from prompt_toolkit import print_formatted_text, HTML
+
+from GranT import gtdbV3
+from GranT import gttable
+
+_gtScripts = Path.cwd() / 'Scripts'
+
+
+class _Terminal(io.StringIO):
+    def isatty(self):
+        return True
+
+
+def buildDB(cars):
+    """In memory db with cars cars for mfg 1"""
+    dbConn = gtdbV3.create_connection(":memory:", profile='memory')
+    gtdbV3.initDB(dbConn, scriptPath=f'{_gtScripts}')
+    gtdbV3._exeScriptFile(dbConn, scriptFileName=f'{_gtScripts / "createUserTables.sql"}')
+    with gtdbV3.transaction(dbConn):
+        dbConn.executemany(
+            "INSERT INTO car (model, mfg_id, cat_id, drivetrain_id, year) VALUES (?, 1, 3, 1, ?)",
+            ((f"Bench car <{x}> & co", 1990 + x % 30) for x in range(cars)))
+    return dbConn
+
+
+def perRow(rows, out):
+    """displayCarMfg before gttable"""
+    for row in rows:
+        carId = f"{row[0]:d}".rjust(3)
+        modName = html.escape(row[1].ljust(60))
+        mYear = f"{row[2]:d}".rjust(4) if row[2] else "    "
+        carClassN = html.escape(row[3].ljust(6))
+        mDT = html.escape(row[4].ljust(4))
+        print_formatted_text(HTML(
+            f" <ansigreen>{carId}</ansigreen> | <ansigreen>{modName}</ansigreen> | <ansigreen>{mYear}</ansigreen> | <ansigreen>{carClassN}</ansigreen> | <ansigreen>{mDT}</ansigreen>"),
+            file=out)
+
+
+def table(pages, out):
+    gttable.Table([gttable.Column('ID', 3, '>'), gttable.Column('Model Name', 60),
+                   gttable.Column('Year', 4, '>'), gttable.Column('Class', 6),
+                   gttable.Column('Drive', 5)], out=out).write(pages)
+
+
+def main(cars=5000):
+    dbConn = buildDB(cars)
+    start = time.perf_counter()
+    pages = list(gtdbV3.pageSql(dbConn, 'getCarList.name', {'mfgID': 1}))
+    sqlTime = time.perf_counter() - start
+    rows = [row for page in pages for row in page]
+    print(f"{len(rows)} cars. sqlite {sqlTime * 1000:.1f} ms")
+    for name, func, data in (('HTML per row', perRow, rows),
+                             ('Table terminal', table, pages)):
+        start = time.perf_counter()
+        func(data, _Terminal())
+        print(f"{name:16} {(time.perf_counter() - start) * 1000:9.1f} ms")
+    start = time.perf_counter()
+    table(pages, io.StringIO())
+    print(f"{'Table pipe':16} {(time.perf_counter() - start) * 1000:9.1f} ms")
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:]])
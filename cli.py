@@ -1,23 +1,24 @@
 # PURPOSE: CLI to test getting data out of db. Future cli maybe.
 #    GTTracking db library
+#  python cli.py [--startup-profile] [--version]
+#  Nothing slow runs at import. Logging is set up by main(), the database
+#  is opened on first use by db() and prompt_toolkit is imported the first
+#  time one of its functions is called.
+import time
+_startTime = time.perf_counter()
 import logging
-from logging.handlers import RotatingFileHandler
 import os
 import sys
 import html
+import itertools
+from contextlib import contextmanager
 from pathlib import Path
 from datetime import datetime
 
-# Addtional external libs
-from prompt_toolkit import prompt, PromptSession
-from prompt_toolkit import print_formatted_text, HTML
-from prompt_toolkit.validation import Validator
-from prompt_toolkit.completion import NestedCompleter, WordCompleter
-from prompt_toolkit.shortcuts import radiolist_dialog, input_dialog
-
 # App specific required
 from GranT import gtdbV3 as gtdb
 from GranT import GTClasses as GT
+from GranT import gttable as GTT
 from GranT import gtcfg
 
 # _gtPath = Path.cwd()
@@ -26,55 +27,161 @@ gtcfg.curcfg['gtPath'] = Path.cwd()
 gtcfg.curcfg['gtScripts'] = gtcfg.curcfg['gtPath'] / 'Scripts'
 gtcfg.curcfg['layoutUpdated'] = True
 gtcfg.curcfg['version'] = '1.alpha'
-# Log Formatters
-smlFMT = logging.Formatter(
-    '%(asctime)s %(levelname)-8s %(message)s')
-extFMT = logging.Formatter(
-    '%(asctime)s %(levelname)-8s:%(name)s.%(funcName)s: %(message)s')
-# Log Handlers
-console = logging.StreamHandler(sys.stdout)
-console.setLevel(logging.CRITICAL)
-console.setFormatter(smlFMT)
-# Initilizing logging (This is the root logger now)
+# Initilizing logging (This is the root logger now). Handlers are added by setupLogging
 log = logging.getLogger('')
-log.setLevel(logging.DEBUG)
-log.addHandler(console)
-# create log folder if it does not exists
-Path(gtcfg.logcfg['logDir']).mkdir(parents=True, exist_ok=True)
-
-logFile = Path(gtcfg.logcfg['logDir']) / 'cli.log'
-
-log_fh = RotatingFileHandler(
-    logFile, mode='a', maxBytes=1048576, backupCount=2)
-extFMT = logging.Formatter(
-    '%(asctime)s %(levelname)-8s:%(name)s.%(funcName)s: %(message)s')
-log_fh.setFormatter(extFMT)
-log_fh.setLevel(logging.DEBUG)
-# Add logging filehander log_fh to the logger
-log.addHandler(log_fh)
 linePrmpt = '  system> '
-print(f"{linePrmpt} Logging to: {logFile}")
-log.info(f"CLI app version : {gtcfg.curcfg['version']} starting")
-# create Path to database if it does not exists
-Path(Path(gtcfg.dbcfg['dbFile']).parent).mkdir(parents=True, exist_ok=True)
-print(f"{linePrmpt} Database  : {gtcfg.dbcfg['dbFile']}")
-if not Path(gtcfg.dbcfg['dbFile']).exists():
-    newDB = True
-    log.info(f"Db file not found: newDB={newDB}")
-else:
-    newDB = False
-    log.info(f"Db found: newDB={newDB}")
-
-# sqlite will create a database file if it does not exist.
-dbC1 = gtdb.create_connection(gtcfg.dbcfg['dbFile'])
-
-if newDB:
-    log.info(f"Initializing new database: {gtcfg.dbcfg['dbFile']}")
-    print(f"{linePrmpt} Initializing new database")
-    gtdb.initDB(dbC1, scriptPath=gtcfg.curcfg['gtScripts'])
-    log.info(f"Creating User Tables")
-    gtdb._exeScriptFile(
-        dbC1, scriptFileName=gtcfg.curcfg['gtScripts'] / 'createUserTables.sql')
+# Database connection. Use db()
+dbC1 = None
+# [(phase, seconds)] for --startup-profile
+_phases = [('imports', 0.0)]
+# System messages go to stderr in batch mode so stdout only has the results
+_statusFile = sys.stdout
+
+
+@contextmanager
+def _phase(name):
+    """Time a startup phase for --startup-profile"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _phases.append((name, time.perf_counter() - start))
+
+
+def _status(msg):
+    """Print a system message"""
+    print(f"{linePrmpt} {msg}", file=_statusFile)
+
+
+def _lazy(module, name):
+    """Stand in for a prompt_toolkit function or class. prompt_toolkit takes
+    about 200 ms to import so it is imported on the first call.
+
+    Args:
+        module (str): Module to import
+        name (str): Name in the module. (NestedCompleter.from_nested_dict)
+    """
+    def call(*args, **kwargs):
+        if module not in sys.modules:
+            with _phase(f"import {module}"):
+                __import__(module)
+        obj = sys.modules[module]
+        for part in name.split('.'):
+            obj = getattr(obj, part)
+        return obj(*args, **kwargs)
+    call.__name__ = name
+    return call
+
+
+# Addtional external libs
+prompt = _lazy('prompt_toolkit', 'prompt')
+PromptSession = _lazy('prompt_toolkit', 'PromptSession')
+print_formatted_text = _lazy('prompt_toolkit', 'print_formatted_text')
+HTML = _lazy('prompt_toolkit', 'HTML')
+radiolist_dialog = _lazy('prompt_toolkit.shortcuts', 'radiolist_dialog')
+input_dialog = _lazy('prompt_toolkit.shortcuts', 'input_dialog')
+
+
+def db():
+    """The database connection. Opened, and created or migrated, on first use.
+
+    Returns:
+        GTConnection: Database connection
+    """
+    global dbC1
+    if dbC1 is not None:
+        return dbC1
+    from GranT import gtschema
+
+    with _phase('database'):
+        # create Path to database if it does not exists
+        Path(Path(gtcfg.dbcfg['dbFile']).parent).mkdir(parents=True, exist_ok=True)
+        _status(f"Database  : {gtcfg.dbcfg['dbFile']}")
+        if not Path(gtcfg.dbcfg['dbFile']).exists():
+            newDB = True
+            log.info(f"Db file not found: newDB={newDB}")
+        else:
+            newDB = False
+            log.info(f"Db found: newDB={newDB}")
+
+        # sqlite will create a database file if it does not exist.
+        dbConn = gtdb.create_connection(
+            gtcfg.dbcfg['dbFile'], traceSql=gtcfg.dbcfg['traceSql'],
+            cachedStatements=gtcfg.dbcfg['cachedStatements'],
+            profile=gtcfg.dbcfg['profile'])
+
+        if newDB:
+            log.info(f"Initializing new database: {gtcfg.dbcfg['dbFile']}")
+            _status("Initializing new database")
+        # Creates a new database from the seed snapshot, migrates an existing one
+        result = gtschema.bootstrap(dbConn, scriptPath=gtcfg.curcfg['gtScripts'])
+        if result[0] != 0:
+            _status(result[1])
+            sys.exit(1)
+    dbC1 = dbConn
+    return dbC1
+
+
+def setupLogging():
+    """Log to the console (CRITICAL only) and to cli.log in the logDir.
+    The console is stderr in batch mode
+
+    Returns:
+        Path: The log file
+    """
+    from logging.handlers import RotatingFileHandler
+
+    # Log Formatters
+    smlFMT = logging.Formatter(
+        '%(asctime)s %(levelname)-8s %(message)s')
+    extFMT = logging.Formatter(
+        '%(asctime)s %(levelname)-8s:%(name)s.%(funcName)s: %(message)s')
+    # Log Handlers
+    console = logging.StreamHandler(_statusFile)
+    console.setLevel(logging.CRITICAL)
+    console.setFormatter(smlFMT)
+    log.setLevel(logging.DEBUG)
+    log.addHandler(console)
+    # create log folder if it does not exists
+    Path(gtcfg.logcfg['logDir']).mkdir(parents=True, exist_ok=True)
+
+    logFile = Path(gtcfg.logcfg['logDir']) / 'cli.log'
+
+    log_fh = RotatingFileHandler(
+        logFile, mode='a', maxBytes=1048576, backupCount=2)
+    log_fh.setFormatter(extFMT)
+    log_fh.setLevel(logging.DEBUG)
+    # Add logging filehander log_fh to the logger
+    log.addHandler(log_fh)
+    return logFile
+
+
+def startupProfile():
+    """Print the startup phase timings. (--startup-profile)"""
+    total = time.perf_counter() - _startTime
+    _status("Startup profile")
+    for name, seconds in _phases:
+        _status(f"  {name:32} {seconds * 1000:9.1f} ms")
+    _status(f"  {'until exit':32} {total * 1000:9.1f} ms")
+
+
+def _chunks(items, size):
+    """Lists of up to size items. Pages for GTT.Table.write"""
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _lapTime(ms):
+    """Integer milliseconds as m:ss.mmm, or h:mm:ss.mmm for an hour or more"""
+    minutes, ms = divmod(ms, 60000)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{ms / 1000:06.3f}"
+    return f"{minutes}:{ms / 1000:06.3f}"
 
 
 def _sortTuple(tup, key):
@@ -130,13 +237,88 @@ def dbInit():
         log.warning("db init confirmed")
         x = f'<ansired><b>Database being initiliazed</b></ansired>'
         print_formatted_text(HTML(x))
-        gtdb.initDB(dbC1, scriptPath=gtcfg.curcfg['gtScripts'])
+        gtdb.initDB(db(), scriptPath=gtcfg.curcfg['gtScripts'])
 
         x = f'<ansired><b>Database initilization complete</b></ansired>'
         print_formatted_text(HTML(x))
 
 
-def main():
+def main(argv=None):
+    """Run the cli
+
+    Args:
+        argv (list, optional): Command line arguments. Defaults to sys.argv[1:]
+    """
+    import argparse
+
+    global _statusFile
+
+    parser = argparse.ArgumentParser(
+        description="GT Tracking cli. Prompts for commands unless a command or --batch is given")
+    parser.add_argument('command', nargs='*',
+                        help="run one list or add command and exit. (list track id=3)")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="run the commands in FILE, one per line. - reads stdin")
+    parser.add_argument('--startup-profile', action='store_true',
+                        help="print import and startup phase timings on exit")
+    parser.add_argument('--version', action='version',
+                        version=f"%(prog)s {gtcfg.curcfg['version']}")
+    args = parser.parse_args(argv)
+    _phases[0] = ('imports', time.perf_counter() - _startTime)
+    batchMode = bool(args.command or args.batch)
+    if batchMode:
+        _statusFile = sys.stderr
+    failed = 0
+    try:
+        with _phase('logging'):
+            logFile = setupLogging()
+        _status(f"Logging to: {logFile}")
+        log.info(f"CLI app version : {gtcfg.curcfg['version']} starting")
+        if batchMode:
+            failed = batch(args.command, args.batch)
+        else:
+            interactive()
+    finally:
+        if args.startup_profile:
+            startupProfile()
+    if failed:
+        sys.exit(1)
+
+
+def batch(command, batchFile):
+    """Run commands without prompting. Results are json lines on stdout.
+    (see GranT.gtbatch)
+
+    Args:
+        command (list): Tokens of one command from the command line
+        batchFile (str): File of commands. - for stdin
+
+    Returns:
+        int: Number of commands that failed
+    """
+    import json
+    from GranT import gtbatch
+
+    failed = 0
+    if command:
+        with _phase('command'):
+            record = gtbatch.runCommand(db(), command)
+        print(json.dumps(record))
+        failed += record['code'] != 0
+    if batchFile:
+        with _phase('batch'):
+            if batchFile == '-':
+                run, bFailed = gtbatch.runBatch(db(), sys.stdin, sys.stdout)
+            else:
+                with open(batchFile, 'r') as commands:
+                    run, bFailed = gtbatch.runBatch(db(), commands, sys.stdout)
+        _status(f"Batch commands run: {run} failed: {bFailed}")
+        failed += bFailed
+    return failed
+
+
+def interactive():
+    """Prompt for commands until exit"""
     print("enter Exit or Help for more info")
     cmdHelper = {
         'help': {
@@ -171,9 +353,10 @@ def main():
         },
         'exit': None,
     }
-    completer = NestedCompleter.from_nested_dict(cmdHelper)
+    completer = _lazy('prompt_toolkit.completion', 'NestedCompleter.from_nested_dict')(cmdHelper)
 
     session = PromptSession()
+    _phases.append(('until first prompt', time.perf_counter() - _startTime))
 
     while True:
         try:
@@ -264,6 +447,8 @@ def addCarCmd(args):
     Args:
         args (str): All the args passed from the command
     """
+    from prompt_toolkit.validation import Validator
+
     log.debug(f"args passed: {args}")
     mfgId = None
     classId = None
@@ -280,7 +465,7 @@ def addCarCmd(args):
 
     if mfgId:
         log.info(f"Validating mfgId {mfgId}")
-        mfg = gtdb.getMfg(dbC1, key='mfgId', value=mfgId)
+        mfg = gtdb.getMfg(db(), key='mfgId', value=mfgId)
         if mfg.id == 0:  # mfg not found
             log.info(f"mfgId={mfgId} no found. Prompt user for manufacture")
             mfgId = pickMfg(
@@ -291,7 +476,7 @@ def addCarCmd(args):
                 return
             else:  # mfg picked
                 log.info(f"Loading manufacture object mfgId={mfgId}")
-                mfg = gtdb.getMfg(dbC1, key='mfgId', value=mfgId)
+                mfg = gtdb.getMfg(db(), key='mfgId', value=mfgId)
         else:  # mfg validated
             log.info(f"mfgId {mfgId} validated and loaded")
     else:  # Prompt user for Mfg
@@ -302,11 +487,11 @@ def addCarCmd(args):
             return
         else:  # mfg picked
             log.info(f"Loading manufacture object mfgId={mfgId}")
-            mfg = gtdb.getMfg(dbC1, key='mfgId', value=mfgId)
+            mfg = gtdb.getMfg(db(), key='mfgId', value=mfgId)
 
     if classId:
         log.info(f"Validating classId {classId}")
-        carClass = gtdb.getCarCat(dbC1, classId)
+        carClass = gtdb.getCarCat(db(), classId)
         if carClass.id == 0:  # carClass not found
             log.info(
                 f"classId={classId} not found. Prompt user for class/category")
@@ -317,7 +502,7 @@ def addCarCmd(args):
                 return
             else:  # carClass picked
                 log.info(f"Loading class/category object classId={classId}")
-                carClass = gtdb.getCarCat(dbC1, classId)
+                carClass = gtdb.getCarCat(db(), classId)
         else:  # carClass validated
             log.info(f"classId {classId} validated and loaded")
     else:  # Prompt user for carClass
@@ -329,21 +514,21 @@ def addCarCmd(args):
             return
         else:  # carClass picked
             log.info(f"Loading class/category object classId={classId}")
-            carClass = gtdb.getCarCat(dbC1, classId)
+            carClass = gtdb.getCarCat(db(), classId)
 
     if driveTrainId:
         log.info(f"Validating driveTrainId {driveTrainId}")
-        driveTrain = gtdb.getDriveTrain(dbC1, driveTrainId)
+        driveTrain = gtdb.getDriveTrain(db(), driveTrainId)
         if driveTrain.id == 0:  # Drivetrain not found
             log.info(
                 f"driveTrainId={driveTrainId} not found. Prompt user for a drivetrain")
             driveTrainId = pickDriveTrain(
                 text="Invalid driveTrainID provided. Please select a drivetrain for the new car")
             if driveTrainId:  # User choose
-                driveTrain = gtdb.getDriveTrain(dbC1, driveTrainId)
+                driveTrain = gtdb.getDriveTrain(db(), driveTrainId)
                 log.info(
                     f"Loading drivetrain object driveTrainId={driveTrainId} ")
-                driveTrain = gtdb.getDriveTrain(dbC1, driveTrainId)
+                driveTrain = gtdb.getDriveTrain(db(), driveTrainId)
             else:  # Bail out
                 log.info(f"No drivetrainId provided")
                 print(f"No drivetrain selected")
@@ -353,9 +538,9 @@ def addCarCmd(args):
         driveTrainId = pickDriveTrain(
             text="Select a drivetrain for the new car")
         if driveTrainId:  # User provided choice
-            driveTrain = gtdb.getDriveTrain(dbC1, driveTrainId)
+            driveTrain = gtdb.getDriveTrain(db(), driveTrainId)
             log.info(f"Loading drivetrain object driveTrainId={driveTrainId} ")
-            driveTrain = gtdb.getDriveTrain(dbC1, driveTrainId)
+            driveTrain = gtdb.getDriveTrain(db(), driveTrainId)
         else:  # Bail out
             log.info(f"No drivetrainId provided")
             print(f"No drivetrain selected")
@@ -404,7 +589,7 @@ def addCarCmd(args):
                      DriveTrain=driveTrain, ClassCat=carClass)
         car.year = enterYear
         log.info(f"car={car}")
-        result = gtdb.addCar(dbC1, car)
+        result = gtdb.addCar(db(), car)
         if result[0] == 0:
             x = f'  <ansigreen>Car added to garage</ansigreen>'
             print_formatted_text(HTML(x))
@@ -428,9 +613,10 @@ def addCollection(leagueId):
         list: (ResultCode,ResultDesc)
         if ResultCode !=0 then not successfull. See ResultDesc
     """
+    from prompt_toolkit.validation import Validator
 
     log.info(f"getting league object for league id {leagueId}")
-    league = gtdb.getLeague(dbC1, value=leagueId)
+    league = gtdb.getLeague(db(), value=leagueId)
     if league.id == 0:  # League was not found
         log.warning("League not found in database")
         return [1, "League not found"]
@@ -446,7 +632,7 @@ def addCollection(leagueId):
 
     # Validate the race collection name
     log.info(f"Checking if League already has race name: '{rcName}'")
-    rcList = gtdb.getRaceCollectionList(dbC1, league.id)
+    rcList = gtdb.getRaceCollectionList(db(), league.id)
     for r in rcList:
         log.debug(
             f"checking userEntry.upper {rcName.upper()} to list {r[1].upper()}")
@@ -467,7 +653,7 @@ def addCollection(leagueId):
     rCollection.classcat.id = pickCarCategory(
         text="Which car class category is this restricted to?")
     if rCollection.classcat.id:  # A car class has been selected
-        selCarClass = gtdb.getCarCat(dbC1, rCollection.classcat.id)
+        selCarClass = gtdb.getCarCat(db(), rCollection.classcat.id)
         xTmp = f"{selCarClass.name} {selCarClass.desc}"
     else:  # No car class selected
         xTmp = f" "
@@ -489,7 +675,7 @@ def addCollection(leagueId):
         f"   3rd Prize: ", validator=numCheck)
     # Save object to database
     log.debug(f"Saving {rCollection}")
-    r = gtdb.addRaceCollection(dbC1, rCollection)
+    r = gtdb.addRaceCollection(db(), rCollection)
     log.debug(f'result from adding racecollection: {r}')
     return r
 
@@ -534,6 +720,8 @@ def addCollectionCmd(args):
 def addRaceCmd(args):
     """Check and see what args have been passed before
     before drilling down on the questions to ask to add a Race"""
+    from prompt_toolkit.validation import Validator
+
     log.debug(f"args passed: {args}")
     log.debug(f"length of args: {len(args)}")
     collectionId = None
@@ -555,7 +743,7 @@ def addRaceCmd(args):
 
     if collectionId:
         log.info(f"Validating collectionId {collectionId}")
-        rcCollection = gtdb.getRaceCollection(dbC1, collectionId)
+        rcCollection = gtdb.getRaceCollection(db(), collectionId)
         if rcCollection.id == 0:  # Race Collection not found
             log.info(
                 f"collectionId:{collectionId} was not found. Prompt user to get.")
@@ -567,7 +755,7 @@ def addRaceCmd(args):
                 return
             else:  # League picked. Get collectionId for the league from user.
                 log.info(f"Loading league object for leagueid={x}")
-                league = gtdb.getLeague(dbC1, value=x)
+                league = gtdb.getLeague(db(), value=x)
                 # Prompt user to select collection from the league
                 log.info("Prompting user for race collection id")
                 collectionId = pickRaceCollection(
@@ -589,7 +777,7 @@ def addRaceCmd(args):
             return
         else:  # Get collectionId for the league from user.
             log.info(f"Loading league object for leagueid={x}")
-            league = gtdb.getLeague(dbC1, value=x)
+            league = gtdb.getLeague(db(), value=x)
             # Prompt user to select collection from the league
             log.info("Prompting user for race collection id")
             collectionId = pickRaceCollection(
@@ -602,7 +790,7 @@ def addRaceCmd(args):
 
     if layoutId:
         log.info(f"Validating layoutId {layoutId}")
-        tLayout = gtdb.getLayout(dbC1, layoutId)
+        tLayout = gtdb.getLayout(db(), layoutId)
         if tLayout.id == 0:  # TrackLayout not found
             log.info(f"layoutId:{layoutId} was not found. Prompt user for it")
             # Prompt user for Track
@@ -614,7 +802,7 @@ def addRaceCmd(args):
                 return
             else:  # Track was selected. Get layout from user.
                 log.info(f"Loading track object for trackId={x}")
-                track = gtdb.getTrack(dbC1, value=x)
+                track = gtdb.getTrack(db(), value=x)
                 log.info(f"Prompting user for layout id")
                 layoutId = pickTrackLayout(track.id, track.name,
                                            text=f'Which layout for the new race?')
@@ -633,7 +821,7 @@ def addRaceCmd(args):
             return
         else:  # Track selected. Get layout from user
             log.info(f"Loading track object for trackId={x}")
-            track = gtdb.getTrack(dbC1, value=x)
+            track = gtdb.getTrack(db(), value=x)
             log.info(f"Prompting user for layout id")
             layoutId = pickTrackLayout(track.id, track.name,
                                        text=f'Which layout for the new race?')
@@ -644,7 +832,7 @@ def addRaceCmd(args):
 
     if weatherId:
         log.info(f"Validating weatherId {weatherId}")
-        weather = gtdb.getWeather(dbC1, weatherId)
+        weather = gtdb.getWeather(db(), weatherId)
         if weather.id == 0:  # Not found, get info from user
             log.info(
                 f"weatherId:{weatherId} was not found. Prompt user for it")
@@ -666,7 +854,7 @@ def addRaceCmd(args):
 
     if raceTypeId:
         log.info(f"Validating raceTypeId {raceTypeId}")
-        raceType = gtdb.getRaceType(dbC1, raceTypeId)
+        raceType = gtdb.getRaceType(db(), raceTypeId)
         if raceType.id == 0:  # Not found. Prompt user for info
             log.info(
                 f"raceTypeId: {raceTypeId} was not found. Prompt user for it")
@@ -690,13 +878,13 @@ def addRaceCmd(args):
 
     # Getting required objects from database
     log.info("Getting race collection object from database")
-    rcCollection = gtdb.getRaceCollection(dbC1, collectionId)
+    rcCollection = gtdb.getRaceCollection(db(), collectionId)
     log.info("Getting track layout object from database")
-    tLayout = gtdb.getLayout(dbC1, layoutId)
+    tLayout = gtdb.getLayout(db(), layoutId)
     log.info("Getting weather object from database")
-    weather = gtdb.getWeather(dbC1, weatherId)
+    weather = gtdb.getWeather(db(), weatherId)
     log.info("Getting weather object from database")
-    raceType = gtdb.getRaceType(dbC1, raceTypeId)
+    raceType = gtdb.getRaceType(db(), raceTypeId)
 
     # Display what user selected
     cls()
@@ -752,7 +940,7 @@ def addRaceCmd(args):
 
     # Saving race object to database
     log.info(f"Saving: {xRace}")
-    result = gtdb.addRace(dbC1, xRace)
+    result = gtdb.addRace(db(), xRace)
     if result[0] != 0:  # Save was not successful
         log.info(
             f"Unable to add Race. Return Code: {result[0]} Desc: {result[1]}")
@@ -772,42 +960,17 @@ def displayCarMfg(mfgId):
     Args:
         mfgId (int): Manufacture ID
     """
-    mfg = gtdb.getMfg(dbC1, key='mfgId', value=mfgId)
+    mfg = gtdb.getMfg(db(), key='mfgId', value=mfgId)
     print_formatted_text(HTML(
         f"Cars in your garage for manufacture: <ansigreen>{html.escape(mfg.name)}</ansigreen>"))
     print()
 
-    # header line
-    carId = f' ID'
-    modName = f'Model Name'.ljust(60)
-    mYear = f'Year'.ljust(4)
-    carClassN = f'Class'.ljust(6)
-    mDT = f'Drive'
-
-    print(
-        f" {carId} | {modName} | {mYear} | {carClassN} | {mDT}")
-    print("-" * 104)  # header seperator
-    # Getting and display cars
-    selectSQL = "SELECT car.id, model, year, cat.name as class, dt.code"
-    fromSQL = "FROM car JOIN drivetrain AS dt ON car.drivetrain_id = dt.id JOIN category as cat on car.cat_id = cat.id"
-    whereSQL = "WHERE mfg_id = :mfgID"
-    orderBy = "ORDER BY model"
-    sql = f"{selectSQL} {fromSQL} {whereSQL} {orderBy}"
+    table = GTT.Table([GTT.Column('ID', 3, '>'), GTT.Column('Model Name', 60),
+                       GTT.Column('Year', 4, '>'), GTT.Column('Class', 6),
+                       GTT.Column('Drive', 5)])
+    # Getting and display cars a page at a time
     vals = {'mfgID': mfgId}
-    results = gtdb.directSql(dbC1, sql, vals)
-    for row in results:
-        carId = f"{row[0]:d}".rjust(3)
-        modName = html.escape(row[1].ljust(60))
-        if row[2]:  # year as a value
-            mYear = f"{row[2]:d}".rjust(4)
-        else:  # year has no value
-            mYear = "    "
-        carClassN = html.escape(row[3].ljust(6))
-        mDT = html.escape(row[4].ljust(4))
-
-        htmlText = f" <ansigreen>{carId}</ansigreen> | <ansigreen>{modName}</ansigreen> | <ansigreen>{mYear}</ansigreen> | <ansigreen>{carClassN}</ansigreen> | <ansigreen>{mDT}</ansigreen>"
-        print_formatted_text(HTML(htmlText))
-    print("-" * 104)  # header seperator
+    table.write(gtdb.pageSql(db(), 'getCarList.name', vals))
 
 
 def displayCarCats(theList):
@@ -854,29 +1017,14 @@ def displayCollection(raceColObj):
     print_formatted_text(HTML(htmlText))
 
     print("\nRaces:")
-    id = f"ID".rjust(3)
-    rName = "Name".ljust(7)
-    trackNlayout = "Track (id): Layout (id)"
-    limits = f"Limit".ljust(11)
-    startTime = "Start"
-    weather = "Weather"
-    print_formatted_text(
-        HTML(f"{id} | {rName} | {trackNlayout[0:65].ljust(65)} | {limits} | {startTime} | {weather}"))
-
-    print("-" * 118)  # header seperator
-    for x in gtdb.getRaceList(dbC1, raceColObj.id):
-        race = gtdb.getRace(dbC1, x[0])
-        id = f"{race.id:d}".rjust(3)
-        rName = html.escape(race.name[0:7].ljust(7))
-        trackNlayout = html.escape(
-            f"{race.trackLayout.track.name} ({race.trackLayout.track.id}): {race.trackLayout.name} ({race.trackLayout.id})")
-        limit = f"{race.limits}".rjust(3)
-        limits = f"{limit} {race.raceType.name}".ljust(11)
-        startTime = html.escape(race.racetime.ljust(5))
-        weather = html.escape(race.weather.name)
-        print_formatted_text(
-            HTML(f"<ansigreen>{id}</ansigreen> | <ansigreen>{rName}</ansigreen> | <ansigreen>{trackNlayout[0:65].ljust(65)}</ansigreen> | <ansigreen>{limits}</ansigreen> | <ansigreen>{startTime}</ansigreen> | <ansigreen>{weather}</ansigreen>"))
-    print("=" * 118)  # End of display
+    table = GTT.Table([GTT.Column('ID', 3, '>'), GTT.Column('Name', 7),
+                       GTT.Column('Track (id): Layout (id)', 65), GTT.Column('Limit', 11),
+                       GTT.Column('Start', 5), GTT.Column('Weather', 10)], indent='')
+    rows = ((race.id, race.name,
+             f"{race.trackLayout.track.name} ({race.trackLayout.track.id}): {race.trackLayout.name} ({race.trackLayout.id})",
+             f"{race.limits!s:>3} {race.raceType.name}", race.racetime, race.weather.name)
+            for race in gtdb.iterRacesForCollection(db(), raceColObj.id))
+    table.write(_chunks(rows, gtdb.defaultPageSize))
 
 
 def displayCollections(leagueObj):
@@ -885,39 +1033,17 @@ def displayCollections(leagueObj):
     Args:
         leagueObj : League object
     """
-    theList = gtdb.getRaceCollectionList(dbC1, leagueObj.id)
     print_formatted_text(
         HTML(f"Race Collections for League: <ansigreen>{html.escape(leagueObj.name)}</ansigreen> ({leagueObj.id})"))
-    # Header
-    colID = f' ID'
-    colName = f'Collection Name'.ljust(40)
-    carClass = f'Class'.ljust(6)
-    prize1 = f'1st ~'.ljust(10)
-    prize2 = f'2nd ~'.ljust(10)
-    prize3 = f'3rd ~'.ljust(10)
-    races = f'Races'
-    print(
-        f"  {colID} | {colName} | {carClass} | {prize1} | {prize2} | {prize3} | {races}")
-    print("-" * 104)  # header seperator
-    # Data
+    prize = {'align': '>', 'fmt': '{:,}'.format}
+    table = GTT.Table([GTT.Column('ID', 3, '>'), GTT.Column('Collection Name', 40),
+                       GTT.Column('Class', 6), GTT.Column('1st ~', 10, **prize),
+                       GTT.Column('2nd ~', 10, **prize), GTT.Column('3rd ~', 10, **prize),
+                       GTT.Column('Races', 5, '>')], indent='  ')
     # list: (id,name,desc,catClass, Prize1, Prize2, Prize3,raceCount)
-    for row in theList:
-        # print(row)
-        colID = f"{row[0]:d}".rjust(3)
-        colName = html.escape(row[1].ljust(40))
-        if row[3]:  # Car Class Cat has a value
-            xcarClass = row[3]
-        else:  # Car Class Cat has no value
-            xcarClass = ""
-        carClass = html.escape(xcarClass.ljust(6))  # catClass
-        # prizes
-        prize1 = html.escape(f'{row[4]:,}'.rjust(10))
-        prize2 = html.escape(f'{row[5]:,}'.rjust(10))
-        prize3 = html.escape(f'{row[6]:,}'.rjust(10))
-        races = f"{row[7]:d}".rjust(4)
-        print_formatted_text(
-            HTML(f"  <ansigreen>{colID}</ansigreen> | <ansigreen>{colName}</ansigreen> | <ansigreen>{carClass}</ansigreen> | <ansigreen>{prize1}</ansigreen> | <ansigreen>{prize2}</ansigreen> | <ansigreen>{prize3}</ansigreen> | <ansigreen>{races}</ansigreen>"))
-    print("=" * 104)
+    vals = {'leagueId': leagueObj.id}
+    table.write([(row[0], row[1], row[3], *row[4:8]) for row in page]
+                for page in gtdb.pageSql(db(), 'getRaceCollectionList', vals))
 
 
 def displayDriveTrains(theList):
@@ -984,8 +1110,12 @@ def displayRace(race):
         notes = "-- Nothing Entered --"
     print_formatted_text(HTML(f"Notes: <ansigreen>{notes}</ansigreen>"))
     print_formatted_text(HTML(f"Race Results:"))
-    print("-" * 123)
-    print("=" * 123)
+    table = GTT.Table([GTT.Column('Pos', 3, '>'), GTT.Column('Car Setting', 30),
+                       GTT.Column('Car', 40), GTT.Column('Total', 12, '>', _lapTime),
+                       GTT.Column('Best Lap', 9, '>', _lapTime), GTT.Column('Laps', 5, '>')])
+    # (position, carSettingId, settingName, carModel, total_ms, best_lap_ms, laps)
+    results = gtdb.getRaceResults(db(), race.id)
+    table.write([[(row[0], row[2], row[3], row[4], row[5], row[6]) for row in results]])
 
 
 def displayTrack(trackObj):
@@ -1017,62 +1147,25 @@ def displayTrack(trackObj):
         f"Country: <ansigreen>{xtext}</ansigreen> (<ansigreen>{region}</ansigreen>)"))
 
     # Get track layout List
-    tLayoutList = gtdb.getLayoutList(dbC1, trackObj.id)
+    tLayoutList = gtdb.getLayoutList(db(), trackObj.id)
     print(f"Layouts:")
-    tlID = "ID"
-    tlName = "Name".ljust(30)
-    tlMiles = "Miles"
-    races = "Races"
-    rowStr = f" {tlID} | {tlName} | {tlMiles} | {races}"
-    print(rowStr)
-    print("-" * 55)  # header seperator
-    # display track layouts
-    for r in tLayoutList:
-        tlID = str(r[0])[0:2].rjust(2)
-        tlName = html.escape(r[1][0:30].ljust(30))
-        tlMiles = "{:.2f}".format(r[2]).rjust(5)
-        races = f"{r[3]:d}".rjust(4)
-        rowStr = HTML(
-            f" <ansigreen>{tlID}</ansigreen> | <ansigreen>{tlName}</ansigreen> | <ansigreen>{tlMiles}</ansigreen> | <ansigreen>{races}</ansigreen>")
-        print_formatted_text(rowStr)
-
-    print("=" * 55)
+    table = GTT.Table([GTT.Column('ID', 2, '>'), GTT.Column('Name', 30),
+                       GTT.Column('Miles', 5, '>', '{:.2f}'.format), GTT.Column('Races', 5, '>')])
+    table.write([tLayoutList])
 
 
 def displayTracks():
     """Displays table of track info
     """
     log.info("Getting list of tracks")
-    theList = gtdb.getTrackList(dbC1)
+    table = GTT.Table([GTT.Column('ID', 2, '>'), GTT.Column('Track Name', 30),
+                       GTT.Column('Region', 10), GTT.Column('Country', 54),
+                       GTT.Column('Layouts', 7, '>')])
+    # (trackId, trackName, region, countryName, numLayouts)
+    trackCount = table.write([(row[0], row[1], row[2] or "N/A", row[3] or "----", row[4]) for row in page]
+                             for page in gtdb.pageSql(db(), 'getTrackList.detail', {}))
     print_formatted_text(
-        HTML(f"Number of Tracks: <ansigreen>{len(theList)}</ansigreen>"))
-    # Header
-    tID = f" ID"
-    tName = f"Track Name"[0:30].ljust(30)
-    region = f"Region"[0:10].ljust(10)
-    country = f"Country"[0:54].ljust(54)
-    layouts = f"Layouts"
-    print_formatted_text(
-        HTML(f"{tID} | {tName} | {region} | {country} | {layouts}"))
-    print("-" * 117)
-    # Details
-    for row in theList:
-        log.info(f"Getting track detail for trackid {row[0]}")
-        track = gtdb.getTrack(dbC1, key='trackId', value=row[0])
-        tID = str(row[0])[0:2].rjust(2)
-        tName = html.escape(track.name[0:30].ljust(30))
-        # Displaying Country info
-        if track.country.id == 0:  # No country info
-            country = str('----')[0:54].ljust(54)
-            region = "N/A"[0:10].ljust(10)
-        else:  # Country info
-            country = html.escape(track.country.cntryName[0:54]).ljust(54)
-            region = html.escape(track.country.region[0:10].ljust(10))
-        layouts = str(row[2])[0:2].rjust(2)
-        print_formatted_text(
-            HTML(f" <ansigreen>{tID}</ansigreen> | <ansigreen>{tName}</ansigreen> | <ansigreen>{region}</ansigreen> | <ansigreen>{country}</ansigreen> | <ansigreen>{layouts}</ansigreen>"))
-
-    print("=" * 117)
+        HTML(f"Number of Tracks: <ansigreen>{trackCount}</ansigreen>"))
 
 
 def displayTrackLayout(trackLayout):
@@ -1120,7 +1213,7 @@ def displayTrackLayout(trackLayout):
     whereSQL = "WHERE tl.id = ?"
     orderBySQL = "ORDER BY l.name, rc.name"
     # Getting the details
-    for row in gtdb.directSql(dbC1, f"{selectSQL} {fromSQL} {whereSQL} {orderBySQL}", (trackLayout.id,)):
+    for row in gtdb.directSql(db(), f"{selectSQL} {fromSQL} {whereSQL} {orderBySQL}", (trackLayout.id,)):
         raceID = f"{row[0]:d}".rjust(3)
         rName = html.escape(row[1][0:7].ljust(7))
         leagueNcollection = html.escape(row[2].ljust(70))
@@ -1204,27 +1297,27 @@ def listAction(cmd):
     elif listObj == 'collection':
         listRaceCollections(cmd[len(listObj):].strip())
     elif listObj == 'classes':
-        displayCarCats(gtdb.getCarCatList(dbC1))
+        displayCarCats(gtdb.getCarCatList(db()))
     elif listObj == 'circuits':
-        displayCircuits(gtdb.getCircuitList(dbC1))
+        displayCircuits(gtdb.getCircuitList(db()))
     elif listObj == 'drivetrains':
-        displayDriveTrains(gtdb.getDriveTrainList(dbC1))
+        displayDriveTrains(gtdb.getDriveTrainList(db()))
     elif listObj == 'leagues':
-        displayLeagues(gtdb.getLeagueList(dbC1))
+        displayLeagues(gtdb.getLeagueList(db()))
     elif listObj == 'manufactures':
         if cmd.find(' ') != -1:  # Args provided
             objArgs = cmd[cmd.find(' '):].lstrip()
             log.debug(f"objArgs: {objArgs}")
             if objArgs.split('=')[0].strip() == 'orderBy':
                 orderBy = objArgs.split('=')[1].strip()
-                displayMfgs(gtdb.getMfgs(dbC1, orderBy=orderBy))
+                displayMfgs(gtdb.getMfgs(db(), orderBy=orderBy))
             else:  # invalid argument for mfgs
                 log.info(
                     f"Unknown list manufactures argument {objArgs.split('=')[0].strip()}")
                 print_formatted_text(
                     HTML(f"<ansired>ERROR</ansired> - Unknown list manufactures argument <b>{objArgs.split('=')[0].strip()}</b>."))
         else:
-            displayMfgs(gtdb.getMfgList(dbC1))
+            displayMfgs(gtdb.getMfgList(db()))
     elif listObj == 'race':
         listRaceCmd(cmd[len(listObj):].strip())
     elif listObj == 'tracks':
@@ -1243,7 +1336,7 @@ def listRaceCmd(args):
         if args.split('=')[0].strip() == 'id':
             raceId = args.split('=')[1].strip()
             log.info(f"Getting race info for race id {raceId}")
-            race = gtdb.getRace(dbC1, raceId)
+            race = gtdb.getRace(db(), raceId)
             if race.id == 0:
                 print("Race not found")
             else:
@@ -1265,18 +1358,18 @@ def listTrackCmd(args):
         if args.split('=')[0].strip() == 'id':
             trackId = args.split('=')[1].strip()
             log.info(f"Getting track info for track id {trackId}")
-            trackRec = gtdb.getTrack(dbC1, key='trackId', value=trackId)
+            trackRec = gtdb.getTrack(db(), key='trackId', value=trackId)
             displayTrack(trackRec)
         elif args.split('=')[0].strip() == 'name':
             tName = args.split('=')[1]
             log.info(f"Getting track info for track name {tName}")
-            trackRec = gtdb.getTrack(dbC1, key='track', value=tName)
+            trackRec = gtdb.getTrack(db(), key='track', value=tName)
             displayTrack(trackRec)
         elif args.split('=')[0].strip() == 'layoutId':
             layoutId = args.split('=')[1].strip()
             log.info(
                 f"Getting track layout info for track layout id {layoutId}")
-            trackLayout = gtdb.getLayout(dbC1, layoutId)
+            trackLayout = gtdb.getLayout(db(), layoutId)
             displayTrackLayout(trackLayout)
         else:  # invalid Args passed
             log.info(
@@ -1288,7 +1381,7 @@ def listTrackCmd(args):
         result = pickTrack()
         log.debug(f"result={result}")
         if result != None:  # User selected a track
-            trackRec = gtdb.getTrack(dbC1, key='trackId', value=result)
+            trackRec = gtdb.getTrack(db(), key='trackId', value=result)
             displayTrack(trackRec)
 
 
@@ -1304,7 +1397,7 @@ def listRaceCollections(args):
     if len(args) > 0 and args.find("=") > 0:  # Have valid Args
         if args.split('=')[0].strip() == 'leagueId':
             id = args.split('=')[1].strip()
-            league = gtdb.getLeague(dbC1, value=id)
+            league = gtdb.getLeague(db(), value=id)
             if league.id != 0:
                 displayCollections(league)
             else:
@@ -1313,7 +1406,7 @@ def listRaceCollections(args):
             return
         if args.split('=')[0].strip() == 'id':
             id = args.split('=')[1].strip()
-            rCollection = gtdb.getRaceCollection(dbC1, id)
+            rCollection = gtdb.getRaceCollection(db(), id)
             if rCollection.id != 0:
                 displayCollection(rCollection)
             else:
@@ -1337,7 +1430,7 @@ def listRaceCollections(args):
             return
 
     log.info(f"Getting collection info for league id {id}")
-    league = gtdb.getLeague(dbC1, value=id)
+    league = gtdb.getLeague(db(), value=id)
     displayCollections(league)
 
 
@@ -1358,7 +1451,7 @@ def pickCar(text='Select a Car', mfgId=0):
     orderBy = "ORDER BY model"
     sql = f"{selectSQL} {fromSQL} {whereSQL} {orderBy}"
     vals = {'mfgID': mfgId}
-    pickList = gtdb.directSql(dbC1, sql, vals)
+    pickList = gtdb.directSql(db(), sql, vals)
     log.info("Displaying cars for use to select")
     result = radiolist_dialog(
         title="Cars",
@@ -1376,7 +1469,7 @@ def pickCarCategory(text='Select a Car Class Category'):
         ClassCat.id user choose
     """
     log.info("Getting car class categories for picklist")
-    pickList = gtdb.getCarCatList(dbC1)
+    pickList = gtdb.getCarCatList(db())
     log.info("Displaying Car Class Categories to user to choose")
     result = radiolist_dialog(
         title="Class Categories",
@@ -1397,7 +1490,7 @@ def pickDriveTrain(text="Select a Drivetrain"):
         int : the drivetrain id user choose. (None if there was not a choice)
     """
     log.info("Getting list of drivetrains")
-    pickList = gtdb.getDriveTrainList(dbC1)
+    pickList = gtdb.getDriveTrainList(db())
     log.info("Display drivetrain dialog box for user to choose")
     result = radiolist_dialog(title="Drivetrains",
                               text=text,
@@ -1414,7 +1507,7 @@ def pickLeague(text='Select a League'):
         League ID user choose
     """
     log.info("Getting leagues for picklist")
-    pickList = gtdb.getLeagueList(dbC1)
+    pickList = gtdb.getLeagueList(db())
     log.info("Displaying leagues for user to choose")
     result = radiolist_dialog(
         title="Leagues",
@@ -1432,7 +1525,7 @@ def pickMfg(text='Select manufacture'):
         text (str, optional): Text in dialog box for user. Defaults to 'Select manufacture'.
     """
     log.info("Getting list of manufactures for user to select")
-    pickList = gtdb.getMfgList(dbC1)
+    pickList = gtdb.getMfgList(db())
     log.info("Display dialog")
     result = radiolist_dialog(title="Manufactures",
                               text=text,
@@ -1443,7 +1536,7 @@ def pickMfg(text='Select manufacture'):
 
 def pickRaceCollection(leagueId, lName, text='Select one'):
     log.info(f"Getting race collections for ({leagueId}) {lName} league")
-    picklist = gtdb.getRaceCollectionList(dbC1, leagueId)
+    picklist = gtdb.getRaceCollectionList(db(), leagueId)
     log.info(f"Displaying collections for user to choose")
     result = radiolist_dialog(title=f"Race Collections for {lName}",
                               text=text,
@@ -1462,7 +1555,7 @@ def pickRaceType(text="Select a Race type"):
         RaceTypeID (int): The choosen Racetype id
     """
     log.info("Getting Race Types for picklist")
-    pickList = gtdb.getRaceTypeList(dbC1)
+    pickList = gtdb.getRaceTypeList(db())
     log.info("Displaying race types for use to choose")
     result = radiolist_dialog(
         title="Race Types",
@@ -1478,7 +1571,7 @@ def pickTrack(text="Select a Track"):
     Returns: the trackID user picked
     """
     log.info("Getting tracks for picklist")
-    pickList = gtdb.getTrackList(dbC1)
+    pickList = gtdb.getTrackList(db())
     log.info("display tracks for user to choose")
     result = radiolist_dialog(
         title="Tracks",
@@ -1504,7 +1597,7 @@ def pickTrackLayout(trackID, trackName, text='Select one'):
     that layouts id, thus not prompting use to choose.
     """
     log.info(f"getting track layouts for trackID:{trackID}")
-    pickList = gtdb.getLayoutList(dbC1, trackID)
+    pickList = gtdb.getLayoutList(db(), trackID)
     if len(pickList) == 1:
         result = pickList[0][0]
         log.info(f"Only one to choose. returning {result}")
@@ -1527,7 +1620,7 @@ def pickWeather(text='Select type of Weather'):
         int: The unique id of the Weather
     """
     log.info("Getting list of weather choices")
-    pickList = gtdb.getWeatherList(dbC1)
+    pickList = gtdb.getWeatherList(db())
     log.info('Displaying weather types for user to choose')
     result = radiolist_dialog(
         title="Weather Types",
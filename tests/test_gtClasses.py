@@ -138,11 +138,36 @@ class TestCustomCarSettings(unittest.TestCase):
         xObj.cat_id = 900
         self.assertEqual(xObj.cat_id,900,"Failed: change id to 900 : Valid id. Object should have been changed")
 
-    def test_dict(self):
+    def test_repr(self):
         xObj = GT.CustCarSettings(id=9,car_id=10,name="I am a name", cat_id=11)
-        xStr=f"CustCarSettings.__dict__ = {xObj.__dict__}"
+        xStr=f"CustCarSettings = {xObj!r}"
         log.info(xStr)
-        print(xStr)
+        self.assertIn("name='I am a name'", xStr)
+        self.assertFalse(hasattr(xObj, '__dict__'))
+        with self.assertRaises(AttributeError):
+            xObj.nmae = "Other name"
+
+    def test_from_row(self):
+        log.info("==== BEGIN Testing - customCarSettings from_row")
+        row = (1, 2, 3, "From db", 500, 450.5, 10, 2, -1, 320, "2.5", "1.9", "1.5",
+               "1.2", "1.0", None, None, "3.9", 1200, 5, "RH", 5.5, 4.5, 320.0, 2.5, 3.5)
+        xObj = GT.CustCarSettings.from_row(row)
+        self.assertEqual(tuple(getattr(xObj, x) for x in GT.CustCarSettings.dbColumns), row)
+        self.assertEqual(repr(GT.CustCarSettings.from_rows([row])[0]), repr(xObj))
+
+        log.info("Properties still validate after from_row")
+        with self.assertRaises(ValueError):
+            xObj.weight = "heavy"
+
+    def test_gearRatios(self):
+        log.info("==== BEGIN Testing - customCarSettings gearRatios")
+        xObj = GT.CustCarSettings(id=999,car_id=0,name="I am a string", cat_id=1)
+        self.assertEqual(xObj.gearRatios, (None,) * 8)
+        xObj.gear_1 = "2.5/100"
+        xObj.final_gear = "3.9"
+        xObj.gear_2 = "short"
+        self.assertEqual(xObj.gearRatios, (2.5, None, None, None, None, None, None, 3.9))
+        self.assertIs(xObj.gearRatios, xObj.gearRatios)
 
     def test_id(self):
         log.info("===== BEGIN Testing - customCarSettings id")
@@ -996,4 +1021,33 @@ class TestCustomCarSettings(unittest.TestCase):
         self.assertEqual(xObj.accel,123.40,"Failed: setting accel to 123.40 : Valid accel value.")
         self.assertEqual(type(xObj.accel),float,"Failed: setting accel to 123.40 : Valid accel value. Accel should be float.")
 
-# End here
\ No newline at end of file
+
+class TestFrozen(unittest.TestCase):
+    def test_frozen(self):
+        log.info("==== BEGIN Testing - Frozen lookup objects")
+        xObj = GT.FrozenCountry(cntryID=1, cntryName="Japan", alpha2="JP", alpha3="JPN", region="Asia")
+        with self.assertRaises(AttributeError):
+            xObj.region = "Europe"
+        with self.assertRaises(AttributeError):
+            del xObj.region
+        self.assertEqual(xObj.region, "Asia")
+
+        log.info("Equal objects have the same hash")
+        self.assertEqual(xObj, GT.freeze(GT.Country(1, "Japan", "JP", "JPN", "Asia")))
+        self.assertEqual(len({xObj, GT.FrozenCountry(1, "Japan", "JP", "JPN", "Asia")}), 1)
+        self.assertNotEqual(GT.FrozenWeather(1, "Dry"), GT.FrozenRaceType(1, "Dry"))
+
+        log.info("freeze copies all the attributes")
+        xObj = GT.freeze(GT.ClassCat(id=3, name="N300", desc="Normal", sortOrder=4))
+        self.assertIsInstance(xObj, GT.ClassCat)
+        self.assertEqual(xObj.sortOrder, 4)
+        self.assertIs(GT.freeze(xObj), xObj)
+
+    def test_slots(self):
+        log.info("==== BEGIN Testing - Entity classes have no __dict__")
+        xObj = GT.Race(id=1, name="Race 1", trackLayout=None, raceCollection=None,
+                       raceType=GT.FrozenRaceType(1, "Race"), weather=GT.FrozenWeather(1, "Dry"))
+        self.assertFalse(hasattr(xObj, '__dict__'))
+        self.assertFalse(hasattr(xObj.weather, '__dict__'))
+        with self.assertRaises(AttributeError):
+            xObj.nmae = "Race 2"
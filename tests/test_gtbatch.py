@@ -0,0 +1,93 @@
+# python -m unittest tests.test_gtbatch
+import unittest
+from pathlib import Path
+import io
+import json
+import logging
+
+# App Testing requirements
+from GranT import gtdbV3
+from GranT import gtbatch
+
+_gtPath = Path.cwd()
+_gtScripts = _gtPath / 'Scripts'
+
+logger = logging.getLogger()
+
+
+def _newDB():
+    d1 = gtdbV3.create_connection(":memory:")
+    gtdbV3.initDB(d1, scriptPath=f'{_gtScripts}')
+    gtdbV3._exeScriptFile(
+        d1, scriptFileName=f'{_gtScripts / "createUserTables.sql"}')
+    return d1
+
+
+class TestBatch(unittest.TestCase):
+    def test_runCommand(self):
+        logger.info("==== BEGIN Run single commands")
+        d1 = _newDB()
+        result = gtbatch.runCommand(d1, "list leagues")
+        logger.info(f"result = {result}")
+        self.assertEqual(result['code'], 0)
+        self.assertEqual(result['result'][0], [2, 'Beginner'])
+
+        result = gtbatch.runCommand(d1, ['list', 'track', 'name=Dragon Tail'])
+        self.assertEqual(result['result']['id'], 2)
+        self.assertEqual(result['result']['country']['alpha2'], 'HR')
+        self.assertEqual(result['command'], "list track 'name=Dragon Tail'")
+
+        for command, error in (("list track id=999", "Track not found"),
+                               ("list track id=x", "id must be a number"),
+                               ("list track size=3", "Unknown argument size"),
+                               ("list nothing", "Unknown list object nothing"),
+                               ("delete race id=1", "Unknown command delete"),
+                               ("list", "Command needs an action and an object"),
+                               ("add race collectionId=2 layoutId=5 weatherId=1 raceTypeId=1",
+                                "raceNum is required")):
+            with self.subTest(command=command):
+                result = gtbatch.runCommand(d1, command)
+                self.assertEqual(result['code'], 1)
+                self.assertEqual(result['error'], error)
+
+    def test_runBatch(self):
+        logger.info("==== BEGIN Run a batch of commands")
+        d1 = _newDB()
+        commands = ['# Comment', '',
+                    'add collection leagueId=1 name="ZZ Cup" prize1=1000',
+                    'list collection leagueId=1',
+                    'add race collectionId=1 layoutId=5 weatherId=1 raceTypeId=1 raceNum=99 time=09:30',
+                    'add race collectionId=1 layoutId=5 weatherId=1 raceTypeId=1 raceNum=98 time=9am',
+                    'add car mfgId=1 classId=3 driveTrainId=1 name="ZZ Car" year=2001',
+                    'add race name="No close',
+                    'exit',
+                    'list leagues']
+        out = io.StringIO()
+        result = gtbatch.runBatch(d1, commands, out)
+        logger.info(f"result = {result}")
+        self.assertEqual(result, (6, 2))
+        records = [json.loads(x) for x in out.getvalue().splitlines()]
+        self.assertEqual([x['line'] for x in records], [3, 4, 5, 6, 7, 8])
+        self.assertEqual([x['code'] for x in records], [0, 0, 0, 1, 0, 1])
+        self.assertIn('ZZ Cup', [x[1] for x in records[1]['result']])
+        self.assertEqual(records[3]['error'], "time must be HH:MM")
+        races = gtdbV3.getRacesForCollection(d1, 1)
+        self.assertIn('Race 99', [x.name for x in races])
+        self.assertEqual(d1.execute("SELECT model, year FROM car").fetchall(), [('ZZ Car', 2001)])
+
+        logger.info("Any exception from a command is reported against its line")
+
+        def broken(dbConn, args):
+            raise KeyError('boom')
+
+        saved = gtbatch._commands['list']['leagues']
+        gtbatch._commands['list']['leagues'] = broken
+        try:
+            out = io.StringIO()
+            result = gtbatch.runBatch(d1, ['list leagues', 'list collection leagueId=1'], out)
+        finally:
+            gtbatch._commands['list']['leagues'] = saved
+        self.assertEqual(result, (2, 1))
+        records = [json.loads(x) for x in out.getvalue().splitlines()]
+        self.assertEqual([(x['line'], x['code']) for x in records], [(1, 1), (2, 0)])
+        self.assertEqual(records[0]['error'], "KeyError: 'boom'")
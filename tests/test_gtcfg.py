@@ -0,0 +1,81 @@
+# python -m unittest tests.test_gtcfg
+import unittest
+from pathlib import Path
+import logging
+import tempfile
+
+# App Testing requirements
+from GranT import gtcfg
+
+logger = logging.getLogger()
+
+_cfgText = """[database]
+dbFile = /data/GTTracking.db
+traceSql = yes
+cachedStatements = 64
+
+[logging]
+logDir = /logs
+"""
+
+
+class TestConfig(unittest.TestCase):
+    def test_lazyLoad(self):
+        logger.info("==== BEGIN Config is loaded on first use")
+        with tempfile.TemporaryDirectory() as tmpDir:
+            cfgFile = Path(tmpDir) / 'test.conf'
+            cfg = gtcfg.GTConfig(environ={'GTTRACKING_CONF': f'{cfgFile}'})
+            cfg.curcfg['version'] = 'test'
+            # Written after the object is created, read on first use
+            cfgFile.write_text(_cfgText)
+            self.assertIsNone(cfg._config)
+            self.assertEqual(cfg.dbcfg['dbFile'], '/data/GTTracking.db')
+            self.assertIs(cfg.dbcfg['traceSql'], True)
+            self.assertEqual(cfg.dbcfg['cachedStatements'], 64)
+            self.assertIsNone(cfg.dbcfg['profile'])
+            self.assertEqual(cfg.logcfg, {'logDir': '/logs', 'level': 'INFO'})
+            self.assertEqual(cfg.curcfg, {'version': 'test'})
+
+            logger.info("Parsed values are cached")
+            cfgFile.write_text("[database]\ndbFile = other.db\n")
+            self.assertEqual(cfg.dbcfg['dbFile'], '/data/GTTracking.db')
+            cfg.load()
+            self.assertEqual(cfg.dbcfg['dbFile'], 'other.db')
+
+    def test_envOverride(self):
+        logger.info("==== BEGIN Environment overrides")
+        with tempfile.TemporaryDirectory() as tmpDir:
+            cfgFile = Path(tmpDir) / 'test.conf'
+            cfgFile.write_text(_cfgText)
+            cfg = gtcfg.GTConfig(cfgFile, environ={'GT_DATABASE_TRACESQL': 'no',
+                                                   'GT_DATABASE_PROFILE': 'memory',
+                                                   'GT_LOGGING_LEVEL': 'DEBUG'})
+            self.assertIs(cfg.dbcfg['traceSql'], False)
+            self.assertEqual(cfg.dbcfg['profile'], 'memory')
+            self.assertEqual(cfg.dbcfg['cachedStatements'], 64)
+            self.assertEqual(cfg.logcfg['level'], 'DEBUG')
+
+            logger.info("% in an environment value is kept as is")
+            cfg = gtcfg.GTConfig(cfgFile, environ={'GT_DATABASE_DBFILE': '/data/100%/GT.db',
+                                                   'GT_LOGGING_LOGDIR': '%(home)s/logs'})
+            self.assertEqual(cfg.dbcfg['dbFile'], '/data/100%/GT.db')
+            self.assertEqual(cfg.logcfg['logDir'], '%(home)s/logs')
+            self.assertEqual(cfg.config.get('database', 'dbfile'), '/data/100%/GT.db')
+
+    def test_loadConfig(self):
+        logger.info("==== BEGIN Module level config")
+        saved = gtcfg._current
+        try:
+            gtcfg._current = None
+            gtcfg.curcfg['gtPath'] = 'here'
+            self.assertIsNone(gtcfg._current._config)
+            with tempfile.TemporaryDirectory() as tmpDir:
+                cfgFile = Path(tmpDir) / 'test.conf'
+                cfgFile.write_text(_cfgText)
+                gtcfg.load_config(cfgFile, environ={})
+            self.assertEqual(gtcfg.dbcfg['dbFile'], '/data/GTTracking.db')
+            self.assertEqual(gtcfg.curcfg, {'gtPath': 'here'})
+            with self.assertRaises(AttributeError):
+                gtcfg.nothing
+        finally:
+            gtcfg._current = saved
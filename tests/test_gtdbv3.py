@@ -5,11 +5,14 @@ import unittest
 from pathlib import Path
 import logging
 import os
+import sqlite3
 import sys
+import tempfile
 from datetime import datetime
 
 # App Testing requirements
 from GranT import gtdbV3
+from GranT import gtschema
 from GranT import GTClasses as GT
 
 _gtPath = Path.cwd()
@@ -286,6 +289,28 @@ class TestCarCat(unittest.TestCase):
         logger.info("==== END Get Car category tests")
 
 
+class TestConnectionProfile(unittest.TestCase):
+    def test_profiles(self):
+        logger.info("==== BEGIN Connection profiles")
+        with tempfile.TemporaryDirectory() as tmpDir:
+            dbFile = Path(tmpDir) / 'profile.db'
+            d1 = gtdbV3.create_connection(f'{dbFile}', profile='read-heavy')
+            self.assertEqual(d1.execute("PRAGMA journal_mode").fetchone()[0], 'wal')
+            self.assertEqual(d1.execute("PRAGMA synchronous").fetchone()[0], 1)
+            self.assertEqual(d1.execute("PRAGMA busy_timeout").fetchone()[0], 5000)
+            self.assertEqual(d1.execute("PRAGMA foreign_keys").fetchone()[0], 1)
+            d1.close()
+
+        d2 = gtdbV3.create_connection(":memory:", profile='memory')
+        self.assertEqual(d2.execute("PRAGMA journal_mode").fetchone()[0], 'memory')
+        self.assertEqual(d2.execute("PRAGMA temp_store").fetchone()[0], 2)
+
+        logger.info("Unknown profile")
+        with self.assertRaises(SystemExit):
+            gtdbV3.create_connection(":memory:", profile='fast')
+        logger.info(f"==== END Connection profiles\n")
+
+
 class TestCountry(unittest.TestCase):
     def test_getCountry(self):
         logger.info("==== BEGIN Get Country")
@@ -322,10 +347,13 @@ class TestCarSetting(unittest.TestCase):
         gtdbV3._exeScriptFile(d1, scriptFileName=_gtPath /
                               'tests' / 'test_carData.sql')
 
+        # Gear ratio columns
+        gtschema.migrate(d1, scriptPath=_gtScripts)
+
         logger.info("TEST Add CarSetting: Duplicate name for same Car ID")
         testVal = 'IB3F0SK1'
         xObj = GT.CustCarSettings(id=0,car_id=1,name=testVal,cat_id=1)
-        logger.info(f"xObj={xObj.__dict__}")
+        logger.info(f"xObj={xObj!r}")
         result = gtdbV3.addCarSetting(d1, xObj)
         logger.info(f"Valiation result={result}")
         self.assertEqual(
@@ -435,15 +463,46 @@ class TestCarSetting(unittest.TestCase):
         logger.info("TEST Get non existing CarSetting")
         testVal = 999999
         xObj = gtdbV3.getCarSetting(d1,id=testVal)
-        logger.info(f"CustCarSetting Object={xObj.__dict__}")
+        logger.info(f"CustCarSetting Object={xObj!r}")
         self.assertEqual(xObj.id,0, "Failed Get non existing CarSetting.")
 
         logger.info("TEST Get existing CarSetting")
         testVal = 1
         xObj = gtdbV3.getCarSetting(d1,id=testVal)
-        logger.info(f"CustCarSetting Object={xObj.__dict__}")
+        logger.info(f"CustCarSetting Object={xObj!r}")
         self.assertEqual(xObj.id,1, "Failed Get existing CarSetting.")
 
+        logger.info("TEST Values are in the right attributes")
+        testVal = 3
+        xObj = gtdbV3.getCarSetting(d1,id=testVal)
+        row = d1.execute("SELECT max_speed, cornering, stability FROM car_setting WHERE id = ?", (testVal,)).fetchone()
+        self.assertEqual((xObj.max_speed, xObj.cornering, xObj.stability), row,
+                         "Failed Get existing CarSetting. Values in the wrong attributes")
+
+    def test_getCarSettingsForCar(self):
+        logger.info("===== BEGIN testing get Car settings for a car")
+        d1 = gtdbV3.create_connection(":memory:")
+        gtdbV3.initDB(d1, scriptPath=f'{_gtScripts}')
+        gtdbV3._exeScriptFile(d1, scriptFileName=_gtScripts /
+                              'createUserTables.sql')
+        gtdbV3._exeScriptFile(d1, scriptFileName=_gtPath /
+                              'tests' / 'test_carData.sql')
+
+        logger.info("TEST Every car")
+        xList = gtdbV3.getCarSettingsForCar(d1)
+        self.assertEqual(len(xList), d1.execute("SELECT count(*) FROM car_setting").fetchone()[0])
+        for xObj in xList:
+            with self.subTest(id=xObj.id):
+                self.assertEqual(repr(xObj), repr(gtdbV3.getCarSetting(d1, id=xObj.id)))
+
+        logger.info("TEST One car")
+        carId = xList[0].car_id
+        xList = gtdbV3.getCarSettingsForCar(d1, carId)
+        self.assertEqual([x.id for x in xList], [x[0] for x in gtdbV3.getCarSettingList(d1, carId)])
+
+        logger.info("TEST Car without settings")
+        self.assertEqual(gtdbV3.getCarSettingsForCar(d1, 999999), [])
+
     def test_updateCarSetting(self):
         logger.info("===== BEGIN testing update Car setting. Assumption getCarSetting works")
         d1 = gtdbV3.create_connection(":memory:")
@@ -456,15 +515,18 @@ class TestCarSetting(unittest.TestCase):
         gtdbV3._exeScriptFile(d1, scriptFileName=_gtPath /
                               'tests' / 'test_carData.sql')
 
+        # Gear ratio columns
+        gtschema.migrate(d1, scriptPath=_gtScripts)
+
         logger.info("Update CarSetting: Duplicate name for same Car ID ")
         logger.info("Getting dummy data")
         dummyData = gtdbV3.getCarSetting(d1,id=1)
         logger.info("Getting car setting id 5 to change")
         xObj = gtdbV3.getCarSetting(d1,id=5)
-        logger.info(f"Before memory Change = {xObj.__dict__}")
+        logger.info(f"Before memory Change = {xObj!r}")
         xObj.car_id = dummyData.car_id
         xObj.name = dummyData.name
-        logger.info(f"After memory Change = {xObj.__dict__}")
+        logger.info(f"After memory Change = {xObj!r}")
         logger.info(f"Attempt update")
         retVal = gtdbV3.updateCarSetting(d1,xObj)
         logger.info(f"return value = {retVal}")
@@ -475,10 +537,10 @@ class TestCarSetting(unittest.TestCase):
         dummyData = gtdbV3.getCarSetting(d1,id=1)
         logger.info("Getting car setting id 5 to change")
         xObj = gtdbV3.getCarSetting(d1,id=5)
-        logger.info(f"Before memory Change = {xObj.__dict__}")
+        logger.info(f"Before memory Change = {xObj!r}")
         xObj.car_id = 9999999
         xObj.name = "This car setting should not be saved"
-        logger.info(f"After memory Change = {xObj.__dict__}")
+        logger.info(f"After memory Change = {xObj!r}")
         logger.info(f"Attempt update")
         retVal = gtdbV3.updateCarSetting(d1,xObj)
         logger.info(f"return value = {retVal}")
@@ -489,9 +551,9 @@ class TestCarSetting(unittest.TestCase):
         dummyData = gtdbV3.getCarSetting(d1,id=1)
         logger.info("Getting car setting id 5 to change")
         xObj = gtdbV3.getCarSetting(d1,id=5)
-        logger.info(f"Before memory Change = {xObj.__dict__}")
+        logger.info(f"Before memory Change = {xObj!r}")
         xObj.cat_id = 99999
-        logger.info(f"After memory Change = {xObj.__dict__}")
+        logger.info(f"After memory Change = {xObj!r}")
         logger.info(f"Attempt update")
         retVal = gtdbV3.updateCarSetting(d1,xObj)
         logger.info(f"return value = {retVal}")
@@ -502,9 +564,9 @@ class TestCarSetting(unittest.TestCase):
         dummyData = gtdbV3.getCarSetting(d1,id=1)
         logger.info("Getting car setting id 5 to change")
         xObj = gtdbV3.getCarSetting(d1,id=5)
-        logger.info(f"Before memory Change = {xObj.__dict__}")
+        logger.info(f"Before memory Change = {xObj!r}")
         xObj.tire_code = "AZZ"
-        logger.info(f"After memory Change = {xObj.__dict__}")
+        logger.info(f"After memory Change = {xObj!r}")
         logger.info(f"Attempt update")
         retVal = gtdbV3.updateCarSetting(d1,xObj)
         logger.info(f"return value = {retVal}")
@@ -515,17 +577,17 @@ class TestCarSetting(unittest.TestCase):
         dummyData = gtdbV3.getCarSetting(d1,id=1)
         logger.info("Getting car setting id 5 to change")
         xObj = gtdbV3.getCarSetting(d1,id=5)
-        logger.info(f"Before memory Change = {xObj.__dict__}")
+        logger.info(f"Before memory Change = {xObj!r}")
         xName = "My Name is being changed"
         xObj.name = xName
-        logger.info(f"After memory Change = {xObj.__dict__}")
+        logger.info(f"After memory Change = {xObj!r}")
         logger.info(f"Attempt update")
         retVal = gtdbV3.updateCarSetting(d1,xObj)
         logger.info(f"return value = {retVal}")
         self.assertEqual(retVal[0],0, "Failed: Update CarSetting: Name changed update failed")
         logger.info("Confirm commited to db")
         tempObj = gtdbV3.getCarSetting(d1,id=5)
-        logger.info(f"From db = {xObj.__dict__}")
+        logger.info(f"From db = {xObj!r}")
         self.assertEqual(tempObj.name,xName, "Failed: Update CarSetting: get from db different")
 
 class TestCircuit(unittest.TestCase):
@@ -605,6 +667,36 @@ class TestDriveTrain(unittest.TestCase):
             xObj.id, 0, "Failed Get non existing Drivetrain by id. Expecting id=0")
 
 
+class TestIndexes(unittest.TestCase):
+    def test_adviseIndexes(self):
+        logger.info("==== BEGIN Index advisor")
+        d1 = gtdbV3.create_connection(":memory:")
+        gtschema.migrate(d1, scriptPath=_gtScripts)
+
+        logger.info("Foreign key lookups use an index")
+        advice = gtdbV3.adviseIndexes(d1)
+        logger.info(f"advice = {advice}")
+        self.assertEqual(advice, [])
+
+        logger.info("Dropped index is reported")
+        d1.execute("DROP INDEX race_rc_id_name")
+        advice = gtdbV3.adviseIndexes(d1, {'raceList': gtdbV3._SQL['getRaceList']})
+        # Plan text differs between sqlite versions. "SCAN r" or "SCAN TABLE race AS r"
+        self.assertEqual([x[0] for x in advice], ['raceList'])
+        detail = advice[0][1].split()
+        self.assertEqual(detail[0], 'SCAN')
+        self.assertEqual(detail[-1], 'r')
+        self.assertNotIn('INDEX', detail)
+
+        logger.info("addIndexes.sql puts it back and can be run again")
+        for x in range(2):
+            gtdbV3._exeScriptFile(
+                d1, scriptFileName=f'{_gtScripts / "addIndexes.sql"}')
+        self.assertEqual(gtdbV3.adviseIndexes(
+            d1, {'raceList': gtdbV3._SQL['getRaceList']}), [])
+        logger.info(f"==== END Index advisor\n")
+
+
 class TestLeagues(unittest.TestCase):
     def test_getLeague(self):
         logger.info("==== BEGIN Get/read League")
@@ -647,6 +739,45 @@ class TestLeagues(unittest.TestCase):
             len(testList), 1, "Failed Get League List. returned zero rows")
 
 
+class TestLookupCache(unittest.TestCase):
+    def test_lookupCache(self):
+        logger.info("==== BEGIN Lookup cache")
+        d1 = gtdbV3.create_connection(":memory:")
+        gtdbV3.initDB(d1, scriptPath=f'{_gtScripts}')
+
+        logger.info("Repeated lookups return the same object")
+        self.assertIs(gtdbV3.getCountry(d1, 1), gtdbV3.getCountry(d1, '1'))
+        self.assertIs(gtdbV3.getCarCat(d1, 1), gtdbV3.getCarCat(d1, 1))
+
+        logger.info("DML against a lookup table refreshes the cache")
+        gtdbV3._exeDML(d1, "UPDATE weather SET name = ? WHERE id = ?",
+                       ('ZZCacheTest', 1))
+        self.assertEqual(gtdbV3.getWeather(d1, 1).name, 'ZZCacheTest')
+
+        logger.info("Cleared cache is rebuilt on next lookup")
+        gtdbV3.clearLookupCache(d1)
+        self.assertEqual(d1.lookupCache, {})
+        self.assertEqual(gtdbV3.getWeather(d1, 1).name, 'ZZCacheTest')
+        self.assertEqual(gtdbV3.getWeather(d1, 99999).id, 0)
+
+        logger.info("Plain sqlite3 connections bypass the cache")
+        d2 = sqlite3.connect(":memory:")
+        gtdbV3.initDB(d2, scriptPath=f'{_gtScripts}')
+        self.assertEqual(gtdbV3.getCountry(d2, 1).id, 1)
+
+        logger.info("A table cleared by another thread while loading is still returned")
+
+        class ClearedCache(dict):
+            def __setitem__(self, key, value):  # clearLookupCache right after the store
+                super().__setitem__(key, value)
+                self.clear()
+
+        d1.lookupCache = ClearedCache()
+        self.assertEqual(gtdbV3.getWeather(d1, 1).name, 'ZZCacheTest')
+
+        logger.info(f"==== END Lookup cache\n")
+
+
 class TestMfg(unittest.TestCase):
 
     def test_addMfg(self):
@@ -837,6 +968,57 @@ class TestMfg(unittest.TestCase):
                                 "Failed: Manufacture list should be 5 or greater rows")
 
 
+class TestPaging(unittest.TestCase):
+    def test_pageSql(self):
+        logger.info("==== BEGIN Keyset pagination")
+        d1 = gtdbV3.create_connection(":memory:")
+        gtdbV3.initDB(d1, scriptPath=f'{_gtScripts}')
+        # Same names in a collection so the pages have to use the id as well
+        d1.executemany("INSERT INTO race (name, tl_id, rc_id, weather_id, type_id) VALUES (?, 5, 2, 1, 1)",
+                       [(f"Race {x % 3}",) for x in range(20)])
+        d1.commit()
+
+        expected = [x.id for x in sorted(gtdbV3.getRacesForCollection(d1, 2), key=lambda r: (r.name, r.id))]
+        for pageSize in (1, 7, 100):
+            with self.subTest(pageSize=pageSize):
+                pages = list(gtdbV3.pageSql(d1, 'getRacesForCollection', {'rcId': 2}, pageSize))
+                self.assertTrue(all(len(x) == pageSize for x in pages[:-1]))
+                self.assertEqual([row[0] for page in pages for row in page], expected)
+                races = list(gtdbV3.iterRacesForCollection(d1, 2, pageSize))
+                self.assertEqual([x.id for x in races], expected)
+
+        logger.info("Every list matches its full query")
+        trackIds = [x[0] for x in gtdbV3.getTrackList(d1)]
+        pages = gtdbV3.pageSql(d1, 'getTrackList', {}, pageSize=5)
+        self.assertEqual([row[0] for page in pages for row in page], trackIds)
+        collections = gtdbV3.getRaceCollectionList(d1, 1)
+        pages = gtdbV3.pageSql(d1, 'getRaceCollectionList', {'leagueId': 1}, pageSize=2)
+        self.assertEqual([row for page in pages for row in page], collections)
+        self.assertEqual(list(gtdbV3.pageSql(d1, 'getRaceCollectionList', {'leagueId': 999})), [])
+
+        logger.info("Collections without a name do not end the list")
+        d1.executemany("INSERT INTO race_collection (league_id, name, prize1, prize2, prize3) VALUES (1, ?, 0, 0, 0)",
+                       [(None,), (None,), ('',), ('A',)])
+        d1.commit()
+        expected = [x[0] for x in d1.execute(
+            "SELECT id FROM race_collection WHERE league_id = 1 ORDER BY coalesce(name, ''), id")]
+        for pageSize in (1, 2):
+            with self.subTest(pageSize=pageSize):
+                pages = gtdbV3.pageSql(d1, 'getRaceCollectionList', {'leagueId': 1}, pageSize)
+                self.assertEqual([row[0] for page in pages for row in page], expected)
+
+    def test_directSqlIter(self):
+        logger.info("==== BEGIN Stream rows")
+        d1 = gtdbV3.create_connection(":memory:")
+        gtdbV3.initDB(d1, scriptPath=f'{_gtScripts}')
+        sql = "SELECT id, name FROM race ORDER BY id"
+        rows = gtdbV3.directSqlIter(d1, sql, (), size=10)
+        first = next(rows)
+        logger.info("Other queries can run while the rows are streamed")
+        self.assertEqual(gtdbV3.getRace(d1, 5).id, 5)
+        self.assertEqual([first] + list(rows), gtdbV3.directSql(d1, sql, ()))
+
+
 class TestRaceCollection(unittest.TestCase):
 
     def test_addRaceCollection(self):
@@ -962,6 +1144,9 @@ class TestRaceCollection(unittest.TestCase):
         testList = gtdbV3.getRaceCollectionList(d1, leagueId=testVal)
         logger.info(f"testList = {testList}")
         self.assertEqual(testList[0][0], 12, "Failed. First row incorrect")
+        for row in testList:
+            self.assertEqual(row[7], len(gtdbV3.getRaceList(d1, row[0])),
+                             "Failed. Race count incorrect")
 
         logger.info("Getting list for non existing league")
         testVal = 9999  # leagueId 10 does not exist
@@ -1185,6 +1370,12 @@ class TestRace(unittest.TestCase):
         logger.info(f"Result = {xObj}")
         self.assertEqual(
             xObj.id, testVal, f"Failed Get Race : Existing Race by ID. Should be {testVal}")
+        self.assertEqual(xObj.trackLayout.track.name, 'Northern Isle Speedway',
+                         "Failed Get Race : Track layout not loaded with race")
+        self.assertEqual(xObj.raceCollection.league.id, 2,
+                         "Failed Get Race : Race collection not loaded with race")
+        self.assertEqual(xObj.weather.id, 1,
+                         "Failed Get Race : Weather not loaded with race")
 
         logger.info("Get Race : Non Existing Race by ID")
         testVal = 999999
@@ -1196,6 +1387,114 @@ class TestRace(unittest.TestCase):
 
         logger.info("==== END Get Race")
 
+    def test_getRaces(self):
+        logger.info("==== BEGIN Get Races")
+        d1 = gtdbV3.create_connection(":memory:")
+        gtdbV3.initDB(d1, scriptPath=f'{_gtScripts}')
+
+        logger.info("Get Races : Existing and non existing race ids")
+        testVal = [3, 1, 999999, 2]
+        xList = gtdbV3.getRaces(d1, testVal)
+        logger.info(f"Result = {xList}")
+        self.assertEqual([x.id for x in xList], [3, 1, 2],
+                         "Failed Get Races : Should be in order of ids passed without non existing races")
+        self.assertIs(xList[0].raceCollection, xList[1].raceCollection,
+                      "Failed Get Races : Races in the same collection should share the collection object")
+
+        logger.info("Get Races : Empty list")
+        self.assertEqual(gtdbV3.getRaces(d1, []), [])
+
+        logger.info("==== END Get Races")
+
+    def test_getRacesForCollection(self):
+        logger.info("==== BEGIN Get Races for collection")
+        d1 = gtdbV3.create_connection(":memory:")
+        gtdbV3.initDB(d1, scriptPath=f'{_gtScripts}')
+
+        logger.info("Get Races for collection : Existing collection")
+        testVal = 1
+        xList = gtdbV3.getRacesForCollection(d1, testVal)
+        raceList = gtdbV3.getRaceList(d1, testVal)
+        self.assertEqual([x.id for x in xList], [x[0] for x in raceList],
+                         "Failed Get Races for collection : Should match getRaceList")
+
+        logger.info("Get Races for collection : Lookup objects are shared")
+        countries = {id(x.trackLayout.track.country) for x in xList}
+        self.assertEqual(len(countries), len({x.trackLayout.track.country.id for x in xList}))
+        with self.assertRaises(AttributeError):
+            xList[0].weather.name = "Changed"
+
+        logger.info("Get Races for collection : Non existing collection")
+        testVal = 9999
+        xList = gtdbV3.getRacesForCollection(d1, testVal)
+        self.assertEqual(len(xList), 0,
+                         "Failed Get Races for collection : Non existing collection")
+
+        logger.info("==== END Get Races for collection")
+
+
+class TestRaceResult(unittest.TestCase):
+    def setUp(self):
+        self.d1 = gtdbV3.create_connection(":memory:")
+        gtschema.migrate(self.d1, scriptPath=_gtScripts)
+        gtdbV3._exeScriptFile(self.d1, scriptFileName=_gtPath / 'tests' / 'test_carData.sql')
+
+    def test_appendLapTimes(self):
+        logger.info("==== BEGIN Append lap times")
+        laps = [(1, setting, lap, 90000 + setting * 100 + lap) for setting in (2, 3) for lap in range(1, 26)]
+        result = gtdbV3.appendLapTimes(self.d1, iter(laps), batchSize=10)
+        logger.info(f"result = {result}")
+        self.assertEqual(result, [0, "Saved 50 lap time(s)"])
+        self.assertFalse(self.d1.in_transaction)
+        self.assertEqual(gtdbV3.getLapTimes(self.d1, 1, 3)[:2], [(1, 90301), (2, 90302)])
+
+        logger.info("Results are added for the laps, best lap comes from the laps")
+        results = gtdbV3.getRaceResults(self.d1, 1)
+        self.assertEqual([(x[1], x[5], x[6]) for x in results], [(2, 90201, 25), (3, 90301, 25)])
+
+        logger.info("A duplicate lap rolls back its batch only")
+        laps = [(1, 2, lap, 1000) for lap in range(26, 36)] + [(1, 2, 1, 1000)]
+        result = gtdbV3.appendLapTimes(self.d1, laps, batchSize=10)
+        logger.info(f"result = {result}")
+        self.assertEqual(result[0], 2)
+        self.assertEqual(len(gtdbV3.getLapTimes(self.d1, 1, 2)), 35)
+
+        logger.info("Race must exist")
+        result = gtdbV3.appendLapTimes(self.d1, [(999999, 2, 1, 1000)])
+        self.assertEqual(result[0], 2)
+
+        logger.info("Inside a transaction the batches go with its rollback")
+        with self.assertLogs('GranT.gtdbV3', level='WARNING'):
+            with gtdbV3.transaction(self.d1) as tx:
+                result = gtdbV3.appendLapTimes(self.d1, [(1, 2, 90 + x, 1000) for x in range(5)], batchSize=2)
+                self.assertEqual(result[0], 0)
+                tx.rollback()
+        self.assertEqual(len(gtdbV3.getLapTimes(self.d1, 1, 2)), 35)
+
+        logger.info("Deleting a car setting deletes its results and laps")
+        gtdbV3.deleteCarSetting(self.d1, id=3)
+        self.assertEqual([x[1] for x in gtdbV3.getRaceResults(self.d1, 1)], [2])
+        self.assertEqual(gtdbV3.getLapTimes(self.d1, 1, 3), [])
+
+    def test_addRaceResults(self):
+        logger.info("==== BEGIN Add race results")
+        result = gtdbV3.addRaceResults(self.d1, [(1, 3, 2, 600000, None), (1, 2, 1, 590000, 58000)])
+        logger.info(f"result = {result}")
+        self.assertEqual(result[0], 0)
+        results = gtdbV3.getRaceResults(self.d1, 1)
+        self.assertEqual([(x[0], x[1]) for x in results], [(1, 2), (2, 3)])
+        self.assertEqual(results[0][5], 58000)
+
+        logger.info("Saving again replaces the result")
+        gtdbV3.addRaceResults(self.d1, [(1, 3, 1, 580000, 57000)])
+        self.assertEqual(gtdbV3.getRaceResults(self.d1, 1)[0][1:2] + gtdbV3.getRaceResults(self.d1, 1)[0][4:6],
+                         (3, 580000, 57000))
+
+        logger.info("Car setting must exist. Nothing is saved")
+        result = gtdbV3.addRaceResults(self.d1, [(2, 2, 1, 1, 1), (2, 999999, 2, 1, 1)])
+        self.assertEqual(result[0], 2)
+        self.assertEqual(gtdbV3.getRaceResults(self.d1, 2), [])
+
 
 class TestRacetype(unittest.TestCase):
     def test_getRaceType(self):
@@ -1220,6 +1519,46 @@ class TestRacetype(unittest.TestCase):
         logger.info("=== END Get/read Race Type")
 
 
+class TestSqlRegistry(unittest.TestCase):
+    def test_namedStatements(self):
+        logger.info("==== BEGIN Named statements")
+        d1 = gtdbV3.create_connection(":memory:", cachedStatements=16)
+        gtschema.migrate(d1, scriptPath=_gtScripts)
+
+        logger.info("Every named statement prepares against the schema")
+        for name, sql in gtdbV3._SQL.items():
+            with self.subTest(name=name):
+                self.assertTrue(gtdbV3.explainSql(d1, sql))
+
+        logger.info("Statements reuse the connection cursor")
+        cur = d1.sharedCursor()
+        gtdbV3.getCarCatList(d1)
+        gtdbV3.getTrack(d1, key='track', value='Autopolis')
+        self.assertIs(d1.sharedCursor(), cur)
+        logger.info(f"==== END Named statements\n")
+
+
+class TestSqlTrace(unittest.TestCase):
+    def test_setSqlTrace(self):
+        logger.info("==== BEGIN Sql trace")
+        d1 = gtdbV3.create_connection(":memory:")
+        self.assertTrue(gtdbV3.setSqlTrace(d1, True))
+        self.assertFalse(gtdbV3.setSqlTrace(d1, False))
+
+        logger.info("Trace is not installed when DEBUG logging is off")
+        gtLogger = logging.getLogger('GranT.gtdbV3')
+        gtLogger.setLevel(logging.INFO)
+        try:
+            self.assertFalse(gtdbV3.setSqlTrace(d1, True))
+        finally:
+            gtLogger.setLevel(logging.NOTSET)
+
+        d2 = gtdbV3.create_connection(":memory:", traceSql=True)
+        gtdbV3.initDB(d2, scriptPath=f'{_gtScripts}')
+        self.assertEqual(gtdbV3.getWeather(d2, 1).id, 1)
+        logger.info(f"==== END Sql trace\n")
+
+
 class TestTireList(unittest.TestCase):
     def test_getTireList(self):
         logger.info("==== BEGIN TEST Tire List")
@@ -1373,6 +1712,22 @@ class TestTrack(unittest.TestCase):
         self.assertEqual(
             testList[0][0], testVal, "Failed. First track or should have track id 17")
 
+        logger.info("Tracks without layouts are listed")
+        d1.execute("INSERT INTO track (name) VALUES ('ZZ No Layouts')")
+        d1.execute("INSERT INTO track (name) VALUES ('ZZ No Layouts 2')")
+        d1.commit()
+        testList = gtdbV3.getTrackList(d1)
+        self.assertEqual(len(testList), 31)
+        self.assertEqual(testList[-1][1:], ('ZZ No Layouts 2', 0))
+
+        logger.info("Track list with the country")
+        detailList = gtdbV3.getTrackList(d1, detail=True)
+        self.assertEqual([x[0] for x in detailList], [x[0] for x in testList])
+        self.assertEqual(detailList[0], (17, 'Alsace - Village', 'Europe', 'France', 2))
+        self.assertEqual(detailList[-1][2:], (None, None, 0))
+        pages = gtdbV3.pageSql(d1, 'getTrackList.detail', {}, pageSize=4)
+        self.assertEqual([row for page in pages for row in page], detailList)
+
         logger.info(f"==== END get Tracks\n")
 
     def test_updateTrack(self):
@@ -1530,6 +1885,10 @@ class TestTrackLayout(unittest.TestCase):
         logger.info(f"layoutList={layoutList}")
         self.assertEqual(layoutList[0][0], 18,
                          "Failed getting correct trackLayoutId from list")
+        raceCount = d1.execute(
+            "SELECT count(*) FROM race WHERE tl_id = ?", (layoutList[0][0],)).fetchone()[0]
+        self.assertEqual(layoutList[0][3], raceCount,
+                         "Failed getting correct race count from list")
 
         logger.info("==== END get Layout List")
 
@@ -1612,6 +1971,116 @@ class TestTrackLayout(unittest.TestCase):
         self.assertNotEqual(result[0], 0)
 
 
+class TestTransaction(unittest.TestCase):
+    def test_transaction(self):
+        logger.info("==== BEGIN Transaction")
+        d1 = gtdbV3.create_connection(":memory:")
+        gtdbV3.initDB(d1, scriptPath=f'{_gtScripts}')
+        country = gtdbV3.getCountry(d1, 235)
+
+        logger.info("Changes commit once when the block exits")
+        with gtdbV3.transaction(d1):
+            gtdbV3.addMfg(d1, GT.Manufacture(None, "ZZTx One", country))
+            gtdbV3.addMfg(d1, GT.Manufacture(None, "ZZTx Two", country))
+            self.assertTrue(d1.in_transaction)
+        self.assertFalse(d1.in_transaction)
+        self.assertNotEqual(gtdbV3.getMfg(d1, 'Make', "ZZTx Two").id, 0)
+
+        logger.info("Nested block rolls back to its savepoint only")
+        with gtdbV3.transaction(d1):
+            gtdbV3.addMfg(d1, GT.Manufacture(None, "ZZTx Outer", country))
+            with gtdbV3.transaction(d1) as tx:
+                gtdbV3.addMfg(d1, GT.Manufacture(None, "ZZTx Inner", country))
+                tx.rollback()
+        self.assertNotEqual(gtdbV3.getMfg(d1, 'Make', "ZZTx Outer").id, 0)
+        self.assertEqual(gtdbV3.getMfg(d1, 'Make', "ZZTx Inner").id, 0)
+
+        logger.info("An exception rolls back the whole block")
+        with self.assertRaises(ValueError):
+            with gtdbV3.transaction(d1):
+                gtdbV3.addMfg(d1, GT.Manufacture(None, "ZZTx Error", country))
+                raise ValueError("test")
+        self.assertEqual(gtdbV3.getMfg(d1, 'Make', "ZZTx Error").id, 0)
+        self.assertEqual(d1.txDepth, 0)
+
+        logger.info("addTrack leaves no track when the layout fails")
+        xTlayout = GT.TrackLayout(None, None, .1, GT.Track(None, "ZZTx Track", country),
+                                  GT.Circuit(id=1, name=None))
+        result = gtdbV3.addTrack(d1, xTlayout)
+        self.assertEqual(result[0], 105)
+        self.assertEqual(gtdbV3.getTrack(d1, 'track', "ZZTx Track").id, 0)
+        logger.info(f"==== END Transaction\n")
+
+    def test_transactionPlainConnection(self):
+        logger.info("==== BEGIN Transaction on a plain sqlite3 connection")
+        d1 = sqlite3.connect(":memory:")
+        gtdbV3.initDB(d1, scriptPath=f'{_gtScripts}')
+        country = gtdbV3.getCountry(d1, 235)
+
+        with gtdbV3.transaction(d1):
+            gtdbV3.addMfg(d1, GT.Manufacture(None, "ZZPlain One", country))
+            self.assertTrue(d1.in_transaction)
+            with self.assertRaises(ValueError):
+                with gtdbV3.transaction(d1):
+                    gtdbV3.addMfg(d1, GT.Manufacture(None, "ZZPlain Two", country))
+                    raise ValueError("test")
+        self.assertFalse(d1.in_transaction)
+        self.assertNotEqual(gtdbV3.getMfg(d1, 'Make', "ZZPlain One").id, 0)
+        self.assertEqual(gtdbV3.getMfg(d1, 'Make', "ZZPlain Two").id, 0)
+        self.assertEqual(gtdbV3._plainTxDepth, {})
+
+        logger.info("addTrack runs in a transaction")
+        xTlayout = GT.TrackLayout(None, "ZZPlain Layout", 1.1, GT.Track(None, "ZZPlain Track", country),
+                                  GT.Circuit(id=1, name=None))
+        result = gtdbV3.addTrack(d1, xTlayout)
+        self.assertEqual(result[0], 0)
+        self.assertNotEqual(gtdbV3.getTrack(d1, 'track', "ZZPlain Track").id, 0)
+        logger.info(f"==== END Transaction on a plain sqlite3 connection\n")
+
+
+class TestValidateMany(unittest.TestCase):
+    def test_validateMany(self):
+        logger.info("==== BEGIN Validate many")
+        d1 = gtdbV3.create_connection(":memory:")
+        gtdbV3.initDB(d1, scriptPath=f'{_gtScripts}')
+
+        races = gtdbV3.getRaces(d1, [1, 2, 3])
+        races[1].name = "ZZ New race name"
+        races[2].name = "ZZ Other race name"
+        races[2].weather = GT.Weather(id=9999, name="")
+        expected = [gtdbV3.validateRace(d1, x) for x in races]
+        logger.info(f"expected = {expected}")
+        self.assertEqual([x[0] for x in expected], [False, True, False])
+
+        logger.info("Preloaded keys give the same results as the db checks")
+        self.assertEqual(gtdbV3.validateMany(
+            d1, gtdbV3.validateRace, races), expected)
+
+        logger.info("Layout names are checked case insensitive")
+        layout = gtdbV3.getLayout(d1, 1)
+        layout.name = layout.name.upper()
+        keys = gtdbV3.loadValidationKeys(d1, ['layoutName'])
+        self.assertFalse(gtdbV3.validateTrackLayout(d1, layout)[0])
+        self.assertFalse(gtdbV3.validateTrackLayout(d1, layout, keys)[0])
+
+        logger.info("Non ASCII names are upper cased the same by both checks")
+        plain = sqlite3.connect(":memory:")
+        gtdbV3.initDB(plain, scriptPath=f'{_gtScripts}')
+        for conn in (d1, plain):
+            with self.subTest(conn=type(conn).__name__):
+                conn.execute("INSERT INTO track_layout (track_id, name, miles, circuit_id) VALUES (?, 'Nürburg', 1.5, 1)",
+                             (layout.track.id,))
+                conn.commit()
+                layout.name = "NÜRBURG"
+                keys = gtdbV3.loadValidationKeys(conn, ['layoutName'])
+                self.assertFalse(gtdbV3.validateTrackLayout(conn, layout)[0])
+                self.assertFalse(gtdbV3.validateTrackLayout(conn, layout, keys)[0])
+                layout.name = "NÜRBURG GP"
+                self.assertTrue(gtdbV3.validateTrackLayout(conn, layout)[0])
+                self.assertTrue(gtdbV3.validateTrackLayout(conn, layout, keys)[0])
+        logger.info(f"==== END Validate many\n")
+
+
 class TestWeather(unittest.TestCase):
     def test_getWeatherList(self):
         logger.info("==== BEGIN Get Weather List")
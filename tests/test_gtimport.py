@@ -0,0 +1,126 @@
+# python -m unittest tests.test_gtimport
+import unittest
+from pathlib import Path
+import json
+import logging
+import tempfile
+
+# App Testing requirements
+from GranT import gtdbV3
+from GranT import gtimport
+from GranT import gtschema
+from GranT import GTClasses as GT
+
+_gtPath = Path.cwd()
+_gtScripts = _gtPath / 'Scripts'
+
+logger = logging.getLogger()
+
+
+def _newDB():
+    d1 = gtdbV3.create_connection(":memory:")
+    gtschema.migrate(d1, scriptPath=_gtScripts)
+    return d1
+
+
+class TestImport(unittest.TestCase):
+    def test_importCars(self):
+        logger.info("==== BEGIN Import cars")
+        d1 = _newDB()
+        rows = [{'model': 'ZZ Import 1', 'mfg': 'bmw', 'category': 'Gr.3', 'drivetrain': 'FR', 'year': '2001'},
+                {'model': 'ZZ Import 2', 'mfg_id': 7, 'cat_id': 3, 'drivetrain_id': 1, 'year': None},
+                {'model': 'zz import 1', 'mfg': 'BMW', 'category': 'Gr.3', 'drivetrain': 'FR'},
+                {'model': 'ZZ Import 3', 'mfg': 'No such mfg', 'category': 'Gr.3', 'drivetrain': 'FR'},
+                {'model': 'ZZ Import 4', 'mfg': 'BMW', 'category': 'Gr.3', 'drivetrain': 'FR', 'year': 'new'}]
+
+        logger.info("Invalid rows are rejected, the rest are saved")
+        result = gtimport.importCars(d1, rows)
+        logger.info(f"result = {result}")
+        self.assertEqual(result[0], 1)
+        self.assertEqual([x[0] for x in result[2]], [3, 4, 5])
+        self.assertEqual(d1.execute("SELECT count(*) FROM car").fetchone()[0], 2)
+
+        logger.info("Strict mode saves nothing when a row fails")
+        rows = [{'model': 'ZZ Strict 1', 'mfg': 'BMW', 'category': 'Gr.3', 'drivetrain': 'FR'},
+                {'model': '', 'mfg': 'BMW', 'category': 'Gr.3', 'drivetrain': 'FR'}]
+        result = gtimport.importCars(d1, rows, strict=True)
+        self.assertEqual(result[0], 1)
+        self.assertEqual(d1.execute("SELECT count(*) FROM car").fetchone()[0], 2)
+
+    def test_importFile(self):
+        logger.info("==== BEGIN Import car settings from csv")
+        d1 = _newDB()
+        gtimport.importCars(d1, [{'model': 'ZZ Car', 'mfg': 'BMW', 'category': 'Gr.3', 'drivetrain': 'FR'}])
+        with tempfile.TemporaryDirectory() as tmpDir:
+            csvFile = Path(tmpDir) / 'car_setting.csv'
+            csvFile.write_text("car,category,name,tire_code,max_power,accel,gear_1\n"
+                               "ZZ Car,Gr.3,Setting 1,rh,500,1.5,3.1\n"
+                               "ZZ Car,Gr.3,Setting 2,,,,\n"
+                               "ZZ Car,Gr.3,Setting 1,RH,500,1.5,3.1\n"
+                               "ZZ Car,Gr.3,Setting 3,ZZ,500,1.5,3.1\n"
+                               "ZZ Car,Gr.3,Setting 4,RH,lots,1.5,3.1\n")
+            result = gtimport.importFile(d1, csvFile)
+        logger.info(f"result = {result}")
+        self.assertEqual([x[0] for x in result[2]], [3, 4, 5])
+        settings = d1.execute(
+            "SELECT name, tire_code, max_power, accel, gear_1, gear_1_ratio FROM car_setting ORDER BY name").fetchall()
+        self.assertEqual(settings, [('Setting 1', 'RH', 500, 1.5, '3.1', 3.1),
+                                    ('Setting 2', None, None, None, None, None)])
+
+        logger.info("Unknown import type")
+        result = gtimport.importFile(d1, 'nothing.csv')
+        self.assertEqual(result[0], 3)
+
+    def test_importTracksAndRaces(self):
+        logger.info("==== BEGIN Import tracks and races from json")
+        d1 = _newDB()
+        tracks = [{'track': 'ZZ Ring', 'country': 'DE', 'layout': 'Full', 'miles': '3.2', 'circuit_id': 1},
+                  {'track': 'ZZ Ring', 'layout': 'Short', 'miles': 1.1, 'circuit': 'original circuit'},
+                  {'track': 'ZZ Ring', 'layout': 'full', 'miles': 3.2, 'circuit_id': 1},
+                  {'track': 'Dragon Tail', 'layout': 'ZZ New', 'miles': 'far', 'circuit_id': 1}]
+        races = [{'name': 'ZZ Race', 'rc_id': 1, 'weather': 'Cloudy', 'race_type': 'Lap(s)',
+                  'track': 'zz ring', 'layout': 'Short', 'racetime': '5 laps'},
+                 {'name': 'zz race', 'rc_id': 1, 'weather_id': 1, 'type_id': 1, 'tl_id': 1}]
+        with tempfile.TemporaryDirectory() as tmpDir:
+            trackFile = Path(tmpDir) / 'track.json'
+            trackFile.write_text(json.dumps(tracks))
+            raceFile = Path(tmpDir) / 'races.jsonl'
+            raceFile.write_text("\n".join(json.dumps(x) for x in races))
+            trackResult = gtimport.importFile(d1, trackFile)
+            raceResult = gtimport.importFile(d1, raceFile, kind='race')
+
+        logger.info(f"trackResult = {trackResult}")
+        self.assertEqual([x[0] for x in trackResult[2]], [3, 4])
+        track = gtdbV3.getTrack(d1, key='track', value='ZZ Ring')
+        self.assertEqual(track.country.alpha2, 'DE')
+        self.assertEqual(len(gtdbV3.getLayoutList(d1, track.id)), 2)
+
+        logger.info(f"raceResult = {raceResult}")
+        self.assertEqual([x[0] for x in raceResult[2]], [2])
+        race = gtdbV3.getRacesForCollection(d1, 1)
+        race = [x for x in race if x.name == 'ZZ Race'][0]
+        self.assertEqual(race.trackLayout.name, 'Short')
+        self.assertEqual(race.weather.name, 'Cloudy')
+
+        logger.info("Names are compared with the gtdbV3 rules. Non ASCII is case insensitive too")
+        result = gtimport.importTracks(d1, [{'track': 'ZZ Ring', 'layout': 'Nürburg', 'miles': 1, 'circuit_id': 1},
+                                            {'track': 'ZZ Ring', 'layout': 'NÜRBURG', 'miles': 1, 'circuit_id': 1}])
+        self.assertEqual([x[0] for x in result[2]], [2])
+        self.assertFalse(gtdbV3.validateTrackLayout(d1, GT.TrackLayout(
+            None, 'NÜRBURG', 1.0, track, GT.Circuit(id=1, name=None)))[0])
+
+    def test_readJsonRows(self):
+        logger.info("==== BEGIN Read a json list a piece at a time")
+        rows = [{'name': f"ZZ {x}", 'notes': "}, ] {" * x} for x in range(40)]
+        saved = gtimport._jsonReadSize
+        gtimport._jsonReadSize = 7  # Rows are cut by the reads
+        try:
+            with tempfile.TemporaryDirectory() as tmpDir:
+                jsonFile = Path(tmpDir) / 'rows.json'
+                jsonFile.write_text(json.dumps(rows, indent=2))
+                self.assertEqual(list(gtimport.readRows(jsonFile)), rows)
+                jsonFile.write_text(json.dumps(rows)[:-1])
+                with self.assertRaises(ValueError):
+                    list(gtimport.readRows(jsonFile))
+        finally:
+            gtimport._jsonReadSize = saved
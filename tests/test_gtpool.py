@@ -0,0 +1,123 @@
+# python -m unittest tests.test_gtpool
+import unittest
+from pathlib import Path
+import logging
+import tempfile
+import threading
+
+# App Testing requirements
+from GranT import gtdbV3
+from GranT import gtpool
+from GranT import GTClasses as GT
+
+_gtPath = Path.cwd()
+_gtScripts = _gtPath / 'Scripts'
+
+logger = logging.getLogger()
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.pool = gtpool.ConnectionPool(
+            f'{Path(self.tmpDir.name) / "pool.db"}', readers=2, timeout=10)
+        gtdbV3.initDB(self.pool, scriptPath=f'{_gtScripts}')
+
+    def tearDown(self):
+        self.pool.close()
+        self.tmpDir.cleanup()
+
+    def test_readWrite(self):
+        logger.info("==== BEGIN Connection pool read/write")
+        pool = self.pool
+        self.assertEqual(gtdbV3.getRace(pool, 1).id, 1)
+        country = gtdbV3.getCountry(pool, 235)
+
+        logger.info("Writes go to the writer and are seen by the readers")
+        result = gtdbV3.addMfg(pool, GT.Manufacture(None, "ZZPool", country))
+        self.assertEqual(result[0], 0)
+        self.assertNotEqual(gtdbV3.getMfg(pool, 'Make', "ZZPool").id, 0)
+
+        logger.info("Reads inside a transaction see its uncommitted rows")
+        with gtdbV3.transaction(pool) as tx:
+            gtdbV3.addMfg(pool, GT.Manufacture(None, "ZZPool Tx", country))
+            self.assertNotEqual(gtdbV3.getMfg(pool, 'Make', "ZZPool Tx").id, 0)
+            tx.rollback()
+        self.assertEqual(gtdbV3.getMfg(pool, 'Make', "ZZPool Tx").id, 0)
+
+        logger.info("Lookup table changes reach the reader caches")
+        gtdbV3.getWeather(pool, 1)
+        gtdbV3._exeDML(pool, "UPDATE weather SET name = ? WHERE id = ?", ('ZZPool Weather', 1))
+        self.assertEqual(gtdbV3.getWeather(pool, 1).name, 'ZZPool Weather')
+
+        logger.info("Reader caches are cleared after the commit, not before")
+        reader = pool.connections()[1]
+        with pool.checkout(write=True) as writer:
+            with gtdbV3.transaction(writer):
+                gtdbV3._exeDML(writer, "UPDATE weather SET name = ? WHERE id = ?", ('ZZPool Tx Weather', 1))
+                gtdbV3._lookupCache(reader, 'weather')  # A reader reloads before the commit
+                self.assertEqual(reader.lookupCache['weather'][1].name, 'ZZPool Weather')
+        self.assertNotIn('weather', reader.lookupCache)
+        self.assertEqual(gtdbV3.getWeather(pool, 1).name, 'ZZPool Tx Weather')
+
+        logger.info("A failed write leaves the caches alone")
+        gtdbV3._lookupCache(reader, 'weather')
+        result = gtdbV3._exeDML(pool, "INSERT INTO weather (id, name) VALUES (?, ?)", (1, 'ZZDuplicate'))
+        self.assertEqual(result[0], 2)
+        self.assertIn('weather', reader.lookupCache)
+
+        stats = pool.stats()
+        logger.info(f"stats = {stats}")
+        self.assertGreater(stats['reader']['checkouts'], 0)
+        self.assertGreater(stats['writer']['checkouts'], 0)
+        self.assertEqual(stats['reader']['inUse'], 0)
+        self.assertEqual(stats['writer']['inUse'], 0)
+
+    def test_threads(self):
+        logger.info("==== BEGIN Connection pool threads")
+        pool = self.pool
+        errors = []
+
+        def report():
+            try:
+                for x in range(20):
+                    self.assertEqual(len(gtdbV3.getRacesForCollection(pool, 1)),
+                                     len(gtdbV3.getRaceList(pool, 1)))
+            except Exception as err:
+                errors.append(err)
+
+        workers = [threading.Thread(target=report) for x in range(4)]
+        for worker in workers:
+            worker.start()
+        country = gtdbV3.getCountry(pool, 235)
+        for x in range(10):
+            gtdbV3.addMfg(pool, GT.Manufacture(None, f"ZZThread {x}", country))
+        for worker in workers:
+            worker.join()
+        self.assertEqual(errors, [])
+        self.assertLessEqual(pool.stats()['reader']['peakInUse'], 2)
+
+    def test_timeout(self):
+        logger.info("==== BEGIN Connection pool timeout")
+        pool = gtpool.ConnectionPool(self.pool.dbLoc, readers=1, timeout=0.01)
+        try:
+            timedOut = []
+
+            def grab():
+                try:
+                    with pool.checkout():
+                        pass
+                except TimeoutError:
+                    timedOut.append(True)
+
+            with pool.checkout() as conn:
+                self.assertIs(conn, pool.connections()[1])
+                worker = threading.Thread(target=grab)
+                worker.start()
+                worker.join()
+            self.assertEqual(timedOut, [True])
+        finally:
+            pool.close()
+
+        with self.assertRaises(ValueError):
+            gtpool.ConnectionPool(":memory:")
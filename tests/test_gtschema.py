@@ -0,0 +1,182 @@
+# python -m unittest tests.test_gtschema
+import unittest
+from pathlib import Path
+import logging
+import shutil
+import sqlite3
+import tempfile
+
+# App Testing requirements
+from GranT import GTClasses as GT
+from GranT import gtdbV3
+from GranT import gtschema
+
+_gtPath = Path.cwd()
+_gtScripts = _gtPath / 'Scripts'
+
+logger = logging.getLogger()
+
+
+def _indexes(dbConn):
+    return {x[0] for x in dbConn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL")}
+
+
+class TestMigrate(unittest.TestCase):
+    def test_newDB(self):
+        logger.info("==== BEGIN Migrate new database")
+        d1 = gtdbV3.create_connection(":memory:")
+        self.assertEqual(gtschema.schemaVersion(d1), 0)
+        result = gtschema.migrate(d1, scriptPath=_gtScripts)
+        logger.info(f"result = {result}")
+        self.assertEqual(result[0], 0)
+        self.assertEqual(gtschema.schemaVersion(d1), gtschema.latestVersion())
+        self.assertEqual(len(gtdbV3.getLeagueList(d1)), 4)
+        self.assertIn('car_setting_car_id_name', _indexes(d1))
+        self.assertEqual(d1.execute("PRAGMA foreign_key_check").fetchall(), [])
+
+        logger.info("Current database is left alone")
+        d1.execute("INSERT INTO car (model, mfg_id, cat_id, drivetrain_id) VALUES ('ZZ Car', 1, 1, 1)")
+        d1.commit()
+        result = gtschema.migrate(d1, scriptPath=_gtScripts)
+        self.assertEqual(result, (0, f"Schema version {gtschema.latestVersion()} is current"))
+        self.assertEqual(d1.execute("SELECT count(*) FROM car").fetchone()[0], 1)
+
+    def test_legacyDB(self):
+        logger.info("==== BEGIN Migrate database created before versioning")
+        d1 = gtdbV3.create_connection(":memory:")
+        gtdbV3.initDB(d1, scriptPath=f'{_gtScripts}')
+        gtdbV3._exeScriptFile(
+            d1, scriptFileName=f'{_gtScripts / "createUserTables.sql"}')
+        d1.execute("DROP INDEX car_setting_car_id_name")
+        d1.execute("INSERT INTO car (model, mfg_id, cat_id, drivetrain_id) VALUES ('ZZ Car', 1, 1, 1)")
+        d1.commit()
+
+        result = gtschema.migrate(d1, scriptPath=_gtScripts)
+        logger.info(f"result = {result}")
+        self.assertEqual(result[0], 0)
+        self.assertEqual(gtschema.schemaVersion(d1), gtschema.latestVersion())
+        self.assertIn('car_setting_car_id_name', _indexes(d1))
+        self.assertEqual(d1.execute("SELECT count(*) FROM car").fetchone()[0], 1)
+
+    def test_failedStep(self):
+        logger.info("==== BEGIN Failed migration rolls back every step")
+        d1 = gtdbV3.create_connection(":memory:")
+        saved = gtschema._migrations
+        gtschema._migrations = saved + [
+            (saved[-1][0] + 1, "Broken", lambda dbConn, scriptPath: dbConn.execute("ALTER TABLE nothing ADD x"))]
+        try:
+            result = gtschema.migrate(d1, scriptPath=_gtScripts)
+        finally:
+            gtschema._migrations = saved
+        logger.info(f"result = {result}")
+        self.assertEqual(result[0], 1)
+        self.assertEqual(gtschema.schemaVersion(d1), 0)
+        self.assertEqual(d1.execute("SELECT count(*) FROM sqlite_master").fetchone()[0], 0)
+
+        logger.info("Migrate to a target version")
+        result = gtschema.migrate(d1, scriptPath=_gtScripts, target=1)
+        self.assertEqual(result[0], 0)
+        self.assertEqual(gtschema.schemaVersion(d1), 1)
+        self.assertEqual(d1.execute(
+            "SELECT count(*) FROM sqlite_master WHERE name = 'car'").fetchone()[0], 0)
+
+    def test_gearRatios(self):
+        logger.info("==== BEGIN Gear ratio columns follow the gear text")
+        d1 = gtdbV3.create_connection(":memory:")
+        gtschema.migrate(d1, scriptPath=_gtScripts, target=3)
+        gtdbV3._exeScriptFile(d1, scriptFileName=_gtPath / 'tests' / 'test_carData.sql')
+        result = gtschema.migrate(d1, scriptPath=_gtScripts)
+        self.assertEqual(result[0], 0)
+        self.assertEqual(d1.execute("SELECT gear_1_ratio, gear_7_ratio, final_gear_ratio FROM car_setting WHERE id = 3").fetchone(),
+                         (1.2345, 0.1707, 3.16))
+
+        self.assertEqual(d1.execute("SELECT count(*) FROM sqlite_master WHERE type = 'trigger'").fetchone()[0], 0)
+
+        logger.info("Add and update write the ratios")
+        xObj = GT.CustCarSettings(id=0, car_id=1, name="Ratios", cat_id=1)
+        xObj.gear_1 = "2.5/100"
+        xObj.final_gear = "abc"
+        self.assertEqual(gtdbV3.addCarSetting(d1, xObj)[0], 0)
+        xObj.id = d1.execute("SELECT id FROM car_setting WHERE name = 'Ratios'").fetchone()[0]
+        ratioSQL = "SELECT gear_1_ratio, final_gear_ratio FROM car_setting WHERE id = ?"
+        self.assertEqual(d1.execute(ratioSQL, (xObj.id,)).fetchone(), (2.5, None))
+        xObj.name = "Ratios 2"  # Updates must change the name
+        xObj.gear_1 = None
+        xObj.final_gear = "4.1"
+        self.assertEqual(gtdbV3.updateCarSetting(d1, xObj)[0], 0)
+        self.assertEqual(d1.execute(ratioSQL, (xObj.id,)).fetchone(), (None, 4.1))
+
+        logger.info("The ratio columns and gearRatios decode gear text the same way")
+        for text in ('.', '1.2.3', '1.5abc', '3,9', '-1.2', ' 2.5', '2.5/100', '', None):
+            with self.subTest(text=text):
+                xObj.name = f"Ratios {text}"
+                xObj.gear_1 = text
+                self.assertEqual(gtdbV3.updateCarSetting(d1, xObj)[0], 0)
+                ratio = d1.execute(ratioSQL, (xObj.id,)).fetchone()[0]
+                self.assertEqual(ratio, gtdbV3.getCarSetting(d1, xObj.id).gearRatios[0])
+
+        logger.info("Plain sqlite3 connections can write car_setting")
+        d1.commit()
+        plain = sqlite3.connect(":memory:")
+        d1.backup(plain)
+        plain.execute("UPDATE car_setting SET gear_1 = '3.5' WHERE id = ?", (xObj.id,))
+        plain.execute("INSERT INTO car_setting (car_id, cat_id, name, gear_1) VALUES (1, 1, 'Plain', '2.0')")
+        xObj.name = "Ratios plain"
+        xObj.gear_1 = "3.7"
+        self.assertEqual(gtdbV3.updateCarSetting(plain, xObj)[0], 0)
+        self.assertEqual(plain.execute(ratioSQL, (xObj.id,)).fetchone()[0], 3.7)
+
+
+class TestBootstrap(unittest.TestCase):
+    def test_snapshot(self):
+        logger.info("==== BEGIN Bootstrap from snapshot")
+        with tempfile.TemporaryDirectory() as tmpDir:
+            scripts = Path(tmpDir) / 'Scripts'
+            shutil.copytree(_gtScripts, scripts)
+            result = gtschema.buildSnapshot(scriptPath=scripts)
+            logger.info(f"result = {result}")
+            self.assertEqual(result[0], 0)
+            self.assertTrue((scripts / 'seed.db').exists())
+
+            d1 = gtdbV3.create_connection(":memory:")
+            result = gtschema.bootstrap(d1, scriptPath=scripts)
+            logger.info(f"result = {result}")
+            self.assertIn('snapshot', result[1])
+            self.assertEqual(gtschema.schemaVersion(d1), gtschema.latestVersion())
+            self.assertEqual(d1.execute("SELECT count(*) FROM race").fetchone()[0], 301)
+            self.assertEqual(d1.execute(
+                "SELECT count(*) FROM sqlite_master WHERE name = 'gt_snapshot'").fetchone()[0], 0)
+
+            logger.info("Database with tables is not overwritten")
+            d1.execute("DELETE FROM race")
+            d1.commit()
+            result = gtschema.bootstrap(d1, scriptPath=scripts)
+            self.assertEqual(result[0], 0)
+            self.assertEqual(d1.execute("SELECT count(*) FROM race").fetchone()[0], 0)
+
+            logger.info("Stale snapshot falls back to the migrations")
+            with open(scripts / 'addIndexes.sql', 'a') as sFile:
+                sFile.write("CREATE INDEX IF NOT EXISTS race_weather_id ON race (weather_id);\n")
+            d2 = gtdbV3.create_connection(":memory:")
+            result = gtschema.bootstrap(d2, scriptPath=scripts)
+            logger.info(f"result = {result}")
+            self.assertEqual(result, (0, f"Schema migrated to version {gtschema.latestVersion()}"))
+            self.assertEqual(d2.execute(
+                "SELECT count(*) FROM sqlite_master WHERE name = 'race_weather_id'").fetchone()[0], 1)
+
+            logger.info("A changed function step changes the fingerprint")
+            fingerprint = gtschema._fingerprint(scripts)
+            self.assertEqual(gtschema._fingerprint(scripts), fingerprint)
+
+            def changedStep(dbConn, scriptPath):
+                dbConn.execute("SELECT 1")
+
+            saved = gtschema._migrations
+            step = next(x for x in saved if callable(x[2]))[2]
+            changedStep.__module__, changedStep.__qualname__ = step.__module__, step.__qualname__
+            gtschema._migrations = [x[:2] + (changedStep,) if x[2] is step else x for x in saved]
+            try:
+                self.assertNotEqual(gtschema._fingerprint(scripts), fingerprint)
+            finally:
+                gtschema._migrations = saved
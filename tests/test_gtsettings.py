@@ -0,0 +1,110 @@
+# python -m unittest tests.test_gtsettings
+import unittest
+from pathlib import Path
+import logging
+import math
+
+# App Testing requirements
+from GranT import gtdbV3
+from GranT import gtschema
+from GranT import gtsettings
+
+_gtPath = Path.cwd()
+_gtScripts = _gtPath / 'Scripts'
+
+logger = logging.getLogger()
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def _settingsDB():
+    d1 = gtdbV3.create_connection(":memory:")
+    # Load the data before the gear ratio columns so the migration fills them
+    gtschema.migrate(d1, scriptPath=_gtScripts, target=3)
+    gtdbV3._exeScriptFile(d1, scriptFileName=_gtPath / 'tests' / 'test_carData.sql')
+    gtschema.migrate(d1, scriptPath=_gtScripts)
+    return d1
+
+
+class TestSettingStore(unittest.TestCase):
+    def setUp(self):
+        self.d1 = _settingsDB()
+        self.store = gtsettings.SettingStore.load(self.d1)
+
+    def test_load(self):
+        logger.info("==== BEGIN Load car settings as columns")
+        self.assertEqual(len(self.store), self.d1.execute("SELECT count(*) FROM car_setting").fetchone()[0])
+        pos = self.store.position(3)
+        self.assertEqual(self.store.columns['max_torque'][pos], 987.3)
+        self.assertEqual(self.store.columns['gear_1'][pos], 1.2345)
+        self.assertEqual(self.store.columns['cornering'][pos], 7.2)
+        self.assertTrue(math.isnan(self.store.columns['accel'][self.store.position(1)]))
+        self.assertIsNone(self.store.position(999999))
+
+    def test_rank(self):
+        logger.info("==== BEGIN Rank car settings")
+        ranked = self.store.rank(self.store.powerToWeight())
+        values = [x[1] for x in ranked]
+        self.assertEqual(values, sorted(values, reverse=True))
+        expected = [x[0] for x in self.d1.execute(
+            "SELECT id FROM car_setting WHERE weight > 0 AND max_power IS NOT NULL ORDER BY 1.0 * max_power / weight DESC")]
+        self.assertEqual([x[0] for x in ranked], expected)
+
+        logger.info("Rank one car class")
+        ranked = self.store.rank(self.store.columns['max_power'], catId=2, reverse=False)
+        self.assertEqual([x[0] for x in ranked], [x[0] for x in self.d1.execute(
+            "SELECT id FROM car_setting WHERE cat_id = 2 AND max_power IS NOT NULL ORDER BY max_power")])
+
+    def test_filter(self):
+        logger.info("==== BEGIN Filter car settings")
+        result = self.store.filter(max_power=(30, None), weight=(None, 2000))
+        self.assertEqual(result, [x[0] for x in self.d1.execute(
+            "SELECT id FROM car_setting WHERE max_power >= 30 AND weight <= 2000 ORDER BY id")])
+        self.assertEqual(self.store.filter(catId=999999), [])
+
+    def test_nearest(self):
+        logger.info("==== BEGIN Nearest car settings")
+        result = self.store.nearest(3, count=2)
+        logger.info(f"result={result}")
+        self.assertEqual(len(result), 2)
+        self.assertNotIn(3, [x[0] for x in result])
+        self.assertEqual(result[0], (4, min(x[1] for x in self.store.nearest(3, count=len(self.store)))))
+        self.assertEqual(self.store.nearest(999999), [])
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_toNumpy(self):
+        arrays = self.store.toNumpy()
+        self.assertEqual(arrays['id'].tolist(), self.store.columns['id'].tolist())
+
+    @unittest.skipIf(numpy is None, "numpy is not installed")
+    def test_numpyMatchesLoops(self):
+        logger.info("==== BEGIN numpy and Python loops give the same results")
+        store = self.store
+
+        def results():
+            return [list(store.powerToWeight()),
+                    store.rank(store.powerToWeight()),
+                    store.rank(store.columns['max_power'], catId=2, reverse=False),
+                    store.filter(max_power=(30, None), weight=(None, 2000)),
+                    store.filter(catId=2, gear_1=(1, 3)),
+                    store.nearest(3, count=len(store)),
+                    store.nearest(4, columns=['max_power', 'weight', 'gear_1'])]
+
+        withNumpy = results()
+        store._ranges = {}
+        gtsettings.numpy = None
+        try:
+            withLoops = results()
+        finally:
+            gtsettings.numpy = numpy
+        for expected, result in zip(withLoops, withNumpy):
+            with self.subTest(expected=expected):
+                self.assertEqual(len(result), len(expected))
+                for x, y in zip(result, expected):
+                    if isinstance(x, float) and math.isnan(x):
+                        self.assertTrue(math.isnan(y))
+                    else:
+                        self.assertEqual(x, y)
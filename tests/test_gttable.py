@@ -0,0 +1,42 @@
+# python -m unittest tests.test_gttable
+import unittest
+import io
+import logging
+
+# App Testing requirements
+from GranT import gttable
+
+logger = logging.getLogger()
+
+
+class TTY(io.StringIO):
+    def isatty(self):
+        return True
+
+
+class TestTable(unittest.TestCase):
+    def test_plain(self):
+        logger.info("==== BEGIN Plain text table")
+        out = io.StringIO()
+        table = gttable.Table([gttable.Column('ID', 3, '>'), gttable.Column('Name', 8),
+                               gttable.Column('Prize', 7, '>', '{:,}'.format)], out=out)
+        self.assertFalse(table.tty)
+        count = table.write([[(1, 'Short', 1000), (22, 'A <b> name too long', None)], [], [(333, None, 5)]])
+        logger.info(f"\n{out.getvalue()}")
+        self.assertEqual(count, 3)
+        self.assertEqual(out.getvalue().splitlines(), [
+            '  ID | Name     |   Prize',
+            '-' * 25,
+            '   1 | Short    |   1,000',
+            '  22 | A <b> na |        ',
+            ' 333 |          |       5',
+            '=' * 25])
+
+    def test_tty(self):
+        logger.info("==== BEGIN Terminal table")
+        out = TTY()
+        table = gttable.Table([gttable.Column('ID', 3, '>'), gttable.Column('Name', 8)], out=out)
+        self.assertTrue(table.tty)
+        self.assertEqual(table.writeRows([(1, 'A & <B>')]), 1)
+        logger.info(repr(out.getvalue()))
+        self.assertIn('A & <B> ', out.getvalue())